@@ -0,0 +1,3 @@
+"""
+Benchmarks. Run a benchmark with `python -m benchmarks.<module>`.
+"""
@@ -0,0 +1,68 @@
+"""
+Command line shared by the benchmarks saving a baseline: `run --save FILE` writes
+the results, `compare BASELINE` runs again, or reads `--current`, and exits with
+status 1 when a result regressed against the baseline.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RunTypeAlias = Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]
+"""
+`run(baseline)` runs the benchmark and returns its results. `baseline` is the saved
+run being compared with, whose settings are used, or None.
+"""
+
+CompareTypeAlias = Callable[[Dict[str, Any], Dict[str, Any], float], List[Tuple[str, float]]]
+"""
+`compare(baseline, current, threshold)` prints the changes and returns the regressions.
+"""
+
+
+def add_baseline_arguments(sub: argparse.ArgumentParser, command: str, threshold: float, threshold_help: str) -> None:
+    """
+    Add the arguments of the `run` and `compare` commands.
+
+    Args:
+        sub (argparse.ArgumentParser): Parser of `command`.
+        command (str): `run` or `compare`.
+        threshold (float): Default threshold of `compare`, in percent.
+        threshold_help (str): Help of the threshold.
+    """
+    if command == 'run':
+        sub.add_argument('--save', help='write the results to this JSON file')
+    elif command == 'compare':
+        sub.add_argument('baseline', help='JSON file written by run --save')
+        sub.add_argument('--current', help='JSON file to compare, instead of running the benchmark')
+        sub.add_argument('--threshold', type=float, default=threshold, help=threshold_help)
+
+
+def run_baseline_command(args: argparse.Namespace, run: RunTypeAlias, compare: CompareTypeAlias) -> None:
+    """
+    Run the `run` or `compare` command parsed in `args`.
+
+    Args:
+        args (argparse.Namespace): _description_
+        run (RunTypeAlias): _description_
+        compare (CompareTypeAlias): _description_
+    """
+    if args.command == 'run':
+        results = run(None)
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=1)
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        current = run(baseline)
+        print()
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f'{len(regressions)} regressions over {args.threshold:.0f}%')
+        sys.exit(1)
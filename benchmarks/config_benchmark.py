@@ -0,0 +1,83 @@
+"""
+Compare building a configuration for each request against deriving it from a
+prototype with `Config.clone(...)`, for a default configuration and for one with
+customized labels, attribute names and codecs. A clone binds its processors on
+first use, so cloning is also timed with the binding, as done by its first
+conversion. Also times sending a configuration to another process: pickling it, which uses its compact `to_wire()` form, and
+unpickling it.
+
+Usage: python -m benchmarks.config_benchmark [--number N] [--repeat N]
+"""
+import argparse
+import functools
+import pickle
+import timeit
+from libs.attributes import AttributeFlags
+from libs.codec_wrapper import CodecWrapper
+from libs.config import Config
+
+
+def build_custom_config() -> Config:
+    """
+    A configuration set up the way a service typically does it.
+    """
+    config = Config()
+    config.root_label = 'response'
+    config.override_dict_label = 'record'
+    config.override_sequence_label = 'items'
+    config.override_none_label = 'null'
+    config.sanitize_text = True
+    config.attr_flag_names[AttributeFlags.INC_SEQ_ID] = 'seq'
+    config.attr_flag_names[AttributeFlags.INC_LEN] = 'count'
+    config.codec_text = CodecWrapper('latin_1')
+    config.codec_binary = CodecWrapper('hex')
+    return config
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the timings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    default = Config()
+    custom = build_custom_config()
+
+    def build_default() -> Config:
+        config = Config()
+        config.attr_flags = AttributeFlags.INC_SEQ_ID
+        config.override_str_label = 'text'
+        return config
+
+    def build_custom() -> Config:
+        config = build_custom_config()
+        config.attr_flags = AttributeFlags.INC_SEQ_ID
+        config.override_str_label = 'text'
+        return config
+
+    timings = {
+        'default, Config()': build_default,
+        'default, clone()': lambda: default.clone(attr_flags=AttributeFlags.INC_SEQ_ID, override_str_label='text'),
+        'default, clone() + bind': lambda: default.clone(attr_flags=AttributeFlags.INC_SEQ_ID, override_str_label='text').default_processors,
+        'custom, built': build_custom,
+        'custom, clone()': lambda: custom.clone(attr_flags=AttributeFlags.INC_SEQ_ID, override_str_label='text'),
+        'custom, clone() + bind': lambda: custom.clone(attr_flags=AttributeFlags.INC_SEQ_ID, override_str_label='text').default_processors,
+    }
+    print(f'best of {args.repeat}, {args.number} configurations each, 2 options set')
+    for name, func in timings.items():
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        print(f'{name:24} {best / args.number * 1e6:10.2f} us')
+
+    print('pickling')
+    for name, config in {'default': default, 'custom': custom}.items():
+        data = pickle.dumps(config)
+        dumps = min(timeit.repeat(functools.partial(pickle.dumps, config), number=args.number, repeat=args.repeat))
+        loads = min(timeit.repeat(functools.partial(pickle.loads, data), number=args.number, repeat=args.repeat))
+        print(f'{name:24} {len(data):6} bytes {dumps / args.number * 1e6:10.2f} us dumps {loads / args.number * 1e6:10.2f} us loads')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare writing XML with `convert_to_string` against `ET.tostring`, on records
+with many repeated short values, a few of which need escaping.
+
+Usage: python -m benchmarks.escape_benchmark [--records N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.xml_element_wrapper_converters import convert_to_etree, convert_to_string
+from libs.xml_text import clear_escape_caches, escape_text
+
+STATUSES = ['OK', 'PENDING', 'FAILED', 'RETRY', 'R&D', 'N/A']
+COUNTRIES = ['France', 'Germany', 'Trinidad & Tobago', 'United States', 'Japan', 'Brazil', 'Bosnia & Herzegovina']
+
+
+def make_records(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build records that look like a typical API payload.
+    """
+    rnd = random.Random(seed)
+    return [
+        {
+            'id': i,
+            'status': rnd.choice(STATUSES),
+            'country': rnd.choice(COUNTRIES),
+            'comment': rnd.choice(['', 'checked', 'a < b', 'see "notes"']),
+            'score': rnd.random(),
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the timings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config()
+    config.attr_flags = AttributeFlags.NONE
+    records = make_records(args.records)
+    xml_wrapper = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=records)
+    root = convert_to_etree(xml_wrapper)
+    assert convert_to_string(xml_wrapper) == ET.tostring(root, encoding='unicode')
+
+    texts = [str(value) for record in records for value in record.values()]
+    timings = {
+        'escape only, ElementTree': lambda: [ET._escape_cdata(t) for t in texts],  # type: ignore[attr-defined] # pylint: disable=W0212; protected-access
+        'escape only, xml_text': lambda: [escape_text(t) for t in texts],
+        'ET.tostring(convert_to_etree)': lambda: ET.tostring(convert_to_etree(xml_wrapper), encoding='unicode'),
+        'ET.tostring, tree built': lambda: ET.tostring(root, encoding='unicode'),
+        'convert_to_string': lambda: convert_to_string(xml_wrapper),
+    }
+    print(f'{args.records} records, {len(texts)} values, best of {args.repeat}')
+    for name, func in timings.items():
+        clear_escape_caches()
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f'{name:32} {best * 1000:10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Memory used by each stage of the conversion pipeline, for the payloads of
+`benchmarks.suite`, with a saved baseline to catch regressions.
+
+Two pipelines are measured:
+    etree   `convert_to_xml`, then `convert_to_etree`, then `ET.tostring`
+    string  `convert_to_xml`, then `convert_to_string`
+`string` is measured again with `share_leaf_elements` set (`string_shared`).
+
+For each stage, `tracemalloc` gives the peak bytes allocated during the stage and
+the bytes still held after it (its result), both divided by the number of elements.
+The growth of the resident set size (RSS) over the whole pipeline is sampled in a
+new process for each case, without `tracemalloc`, where `/proc/self/statm` exists.
+
+Usage:
+    python -m benchmarks.memory_benchmark run [--scale N] [--profile NAME] [--filter TEXT] [--save FILE]
+    python -m benchmarks.memory_benchmark compare BASELINE [--current FILE] [--threshold PERCENT]
+
+`compare` exits with status 1 when the peak bytes per element of a stage grew by
+more than the threshold against the baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+from benchmarks.baseline import add_baseline_arguments, run_baseline_command
+from benchmarks.suite import GENERATORS, PROFILES, count_elements
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.config import Config
+from libs.xml_element_wrapper_converters import convert_to_etree, convert_to_string
+
+StageTypeAlias = Tuple[str, Callable[[Any], Any]]
+"""
+Name of a stage, and the function making its result from the result of the previous stage.
+"""
+
+PIPELINES: Dict[str, Tuple[bool, List[StageTypeAlias]]] = {
+    'etree': (False, [
+        ('convert_to_etree', convert_to_etree),
+        ('tostring', lambda root: ET.tostring(root, encoding='unicode')),
+    ]),
+    'string': (False, [
+        ('convert_to_string', convert_to_string),
+    ]),
+    'string_shared': (True, [
+        ('convert_to_string', convert_to_string),
+    ]),
+}
+"""
+Stages after `convert_to_xml` of each pipeline, and whether leaf elements are shared.
+"""
+
+_PAGE_SIZE: int = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process, or None where `/proc/self/statm` does not exist.
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+class RssSampler:
+    """
+    Sample the RSS in a thread while the pipeline runs, and keep the highest value.
+    The thread only runs when the main thread releases the GIL, every few milliseconds.
+    """
+
+    def __init__(self, interval: float = 0.0005) -> None:
+        self.interval = interval
+        self.peak: int = rss_bytes() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """
+        Take one sample now.
+        """
+        self.peak = max(self.peak, rss_bytes() or 0)
+
+    def __enter__(self) -> 'RssSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def make_config(flags_name: str, share_leaf_elements: bool) -> Config:
+    """
+    A configuration with the attribute flags of the profile `flags_name`.
+    """
+    config = Config()
+    config.attr_flags = PROFILES[flags_name]
+    config.share_leaf_elements = share_leaf_elements
+    return config
+
+
+def measure_stages(data: Any, config: Config, stages: List[StageTypeAlias]) -> Dict[str, Dict[str, int]]:
+    """
+    Run the pipeline under `tracemalloc`.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Peak and retained bytes of each stage.
+    """
+    all_stages: List[StageTypeAlias] = [
+        ('convert_to_xml', lambda data: DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+    ] + stages
+    results: List[Any] = []
+    measures: Dict[str, Dict[str, int]] = {}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = data
+        pipeline_peak = 0
+        for name, stage in all_stages:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            value = stage(value)
+            results.append(value)
+            after, peak = tracemalloc.get_traced_memory()
+            measures[name] = {'peak': peak - before, 'retained': after - before}
+            pipeline_peak = max(pipeline_peak, peak)
+        total, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Everything traced was allocated by the pipeline.
+    measures['pipeline'] = {'peak': pipeline_peak, 'retained': total}
+    return measures
+
+
+def measure_rss(generator_name: str, pipeline_name: str, scale: int, flags_name: str) -> Optional[int]:
+    """
+    Run the pipeline without `tracemalloc` in this process, which must be new, so the
+    memory freed by earlier cases is not reused.
+
+    Returns:
+        Optional[int]: Growth of the RSS, or None if it cannot be read.
+    """
+    share_leaf_elements, stages = PIPELINES[pipeline_name]
+    config = make_config(flags_name, share_leaf_elements)
+    data = GENERATORS[generator_name](scale)
+    gc.collect()
+    start = rss_bytes()
+    if start is None:
+        return None
+    results: List[Any] = []
+    with RssSampler() as sampler:
+        value = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)
+        results.append(value)
+        for _, stage in stages:
+            value = stage(value)
+            results.append(value)
+    return max(0, sampler.peak - start)
+
+
+def measure_rss_in_new_process(generator_name: str, pipeline_name: str, scale: int, flags_name: str) -> Optional[int]:
+    """
+    `measure_rss` in a new interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.memory_benchmark', 'rss', generator_name, pipeline_name, '--scale', str(scale), '--profile', flags_name],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def run_suite(scale: int, flags_name: str, name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Measure every pipeline for every payload whose case name contains `name_filter`,
+    printing the results.
+
+    Returns:
+        Dict[str, Any]: Bytes per element of each stage, keyed by
+        `generator/pipeline/stage`, and the settings of the run.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    print(f'{"case":52} {"elements":>9} {"peak B/el":>10} {"kept B/el":>10} {"peak MB":>8}')
+    for generator_name, generator in GENERATORS.items():
+        data = generator(scale)
+        for pipeline_name, (share_leaf_elements, stages) in PIPELINES.items():
+            case = f'{generator_name}/{pipeline_name}'
+            if name_filter and name_filter not in case:
+                continue
+            config = make_config(flags_name, share_leaf_elements)
+            elements = count_elements(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+            measures = measure_stages(data, config, stages)
+            rss = measure_rss_in_new_process(generator_name, pipeline_name, scale, flags_name)
+            for stage_name, measure in measures.items():
+                name = f'{case}/{stage_name}'
+                result = results[name] = {
+                    'elements': elements,
+                    'peak_bytes': measure['peak'],
+                    'retained_bytes': measure['retained'],
+                    'peak_per_element': measure['peak'] / elements,
+                    'retained_per_element': measure['retained'] / elements,
+                }
+                if stage_name == 'pipeline' and rss is not None:
+                    result['rss_growth_bytes'] = rss
+                print(
+                    f'{name:52} {elements:9} {result["peak_per_element"]:10.0f} '
+                    f'{result["retained_per_element"]:10.0f} {measure["peak"] / 1e6:8.2f}'
+                    + (f'   RSS +{rss / 1e6:.2f} MB' if stage_name == 'pipeline' and rss is not None else '')
+                )
+    return {
+        'python': sys.version.split()[0],
+        'scale': scale,
+        'profile': flags_name,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float]]:
+    """
+    Print the change of the peak bytes per element of each stage found in both runs.
+
+    Args:
+        baseline (Dict[str, Any]): Saved run.
+        current (Dict[str, Any]): New run.
+        threshold (float): Growth, in percent, above which a stage is a regression.
+
+    Returns:
+        List[Tuple[str, float]]: The regressed stages and their change in percent.
+    """
+    for setting in ('scale', 'profile'):
+        if baseline.get(setting) != current.get(setting):
+            print(f'warning: baseline {setting} {baseline.get(setting)}, current {setting} {current.get(setting)}')
+    regressions: List[Tuple[str, float]] = []
+    print(f'{"case":52} {"baseline":>10} {"current":>10} {"change":>8}')
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None or old['peak_per_element'] == 0:
+            continue
+        change = (result['peak_per_element'] / old['peak_per_element'] - 1) * 100
+        regressed = change > threshold
+        if regressed:
+            regressions.append((name, change))
+        print(
+            f'{name:52} {old["peak_per_element"]:10.0f} {result["peak_per_element"]:10.0f} '
+            f'{change:+7.1f}%{"  REGRESSION" if regressed else ""}'
+        )
+    return regressions
+
+
+def main() -> None:
+    """
+    Parse the command line and run the command.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command in ('run', 'compare', 'rss'):
+        sub = commands.add_parser(command)
+        sub.add_argument('--scale', type=int, default=100, help='size of the payloads')
+        sub.add_argument('--profile', choices=list(PROFILES), default='NONE', help='attribute flags')
+        sub.add_argument('--filter', help='only run the cases whose name contains this text')
+        if command == 'rss':
+            # Used by `measure_rss_in_new_process`.
+            sub.add_argument('generator', choices=list(GENERATORS))
+            sub.add_argument('pipeline', choices=list(PIPELINES))
+        else:
+            add_baseline_arguments(sub, command, 10.0, 'growth flagged, in percent')
+    args = parser.parse_args()
+
+    if args.command == 'rss':
+        print(json.dumps(measure_rss(args.generator, args.pipeline, args.scale, args.profile)))
+        return
+    run_baseline_command(
+        args,
+        lambda baseline: run_suite(
+            args.scale if baseline is None else baseline.get('scale', args.scale),
+            args.profile if baseline is None else baseline.get('profile', args.profile),
+            args.filter
+        ),
+        compare
+    )
+
+
+if __name__ == '__main__':
+    main()
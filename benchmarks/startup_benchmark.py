@@ -0,0 +1,84 @@
+"""
+Measure the cost of `import libs.config` in a new interpreter with `python -X importtime`,
+and check it stays under a budget. Prints the modules taking the most time, and the
+rarely used modules that were imported although they should be loaded on first use.
+
+The bytecode of `libs` is compiled first, as it is in a deployed package, so that
+compiling the sources is not measured. Exits with status 1 when the median import
+time is over the budget, or when one of those modules is imported.
+
+Usage: python -m benchmarks.startup_benchmark [--runs N] [--budget-ms MS] [--top N]
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULE = 'libs.config'
+
+LAZY_MODULES: Tuple[str, ...] = ('calendar', 'inspect', 'json', 'platform', 'tzlocal', 'uuid', 'zoneinfo')
+"""
+Modules only loaded when a processor first needs them.
+"""
+
+DEFAULT_BUDGET_MS: float = 50.0
+
+
+def measure() -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """
+    Import `MODULE` in a new interpreter.
+
+    Returns:
+        Tuple[Dict[str, Tuple[int, int]], List[str]]: The self and cumulative time, in
+        microseconds, of each module imported, and the lazy modules that were imported.
+    """
+    code = f'import sys, {MODULE}; print(" ".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    )
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times, result.stdout.split()
+
+
+def main() -> None:
+    """
+    Run the benchmark, print the timings and exit with status 1 if over budget.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    compileall.compile_dir(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'libs'), quiet=1)
+    runs = [measure() for _ in range(args.runs)]
+    totals = [times[MODULE][1] / 1000 for times, _ in runs]
+    median = statistics.median(totals)
+    best_times, lazy = min(runs, key=lambda run: run[0][MODULE][1])
+
+    print(f'import {MODULE}: best {min(totals):.1f} ms, median {median:.1f} ms, budget {args.budget_ms:.1f} ms ({args.runs} runs)')
+    print('slowest modules of the best run (self / cumulative ms):')
+    for name, (self_us, cumulative_us) in sorted(best_times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f'  {name:40} {self_us / 1000:8.2f} {cumulative_us / 1000:8.2f}')
+
+    failed = False
+    if lazy:
+        print(f'FAIL: imported eagerly: {", ".join(lazy)}')
+        failed = True
+    if median > args.budget_ms:
+        print(f'FAIL: over budget by {median - args.budget_ms:.1f} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+Throughput of the conversion for typical payload shapes, attribute flag profiles and
+output engines, with a saved baseline to catch regressions.
+
+Each payload is converted with `convert_to_xml` and written to text by an engine:
+`string` (`convert_to_string`) or `etree` (`ET.tostring(convert_to_etree(...))`). The
+best time of a few runs gives the throughput in elements/s and in MB/s of UTF-8 output.
+
+Usage:
+    python -m benchmarks.suite run [--scale N] [--repeat N] [--filter TEXT] [--save FILE]
+    python -m benchmarks.suite compare BASELINE [--current FILE] [--threshold PERCENT]
+
+`compare` runs the suite, or reads `--current`, and exits with status 1 when the
+elements/s of a case dropped by more than the threshold against the baseline.
+"""
+import argparse
+import base64
+import platform
+import random
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+from benchmarks.baseline import add_baseline_arguments, run_baseline_command
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass, XmlElementTypeAlias
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.xml_element_wrapper_converters import convert_to_etree, convert_to_string
+
+ResultTypeAlias = Dict[str, float]
+
+
+class Node:
+    """
+    A class instance, converted by `DataProcessor_post_processor_for_classes`.
+    """
+
+    def __init__(self, name: str, weight: float, children: List['Node']) -> None:
+        self.name = name
+        self.weight = weight
+        self.enabled = True
+        self.children = children
+
+
+def make_wide_dict(scale: int) -> Any:
+    """
+    One dictionary with many keys of mixed scalar values.
+    """
+    rnd = random.Random(1)
+    return {f'field_{i}': rnd.choice([i, i * 0.5, f'value {i}', True, None]) for i in range(scale * 20)}
+
+
+def make_deep_nesting(scale: int) -> Any:
+    """
+    Chains of dictionaries and lists nested 50 levels deep.
+    """
+    chains = []
+    for i in range(max(1, scale // 10)):
+        data: Any = {'leaf': i}
+        for depth in range(50):
+            data = {'level': depth, 'child': data} if depth % 2 else [depth, data]
+        chains.append(data)
+    return chains
+
+
+def make_scalar_list(scale: int) -> Any:
+    """
+    Long lists of numbers and strings.
+    """
+    return {
+        'ints': list(range(scale * 20)),
+        'floats': [i / 7 for i in range(scale * 20)],
+        'strings': [f'item {i}' for i in range(scale * 20)],
+    }
+
+
+def make_record_stream(scale: int) -> Any:
+    """
+    Many records of the same shape, like an API response.
+    """
+    rnd = random.Random(2)
+    return [
+        {
+            'id': i,
+            'status': rnd.choice(['OK', 'PENDING', 'FAILED', 'R&D']),
+            'amount': round(rnd.random() * 1000, 2),
+            'customer': {'name': f'customer {i % 97}', 'vip': i % 5 == 0},
+            'tags': ['a', 'b', 'c'][:i % 4],
+        }
+        for i in range(scale * 5)
+    ]
+
+
+def make_class_graph(scale: int) -> Any:
+    """
+    A tree of class instances, in which some nodes are shared.
+    """
+    leaves = [Node(f'leaf {i}', i / 3, []) for i in range(max(1, scale // 2))]
+    branches = [Node(f'branch {i}', i, leaves[i % len(leaves):][:5]) for i in range(scale)]
+    return Node('root', 0, branches)
+
+
+def make_binary_payload(scale: int) -> Any:
+    """
+    Records carrying binary blobs.
+    """
+    rnd = random.Random(3)
+    return [
+        {'name': f'blob {i}', 'data': rnd.randbytes(4096), 'digest': base64.b16encode(rnd.randbytes(16))}
+        for i in range(max(1, scale // 2))
+    ]
+
+
+GENERATORS: Dict[str, Callable[[int], Any]] = {
+    'wide_dict': make_wide_dict,
+    'deep_nesting': make_deep_nesting,
+    'scalar_list': make_scalar_list,
+    'record_stream': make_record_stream,
+    'class_graph': make_class_graph,
+    'binary_payload': make_binary_payload,
+}
+
+PROFILES: Dict[str, AttributeFlags] = {
+    'NONE': AttributeFlags.NONE,
+    'INC_ALL': AttributeFlags.INC_ALL,
+    'INC_ALL_DEBUG': AttributeFlags.INC_ALL_DEBUG,
+}
+
+ENGINES: Dict[str, Callable[[XmlElementTypeAlias], str]] = {
+    'string': convert_to_string,
+    'etree': lambda xml_wrapper: ET.tostring(convert_to_etree(xml_wrapper), encoding='unicode'),
+}
+
+
+def count_elements(xml_wrapper: XmlElementTypeAlias) -> int:
+    """
+    Number of elements in the tree.
+    """
+    count = 0
+    stack = [xml_wrapper]
+    while stack:
+        element = stack.pop()
+        count += 1
+        stack.extend(element.children)
+    return count
+
+
+def run_case(data: Any, flags: AttributeFlags, engine: Callable[[XmlElementTypeAlias], str], repeat: int) -> ResultTypeAlias:
+    """
+    Time the conversion of `data` to text.
+    """
+    config = Config()
+    config.attr_flags = flags
+
+    def convert() -> str:
+        return engine(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+
+    elements = count_elements(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+    size = len(convert().encode('utf-8'))
+    seconds = min(timeit.repeat(convert, number=1, repeat=repeat))
+    return {
+        'seconds': seconds,
+        'elements': elements,
+        'bytes': size,
+        'elements_per_s': elements / seconds,
+        'mb_per_s': size / seconds / 1e6,
+    }
+
+
+def run_suite(scale: int, repeat: int, name_filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every case whose name contains `name_filter`, printing the results.
+
+    Returns:
+        Dict[str, Any]: The results, keyed by `generator/profile/engine`, and the
+        settings of the run.
+    """
+    results: Dict[str, ResultTypeAlias] = {}
+    print(f'{"case":44} {"elements":>9} {"ms":>9} {"elements/s":>12} {"MB/s":>8}')
+    for generator_name, generator in GENERATORS.items():
+        data = generator(scale)
+        for profile_name, flags in PROFILES.items():
+            for engine_name, engine in ENGINES.items():
+                name = f'{generator_name}/{profile_name}/{engine_name}'
+                if name_filter and name_filter not in name:
+                    continue
+                result = results[name] = run_case(data, flags, engine, repeat)
+                print(
+                    f'{name:44} {result["elements"]:9} {result["seconds"] * 1000:9.2f} '
+                    f'{result["elements_per_s"]:12,.0f} {result["mb_per_s"]:8.2f}'
+                )
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'scale': scale,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float]]:
+    """
+    Print the change of the elements/s of each case found in both runs.
+
+    Args:
+        baseline (Dict[str, Any]): Saved run.
+        current (Dict[str, Any]): New run.
+        threshold (float): Slowdown, in percent, above which a case is a regression.
+
+    Returns:
+        List[Tuple[str, float]]: The regressed cases and their change in percent.
+    """
+    if baseline.get('scale') != current.get('scale'):
+        print(f'warning: baseline scale {baseline.get("scale")}, current scale {current.get("scale")}')
+    regressions: List[Tuple[str, float]] = []
+    print(f'{"case":44} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        change = (result['elements_per_s'] / old['elements_per_s'] - 1) * 100
+        regressed = change < -threshold
+        if regressed:
+            regressions.append((name, change))
+        print(
+            f'{name:44} {old["elements_per_s"]:12,.0f} {result["elements_per_s"]:12,.0f} '
+            f'{change:+7.1f}%{"  REGRESSION" if regressed else ""}'
+        )
+    return regressions
+
+
+def main() -> None:
+    """
+    Parse the command line and run the command.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command in ('run', 'compare'):
+        sub = commands.add_parser(command)
+        sub.add_argument('--scale', type=int, default=100, help='size of the payloads')
+        sub.add_argument('--repeat', type=int, default=3)
+        sub.add_argument('--filter', help='only run the cases whose name contains this text')
+        add_baseline_arguments(sub, command, 15.0, 'slowdown flagged, in percent')
+    args = parser.parse_args()
+    run_baseline_command(
+        args,
+        lambda baseline: run_suite(args.scale if baseline is None else baseline.get('scale', args.scale), args.repeat, args.filter),
+        compare
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -4,19 +4,37 @@ Base class for configuration and formatting data.
 """
 
 from abc import ABC, abstractmethod
+import codecs
 from collections import abc
+from collections.abc import Hashable
+from contextvars import ContextVar, Token
+import enum
 import re
-from typing import Any, Callable, Dict, Final, List, Optional, Tuple, TypeAlias
-import uuid
+import threading
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Final, FrozenSet, Iterator, List, Optional, Tuple, TypeAlias
 from libs.attributes import ATTRIBUTE_FLAGS_NAMES, AttributeFlags
+from libs.binary_text import BinaryText
+from libs.caches import ScalarTextCache, ShapeTemplateCache
 from libs.codec_wrapper import CodecWrapper
 from libs.data_type_identification import DataTypeIdentification
+from libs.xml_text import sanitize_text
+
+if TYPE_CHECKING:
+    from libs.conversion_statistics import ConversionStatistics
 
 
 XmlAttributesTypeAlias: TypeAlias = Dict[str, str]
 OptionalXmlAttributesTypeAlias: TypeAlias = Optional[XmlAttributesTypeAlias]
 
 
+XmlTextTypeAlias: TypeAlias = str | BinaryText
+"""
+Type alias for the text within an XML element. Binary values may be kept as
+`BinaryText`, which is encoded chunk by chunk when the document is written.
+"""
+
+
 ConfigTypeAlias: TypeAlias = "ConfigBaseClass"
 """
 Type alias for the config base class.
@@ -49,6 +67,104 @@ DataProcessorFuncTypeAlias: TypeAlias = Callable[
 Type alias for the return type of most methods.
 """
 
+_INC_BINARY_ENCODING: Final[int] = AttributeFlags.INC_BINARY_ENCODING.value
+_INC_DEBUG_INFO: Final[int] = AttributeFlags.INC_DEBUG_INFO.value
+_INC_FIELD_COMMENT: Final[int] = AttributeFlags.INC_FIELD_COMMENT.value
+_INC_FIELD_TYPE_HINT: Final[int] = AttributeFlags.INC_FIELD_TYPE_HINT.value
+_INC_FORMAT_STRING_HINT: Final[int] = AttributeFlags.INC_FORMAT_STRING_HINT.value
+_INC_LEN: Final[int] = AttributeFlags.INC_LEN.value
+_INC_LENGTH_ELEMENT_TEXT: Final[int] = AttributeFlags.INC_LENGTH_ELEMENT_TEXT.value
+_INC_PYTHON_DATA_TYPE: Final[int] = AttributeFlags.INC_PYTHON_DATA_TYPE.value
+_INC_SEQ_ID: Final[int] = AttributeFlags.INC_SEQ_ID.value
+_INC_XSD_DATA_TYPE: Final[int] = AttributeFlags.INC_XSD_DATA_TYPE.value
+"""
+Values of the attribute flags. Testing an `int` is much faster than `AttributeFlags.__and__`.
+"""
+
+
+_SHARED_CLASSIFIER: Final[DataTypeIdentification] = DataTypeIdentification()
+"""
+Default classifier of the processors. It has no state, so all processors share it.
+Set `DataProcessorAbstractBaseClass.classifier` to use another one.
+"""
+
+
+_PROCESSOR_ATTRIBUTES: Final[FrozenSet[str]] = frozenset({
+    'custom_pre_processors',
+    'default_processors',
+    'custom_post_processors',
+    'last_chance_processor',
+})
+"""
+Attributes of a configuration holding its processors, bound on first use by a clone.
+"""
+
+_BIND_LOCK: Final[threading.Lock] = threading.Lock()
+"""
+Held while the processors of a clone are bound, so they are bound once.
+"""
+
+ElementCallbackTypeAlias: TypeAlias = Callable[['DataProcessorAbstractBaseClass', XmlElementTypeAlias], None]
+
+_ELEMENT_OBSERVATIONS: Final[ContextVar[Tuple['ElementObservation', ...]]] = ContextVar('element_observations', default=())
+"""
+`ElementObservation` entered in the current thread or task. Local to the context,
+so the conversions of other threads, even with the same configuration, are not
+observed.
+"""
+
+
+def _new_alt_id() -> str:
+    """
+    A new random UUID, the value of the `INC_ALT_ID` attribute. `uuid` is only
+    imported when the attribute is first needed.
+    """
+    import uuid  # pylint: disable=C0415; import-outside-toplevel
+    return str(uuid.uuid4())
+
+
+def _shallow_copy(source: Any) -> Any:
+    """
+    Copy the attributes of `source` into a new instance of its class, without calling
+    `__init__`. Much faster than `copy.copy`. Attributes are set one by one, since
+    instances whose `__dict__` is replaced or updated as a whole are slower to copy again.
+    """
+    copy = object.__new__(type(source))
+    for name, value in source.__dict__.items():
+        setattr(copy, name, value)
+    return copy
+
+
+def _same_wire_value(value: Any, default: Any) -> bool:
+    """
+    Test whether an attribute of a configuration has its default value. Objects
+    without their own equality, like codecs, are compared by class and attributes.
+    """
+    if value is default:
+        return True
+    if type(value) is not type(default):
+        return False
+    if isinstance(value, (ScalarTextCache, ShapeTemplateCache)):
+        return value.max_size == default.max_size
+    if type(value).__eq__ is object.__eq__ and hasattr(value, '__dict__'):
+        return vars(value) == vars(default)
+    return bool(value == default)
+
+
+_WIRE_TEMPLATES: Dict[type, Tuple['ConfigBaseClass', Tuple[Any, ...]]] = {}
+"""
+A new instance of each configuration class sent or received with `ConfigBaseClass.to_wire`,
+and the wire form of its processors. Never modified.
+"""
+
+
+def _wire_template(config_class: type) -> Tuple['ConfigBaseClass', Tuple[Any, ...]]:
+    template = _WIRE_TEMPLATES.get(config_class)
+    if template is None:
+        config = config_class()
+        template = _WIRE_TEMPLATES.setdefault(config_class, (config, config._processors_to_wire()))  # pylint: disable=W0212; protected-access
+    return template
+
 
 class ConfigBaseClass(ABC):
     """
@@ -82,12 +198,155 @@ class ConfigBaseClass(ABC):
         self.label_invalid_xml_element_name: str = 'inv_tag_placeholder'
         self.label_invalid_xml_element_name_attribute: str = 'original_element_name'
 
+        self.compact_range: bool = False
+        """
+        When True, a `range` is emitted as a single element with `start`, `stop` and
+        `step` attributes instead of one child element per item.
+        """
+
+        self.compact_array: bool = False
+        """
+        When True, an `array.array` is emitted as a single element whose text holds
+        the items separated by spaces, with a `typecode` attribute. Otherwise one child
+        element is emitted per item.
+        """
+
+        self.sanitize_text: bool = False
+        """
+        When True, characters that are not allowed in XML 1.0 (control characters,
+        surrogates, U+FFFE and U+FFFF) are replaced by `sanitize_text_replacement`
+        in the text of the elements and in the original element names.
+        """
+
+        self.sanitize_text_replacement: str = ''
+        """
+        Replacement for each invalid character when `sanitize_text` is True. By default
+        invalid characters are removed.
+        """
+
+        self.scalar_text_cache: ScalarTextCache = ScalarTextCache()
+        """
+        Memo of the text of repeated scalars (enum values, numbers, ...). Shared by
+        all the conversions using this configuration, but not by its clones. Safe to
+        use from several threads, although its counters may then miss some of the
+        hits and misses. Inspect `scalar_text_cache.stats()`
+        for its hit and miss counters. Set `scalar_text_cache.max_size` to zero to
+        disable it.
+        """
+
+        self.memoize_immutable_subtrees: bool = False
+        """
+        When True, an immutable container (`tuple`, `NamedTuple` or `frozenset` of
+        immutable values) that occurs more than once in the data is converted once.
+        Each further occurrence of the same object, under the same element name, is a
+        copy of the converted elements with its own `INC_SEQ_ID` and `INC_ALT_ID`
+        attributes. The output is the same as without the memo, as long as the
+        processors only depend on the data and the element name.
+        """
+
+        self.track_references: bool = False
+        """
+        When True, each container (and each object converted by
+        `DataProcessor_post_processor_for_classes`) is converted only the first time
+        it is found. A later occurrence of the same object, including a reference
+        back to an object being converted, becomes an empty element with a
+        `label_reference_idref_attribute` attribute. The first element then gets a
+        `label_reference_id_attribute` attribute with the same value.
+        `memoize_immutable_subtrees` is ignored when this is True.
+        """
+
+        self.label_reference_id_attribute: str = 'ref_id'
+        self.label_reference_idref_attribute: str = 'idref'
+
+        self.reference_elements: Dict[int, Tuple[Any, XmlElementTypeAlias, DataProcessorAbstractBaseClass]] = {}
+        """
+        Elements of the objects converted during the current conversion when
+        `track_references` is True, keyed by the id of the object. The object is kept
+        so its id cannot be reused. Cleared when `convert_to_xml` starts and returns.
+        """
+
+        self.reference_id_counter: int = 0
+        """
+        Number of reference ids given out during the current conversion.
+        """
+
+        self.use_shape_templates: bool = False
+        """
+        When True, the elements of a dictionary are emitted using a template cached
+        for its shape: its keys and the exact types of its values. The template holds
+        the element names, the processors and the attributes that only depend on the
+        type, so only the values are converted for a dictionary of a known shape.
+        Requires processors that select data, and compute the static attributes, by
+        type only. Ignored when `track_references` is True.
+        """
+
+        self.shape_template_cache: ShapeTemplateCache = ShapeTemplateCache()
+        """
+        Templates used when `use_shape_templates` is True. Inspect
+        `shape_template_cache.stats()` for its hit and miss counters. Clear it after
+        changing the labels, codecs or processors of this configuration.
+        """
+
+        self.share_leaf_elements: bool = False
+        """
+        When True, identical leaf elements (same tag, text and attributes, without
+        children) of a conversion are one shared instance. Repetitive documents then
+        use much less memory. The `parent` attribute of the elements is then not
+        reliable: shared elements have several parents, and their `parent` is None.
+        `XmlElementNameBaseClass.iter_with_parents` is the way to get the parents.
+        Ignored when `INC_SEQ_ID` is set or `track_references` is True, since their
+        elements are never identical or may still change.
+        """
+
+        self.leaf_elements: Dict[Tuple[str, Optional[str], Tuple[Tuple[str, str], ...]], XmlElementTypeAlias] = {}
+        """
+        Shared leaf elements of the current conversion, keyed by tag, text and
+        attributes. Cleared when `convert_to_xml` starts and returns.
+        """
+
+        self.subtree_memo: Dict[Tuple[int, Optional[str]], Tuple[Any, XmlElementTypeAlias]] = {}
+        """
+        Elements converted from immutable containers during the current conversion,
+        keyed by the id of the container and the requested element name. The
+        container is kept so its id cannot be reused. Cleared when `convert_to_xml`
+        starts and returns.
+        """
+
+        self.immutable_containers: Dict[int, Tuple[Any, bool]] = {}
+        """
+        Whether each tuple and frozenset met during the current conversion is
+        immutable, keyed by its id, see `DataTypeIdentification.is_immutable_container`.
+        Cleared when `convert_to_xml` starts and returns.
+        """
+
+        self.slow_conversion_capture: Optional[Any] = None
+        """
+        A `libs.slow_capture.SlowConversionCapture`, which writes a redacted summary of
+        the shape of the data of each conversion over its time or element budget.
+        Defaults to None, no capture.
+        """
+
         self._codec_binary: CodecWrapper = CodecWrapper()
         self.codec_binary.codec_name = 'base64'
         """
         Encoder for binary to text.
         """
 
+        self.binary_chunk_size: int = 57 * 1024
+        """
+        Maximum number of bytes handed to the binary codec in one call. Larger
+        values are encoded slice by slice, straight from their buffer, when the
+        codec allows it. See `CodecWrapper.slice_alignment`.
+        """
+
+        self.stream_binary: bool = False
+        """
+        When True, binary values and binary files are not encoded during the conversion.
+        The text of their element is a `BinaryText`, encoded chunk by chunk when the
+        document is written, so a large value is never held in memory as text.
+        The values must stay unchanged, and files open, until the document is written.
+        """
+
         self._codec_text: CodecWrapper = CodecWrapper()
         """
         Encoder for text data.
@@ -104,6 +363,19 @@ class ConfigBaseClass(ABC):
         Names of the attributes. You can safely modify this dictionary for customization.
         """
 
+        self.frozen: Optional[FrozenConfig] = None
+        """
+        Snapshot made by the last call to `freeze`, or None. While it is set, the
+        processors read the element name overrides, the attribute flags and the
+        attribute names from it. `convert_to_xml` freezes the configuration again
+        when it changed since.
+        """
+
+        self._clone_plan: Optional[Tuple[List[DataProcessorAbstractBaseClass], Optional[List[type]]]] = None
+        """
+        The processors when `clone` was last called, and how to copy them.
+        """
+
         self._elements_sequential_counter: int = 0
         """
         Variable for the sequential element counter.
@@ -198,6 +470,251 @@ class ConfigBaseClass(ABC):
     Getter / Setter for the text codec
     """
 
+    def clone(self, **overrides: Any) -> 'ConfigBaseClass':
+        """
+        Make a configuration with the same options and processors, then set the
+        `overrides`, eg `config.clone(attr_flags=AttributeFlags.NONE, root_label='doc')`.
+        Much cheaper than building a new configuration, so it can be done per request.
+
+        The processors are copies bound to the clone, sharing their state (the data
+        type classifier) with the originals. They are only made when the clone first
+        uses its processors, from the processors the configuration had when cloned.
+        The clone has its own codecs, attribute names, caches and conversion state.
+
+        Args:
+            **overrides (Any): Options to set on the clone.
+
+        Raises:
+            TypeError: An override is not an attribute of the configuration.
+
+        Returns:
+            ConfigBaseClass: The clone.
+        """
+        unknown = [name for name in overrides if name.startswith('_') or not hasattr(self, name)]
+        if unknown:
+            raise TypeError(f'Unknown configuration options: {", ".join(unknown)}')
+
+        clone = object.__new__(type(self))
+        # Much faster than updating the empty `__dict__` of the clone.
+        clone.__dict__ = state = self.__dict__.copy()
+
+        # Making the processors is most of the cost of a clone: they are made by
+        # `_bind_processors` on first use. A clone of a clone that did not use nor
+        # set its processors yet is made from the same processors.
+        if '_unbound_processors' not in state or any(name in state for name in _PROCESSOR_ATTRIBUTES):
+            processors = self._all_processors()
+            pre = len(self.custom_pre_processors)
+            default = pre + len(self.default_processors)
+            post = default + len(self.custom_post_processors)
+            state['_unbound_processors'] = (processors, self._processor_types(processors), pre, default, post)
+            for name in _PROCESSOR_ATTRIBUTES:
+                state.pop(name, None)
+        state['_clone_plan'] = None
+
+        state['_codec_binary'] = _shallow_copy(self._codec_binary)
+        state['_codec_text'] = _shallow_copy(self._codec_text)
+        state['attr_flag_names'] = self.attr_flag_names.copy()
+        state['scalar_text_cache'] = ScalarTextCache(self.scalar_text_cache.max_size)
+        state['shape_template_cache'] = ShapeTemplateCache(self.shape_template_cache.max_size)
+        state['frozen'] = None
+        state['_elements_sequential_counter'] = 0
+        state['reference_elements'] = {}
+        state['reference_id_counter'] = 0
+        state['leaf_elements'] = {}
+        state['subtree_memo'] = {}
+        state['immutable_containers'] = {}
+
+        for name, value in overrides.items():
+            setattr(clone, name, value)
+        return clone
+
+    def _bind_processors(self) -> None:
+        """
+        Make the processors of a clone, bound to it, see `clone`. The processor lists
+        already set on the clone, eg by the overrides of `clone`, are kept.
+        """
+        with _BIND_LOCK:
+            unbound = self.__dict__.pop('_unbound_processors', None)
+            if unbound is None:
+                return
+            processors, processor_types, pre, default, post = unbound
+            if processor_types is None:
+                copies = [processor._bind(self) for processor in processors]  # pylint: disable=W0212; protected-access
+            else:
+                # What `DataProcessorAbstractBaseClass.__init__` does, without calling
+                # the class, which is slower.
+                copies = []
+                for processor_type in processor_types:
+                    copy: Any = object.__new__(processor_type)
+                    copy._classifier = _SHARED_CLASSIFIER  # pylint: disable=W0212; protected-access
+                    copy.config = self
+                    copies.append(copy)
+            state = self.__dict__
+            state.setdefault('custom_pre_processors', copies[:pre])
+            state.setdefault('default_processors', copies[pre:default])
+            state.setdefault('custom_post_processors', copies[default:post])
+            if post < len(copies):
+                state.setdefault('last_chance_processor', copies[post])
+
+    if not TYPE_CHECKING:
+        # Hidden from type checkers, which would otherwise accept any attribute.
+        def __getattr__(self, name: str) -> Any:
+            # Only called for missing attributes.
+            if name in _PROCESSOR_ATTRIBUTES and '_unbound_processors' in self.__dict__:
+                self._bind_processors()
+                if name in self.__dict__:
+                    return self.__dict__[name]
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+    def _processor_types(self, processors: List['DataProcessorAbstractBaseClass']) -> Optional[List[type]]:
+        """
+        `_plan_clone(processors)`, computed again only when the processors changed.
+        """
+        plan = self._clone_plan
+        if plan is None or plan[0] != processors:
+            plan = self._clone_plan = (processors, self._plan_clone(processors))
+        return plan[1]
+
+    @staticmethod
+    def _plan_clone(processors: List['DataProcessorAbstractBaseClass']) -> Optional[List[type]]:
+        """
+        Returns:
+            Optional[List[type]]: The classes of the processors, if each copy can be
+            made as `DataProcessorAbstractBaseClass.__init__` does. Otherwise None, the
+            copies are made by `DataProcessorAbstractBaseClass._bind`.
+        """
+        for processor in processors:
+            if (
+                type(processor).__init__ is not DataProcessorAbstractBaseClass.__init__
+                or processor.__dict__.keys() != {'_classifier', 'config'}
+                or processor.classifier is not _SHARED_CLASSIFIER
+            ):
+                return None
+        return [type(processor) for processor in processors]
+
+    _WIRE_TRANSIENT: Final[FrozenSet[str]] = frozenset({
+        'custom_pre_processors',
+        'default_processors',
+        'custom_post_processors',
+        'last_chance_processor',
+        'reference_elements',
+        'reference_id_counter',
+        'leaf_elements',
+        'subtree_memo',
+        'immutable_containers',
+        'frozen',
+        'slow_conversion_capture',
+        '_clone_plan',
+        '_unbound_processors',
+        '_elements_sequential_counter',
+    })
+    """
+    Attributes that are not sent by `to_wire`: the processors, sent separately, the
+    state of the conversion, and the slow conversion capture, which writes to a
+    local file.
+    """
+
+    def to_wire(self) -> Tuple[Any, ...]:
+        """
+        Describe this configuration in a compact, picklable form, rebuilt by `from_wire`:
+        its class, the attributes that differ from a new instance of the class, and the
+        processors if they differ too. Processors are described by their class and
+        their attributes (see `DataProcessorAbstractBaseClass._to_wire`), never by
+        their reference to the configuration. Caches are sent empty.
+
+        Pickling a configuration uses this form, so a configuration is cheap to send
+        to worker processes, eg `Pool(initializer=init, initargs=(config,))`. The class
+        of the configuration, and of each processor, must be importable, and the
+        configuration class must be constructible without arguments.
+
+        Returns:
+            Tuple[Any, ...]: `(class, attributes, processors)`. `processors` is None when
+            they are the processors of a new instance.
+        """
+        template, template_processors = _wire_template(type(self))
+        defaults = template.__dict__
+        options: Dict[str, Any] = {}
+        for name, value in self.__dict__.items():
+            if name in self._WIRE_TRANSIENT or (name in defaults and _same_wire_value(value, defaults[name])):
+                continue
+            if isinstance(value, (ScalarTextCache, ShapeTemplateCache)):
+                value = type(value)(value.max_size)
+            options[name] = value
+        processors = self._processors_to_wire()
+        return (type(self), options, None if processors == template_processors else processors)
+
+    def _processors_to_wire(self) -> Tuple[Any, ...]:
+        processors = self._all_processors()
+        wire: List[Any] = self._processor_types(processors) or [
+            processor._to_wire() for processor in processors  # pylint: disable=W0212; protected-access
+        ]
+        pre = len(self.custom_pre_processors)
+        default = pre + len(self.default_processors)
+        post = default + len(self.custom_post_processors)
+        return (
+            tuple(wire[:pre]),
+            tuple(wire[pre:default]),
+            tuple(wire[default:post]),
+            wire[post] if post < len(wire) else None,
+        )
+
+    @staticmethod
+    def from_wire(wire: Tuple[Any, ...]) -> 'ConfigBaseClass':
+        """
+        Rebuild a configuration described by `to_wire`. It is a clone of a new instance
+        of its class, made once per process, so rebuilding takes microseconds.
+
+        Args:
+            wire (Tuple[Any, ...]): `to_wire()` of a configuration.
+
+        Returns:
+            ConfigBaseClass: An independent configuration, with its own caches.
+        """
+        config_class, options, processors = wire
+        template, _ = _wire_template(config_class)
+        config = template.clone()
+        state = config.__dict__
+        state.update(options)
+        if processors is not None:
+            del state['_unbound_processors']
+            from_wire = DataProcessorAbstractBaseClass._from_wire  # pylint: disable=W0212; protected-access
+            pre, default, post, last_chance = processors
+            state['custom_pre_processors'] = [from_wire(spec, config) for spec in pre]
+            state['default_processors'] = [from_wire(spec, config) for spec in default]
+            state['custom_post_processors'] = [from_wire(spec, config) for spec in post]
+            if last_chance is None:
+                state.pop('last_chance_processor', None)
+            else:
+                state['last_chance_processor'] = from_wire(last_chance, config)
+        return config
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (ConfigBaseClass.from_wire, (self.to_wire(),))
+
+    def _all_processors(self) -> List['DataProcessorAbstractBaseClass']:
+        processors = self.custom_pre_processors + self.default_processors + self.custom_post_processors
+        if hasattr(self, 'last_chance_processor'):
+            processors.append(self.last_chance_processor)
+        return processors
+
+    def freeze(self) -> 'FrozenConfig':
+        """
+        Validate the configuration and snapshot it into an immutable, hashable
+        `FrozenConfig`, also kept in `frozen`. If the configuration did not change
+        since the last call, the same snapshot is returned.
+
+        Raises:
+            ValueError: An option has an invalid value.
+            LookupError: A codec is not found.
+
+        Returns:
+            FrozenConfig: The snapshot.
+        """
+        key = FrozenConfig.make_key(self)
+        if self.frozen is None or not self.frozen.matches(self, key):
+            self.frozen = FrozenConfig(self, key)
+        return self.frozen
+
     def make_attribute(
         self,
         attr_flag: AttributeFlags,
@@ -217,6 +734,47 @@ class ConfigBaseClass(ABC):
         return {self.attr_flag_names[attr_flag]: value}
 
 
+class ElementObservation:
+    """
+    Context manager calling `callback` with the processor and the element each time a
+    processor of `config` completes an element in its block, after adding the
+    attributes of the element and before sharing it. Only the conversions of the
+    current thread or task are observed. The processors are not changed.
+
+    Elements copied from memoized subtrees and reference elements are not made by a
+    processor, and are not observed.
+
+    Example:
+        with ElementObservation(config, lambda processor, element: print(element.tag)):
+            root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)
+    """
+
+    def __init__(self, config: ConfigTypeAlias, callback: ElementCallbackTypeAlias) -> None:
+        self.config = config
+        self.callback = callback
+        self._token: Optional[Token[Tuple['ElementObservation', ...]]] = None
+
+    def __enter__(self) -> 'ElementObservation':
+        self._token = _ELEMENT_OBSERVATIONS.set(_ELEMENT_OBSERVATIONS.get() + (self,))
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        assert self._token is not None
+        _ELEMENT_OBSERVATIONS.reset(self._token)
+        self._token = None
+
+
+def _notify_element_observations(processor: 'DataProcessorAbstractBaseClass', element: XmlElementTypeAlias) -> None:
+    """
+    Call the callbacks of the `ElementObservation` entered for the configuration of
+    `processor`.
+    """
+    config = processor.config
+    for observation in _ELEMENT_OBSERVATIONS.get():
+        if observation.config is config:
+            observation.callback(processor, element)
+
+
 class DataProcessorAbstractBaseClass(ABC):
     """
     Abstract base class for data processors. Child classes are responsible for encoding
@@ -234,9 +792,66 @@ class DataProcessorAbstractBaseClass(ABC):
     """
 
     def __init__(self, config: ConfigTypeAlias):
-        self._classifier: DataTypeIdentification = DataTypeIdentification()
+        self._classifier: DataTypeIdentification = _SHARED_CLASSIFIER
         self.config = config
 
+    def _bind(self, config: ConfigTypeAlias) -> 'DataProcessorAbstractBaseClass':
+        """
+        Make a shallow copy of this processor bound to `config`, for `ConfigBaseClass.clone`.
+        The copy shares the classifier and the other attributes with this processor.
+        Override it if some attributes must not be shared.
+
+        Args:
+            config (ConfigTypeAlias): The cloned configuration.
+
+        Returns:
+            DataProcessorAbstractBaseClass: _description_
+        """
+        bound = object.__new__(type(self))
+        bound.__dict__.update(self.__dict__)
+        bound.config = config
+        return bound
+
+    def _to_wire(self) -> Any:
+        """
+        Describe this processor for `ConfigBaseClass.to_wire`, without its reference to
+        the configuration. Override it, and `_from_wire`, if some attributes cannot be
+        pickled.
+
+        Returns:
+            Any: The class, when calling it with the configuration makes the same
+            processor. Otherwise the class and the attributes, except `config` and
+            the shared classifier.
+        """
+        state = self.__dict__.copy()
+        del state['config']
+        if state.get('_classifier') is _SHARED_CLASSIFIER:
+            del state['_classifier']
+        if not state and type(self).__init__ is DataProcessorAbstractBaseClass.__init__:
+            return type(self)
+        return (type(self), state)
+
+    @staticmethod
+    def _from_wire(wire: Any, config: ConfigTypeAlias) -> 'DataProcessorAbstractBaseClass':
+        """
+        Rebuild a processor described by `_to_wire`, bound to `config`.
+
+        Args:
+            wire (Any): `_to_wire()` of a processor.
+            config (ConfigTypeAlias): The rebuilt configuration.
+
+        Returns:
+            DataProcessorAbstractBaseClass: _description_
+        """
+        if isinstance(wire, type):
+            return wire(config)
+        processor_class, state = wire
+        processor = object.__new__(processor_class)
+        processor.__dict__['_classifier'] = _SHARED_CLASSIFIER
+        processor.__dict__.update(state)
+        processor.config = config
+        return processor
+
     @property
     def classifier(self) -> DataTypeIdentification:
         """
@@ -302,7 +917,7 @@ class DataProcessorAbstractBaseClass(ABC):
         current: XmlElementTypeAlias,
         data: Any,
         **kwargs: object
-    ) -> Optional[str]:
+    ) -> Optional[XmlTextTypeAlias]:
         """
         Converts the data into text for placement inside the XML
         element -> `<element_name>text</element_name>`.
@@ -313,7 +928,7 @@ class DataProcessorAbstractBaseClass(ABC):
             data (Any): _description_
 
         Returns:
-            Optional[str]: Data converted to a textual representation or None.
+            Optional[XmlTextTypeAlias]: Data converted to a textual representation or None.
         """
         return None
 
@@ -350,9 +965,12 @@ class DataProcessorAbstractBaseClass(ABC):
         Returns:
             str: XML element name.
         """
-        return child_name \
-            or self._get_element_name_from_config() \
-            or self._get_default_element_name(data)
+        if child_name:
+            return child_name
+        frozen = self.config.frozen
+        if frozen is not None and id(self) in frozen.element_names:
+            return frozen.element_names[id(self)] or self._get_default_element_name(data)
+        return self._get_element_name_from_config() or self._get_default_element_name(data)
 
     def _get_field_type_hint(self, data: Any, **kwargs: object) -> Optional[str]:  # pylint: disable=W0613;unused-argument
         """
@@ -425,20 +1043,310 @@ class DataProcessorAbstractBaseClass(ABC):
             child_name=child_name
         )
         current = parent.create_child_element(self.config, new_tag)
+        if self.config.track_references and self._is_reference_tracked(data):
+            self.config.reference_elements[id(data)] = (data, current, self)
+        text = self._get_textual_representation_of_data(  # pylint: disable=E1128; assignment-from-none
+            parent=parent,
+            current=current,
+            data=data
+        )
+        if text is not None:
+            if self.config.sanitize_text and isinstance(text, str):
+                text = sanitize_text(text, self.config.sanitize_text_replacement)
+            current.text = text
+        self._recursively_process_any_nested_objects(
+            parent=parent,
+            current=current,
+            data=data
+        )
+        return current
+
+    def _is_reference_tracked(self, data: Any) -> bool:
+        """
+        Indicates whether later occurrences of `data` are converted to references
+        when `track_references` is True. By default only non-empty containers are
+        tracked. Empty tuples and frozensets are shared by CPython, so they are not.
+
+        Args:
+            data (Any): _description_
+
+        Returns:
+            bool: True if the element of `data` can be referenced.
+        """
+        return self._classifier.is_container(data) \
+            and not (isinstance(data, tuple | frozenset) and len(data) == 0)
+
+    def _create_idref_element(  # pylint: disable=W0613;unused-argument
+        self,
+        parent: XmlElementTypeAlias,
+        referenced: XmlElementTypeAlias,
+        data: Any,
+        child_name: Optional[str] = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        """
+        Create an empty element referencing the element already created for `data`.
+        The referenced element gets its reference id the first time it is referenced.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            referenced (XmlElementTypeAlias): Element this processor created for `data`.
+            data (Any): _description_
+            child_name (Optional[str], optional): _description_. Defaults to None.
+
+        Returns:
+            XmlElementTypeAlias: The new element, eg `<dict idref="1" />`.
+        """
+        id_name = self.config.label_reference_id_attribute
+        ref_id = referenced.attributes.get(id_name)
+        if ref_id is None:
+            self.config.reference_id_counter += 1
+            ref_id = str(self.config.reference_id_counter)
+            referenced.attributes[id_name] = ref_id
+
+        new_tag: str = self._get_element_name(
+            parent=parent,
+            data=data,
+            child_name=child_name
+        )
+        current = parent.create_child_element(self.config, new_tag)
+        current.attributes[self.config.label_reference_idref_attribute] = ref_id
+        return current
+
+    def _try_converting_with_text(  # pylint: disable=W0613;unused-argument
+        self,
+        parent: XmlElementTypeAlias,
+        data: Any,
+        text: Optional[XmlTextTypeAlias],
+        child_name: Optional[str] = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        """
+        Create the element and its attributes using text the caller has already
+        computed. Skips `_is_expected_data_type` and `_get_textual_representation_of_data`,
+        so the caller is responsible for knowing this processor handles `data`.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            data (Any): _description_
+            text (Optional[XmlTextTypeAlias]): Textual representation of `data`.
+            child_name (Optional[str], optional): _description_. Defaults to None.
+
+        Returns:
+            XmlElementTypeAlias: The newly created element.
+        """
+        new_tag: str = self._get_element_name(
+            parent=parent,
+            data=data,
+            child_name=child_name
+        )
+        current = parent.create_child_element(self.config, new_tag)
+        if text is not None:
+            if self.config.sanitize_text and isinstance(text, str):
+                text = sanitize_text(text, self.config.sanitize_text_replacement)
+            current.text = text
+        self._add_attributes(parent=parent, current=current, data=data)
+        if _ELEMENT_OBSERVATIONS.get():
+            _notify_element_observations(self, current)
+        if self.config.share_leaf_elements:
+            return self._share_leaf_element(parent=parent, current=current)
+        return current
+
+    def _share_leaf_element(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias
+    ) -> XmlElementTypeAlias:
+        """
+        If `current` is a completed leaf element identical to one already created
+        during the conversion, replace it by the existing element in its parent.
+        See `share_leaf_elements`. A shared leaf may have several parents, so its
+        `parent` is set to None rather than to one of them.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            current (XmlElementTypeAlias): Completed element, the last child of `parent`.
+
+        Returns:
+            XmlElementTypeAlias: The element now held by `parent`.
+        """
+        config = self.config
+        if (
+            current.children
+            or not (current.text is None or isinstance(current.text, str))
+            or AttributeFlags.INC_SEQ_ID & config.attr_flags
+            or config.track_references
+            or ATTRIBUTE_FLAGS_NAMES[AttributeFlags.INC_ALT_ID] in current.attributes
+        ):
+            return current
+
+        key = (current.tag, current.text, tuple(current.attributes.items()))
+        shared = config.leaf_elements.get(key)
+        if shared is None:
+            current.parent = None
+            config.leaf_elements[key] = current
+            return current
+        assert parent.children[-1] is current
+        parent.children[-1] = shared
+        return shared
+
+    def _try_converting_from_template(
+        self,
+        parent: XmlElementTypeAlias,
+        data: Any,
+        template: 'ElementTemplate'
+    ) -> XmlElementTypeAlias:
+        """
+        Same as `_try_converting_add_attributes`, but the element name, the check of
+        the data type and the static attributes come from `template`.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            data (Any): Value of the type the template was made for.
+            template (ElementTemplate): Template made by this processor.
+
+        Returns:
+            XmlElementTypeAlias: The newly created element.
+        """
+        config = self.config
+        current = parent.create_child_element(config, template.tag, attrib=template.tag_attributes)
         text = self._get_textual_representation_of_data(  # pylint: disable=E1128; assignment-from-none
             parent=parent,
             current=current,
             data=data
         )
         if text is not None:
+            if config.sanitize_text and isinstance(text, str):
+                text = sanitize_text(text, config.sanitize_text_replacement)
             current.text = text
         self._recursively_process_any_nested_objects(
             parent=parent,
             current=current,
             data=data
         )
+
+        return self._add_template_attributes(parent=parent, current=current, data=data, template=template)
+
+    def _add_template_attributes(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        template: 'ElementTemplate'
+    ) -> XmlElementTypeAlias:
+        """
+        Complete an element created from `template`: add its attributes, notify the
+        `ElementObservation` entered, then share it if it is a leaf. Same as the end
+        of `_try_converting_add_attributes`.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            current (XmlElementTypeAlias): Element created from `template`, with its children.
+            data (Any): _description_
+            template (ElementTemplate): Template made by this processor.
+
+        Returns:
+            XmlElementTypeAlias: The element now held by `parent`.
+        """
+        attr: XmlAttributesTypeAlias = {}
+        for slot in template.attribute_slots:
+            attr |= slot if isinstance(slot, dict) else slot(parent=parent, current=current, data=data)
+        current.attributes |= attr
+
+        if _ELEMENT_OBSERVATIONS.get():
+            _notify_element_observations(self, current)
+        if self.config.share_leaf_elements:
+            return self._share_leaf_element(parent=parent, current=current)
         return current
 
+    def _make_element_template(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        child_name: Optional[str] = None
+    ) -> 'ElementTemplate':
+        """
+        Make the template for values of the type of `data`, from the element this
+        processor created for it. The attribute slots follow the order of `_add_attributes`.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            current (XmlElementTypeAlias): Element created for `data`.
+            data (Any): _description_
+            child_name (Optional[str], optional): _description_. Defaults to None.
+
+        Returns:
+            ElementTemplate: _description_
+        """
+        flags = self.config.attr_flags
+        slots: List[XmlAttributesTypeAlias | Callable[..., XmlAttributesTypeAlias]] = []
+
+        def add_static(method: Callable[..., XmlAttributesTypeAlias]) -> None:
+            slots.append(method(parent=parent, current=current, data=data))
+
+        if (AttributeFlags.INC_BINARY_ENCODING & flags) and self._classifier.is_binary(data):
+            add_static(self._attr_binary_encoding)
+        if AttributeFlags.INC_DEBUG_INFO & flags:
+            add_static(self._attr_debug_info)
+        if (AttributeFlags.INC_FIELD_COMMENT & flags) and self._get_field_comment(data) is not None:
+            add_static(self._attr_field_comment)
+        if (AttributeFlags.INC_FIELD_TYPE_HINT & flags) and self._get_field_type_hint(data) is not None:
+            add_static(self._attr_field_type_hint)
+        if (AttributeFlags.INC_FORMAT_STRING_HINT & flags) and self._get_format_string_hint(data) is not None:
+            add_static(self._attr_format_string_hint)
+        if (AttributeFlags.INC_LEN & flags) and isinstance(data, abc.Sized):
+            slots.append(self._attr_len)
+        if AttributeFlags.INC_PYTHON_DATA_TYPE & flags:
+            add_static(self._attr_python_data_type)
+        if AttributeFlags.INC_LENGTH_ELEMENT_TEXT & flags:
+            slots.append(self._attr_length_element_text)
+        if AttributeFlags.INC_XSD_DATA_TYPE & flags:
+            add_static(self._attr_xsd_data_type)
+
+        tag, tag_attributes = current._fix_invalid_xml_element_name(  # pylint: disable=W0212; protected-access
+            self._get_element_name(parent=parent, data=data, child_name=child_name)
+        )
+        return ElementTemplate(
+            processor=self,
+            tag=tag,
+            tag_attributes=tag_attributes or None,
+            attribute_slots=tuple(slot for slot in slots if slot != {})
+        )
+
+    @classmethod
+    def _locate_template_processor(
+        cls,
+        config: ConfigTypeAlias,
+        data: Any
+    ) -> Optional['DataProcessorAbstractBaseClass']:
+        """
+        Find the processor `_locate_appropriate_data_processor` would use for `data`,
+        if it can emit from a template.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+            data (Any): _description_
+
+        Returns:
+            Optional[DataProcessorAbstractBaseClass]: The processor, or None if a processor
+            tried before it, or the processor itself, customizes the conversion methods.
+        """
+        processors = config.custom_pre_processors + config.default_processors \
+            + config.custom_post_processors + [config.last_chance_processor]
+        for processor in processors:
+            processor_type = type(processor)
+            if (
+                processor_type._try_converting is not DataProcessorAbstractBaseClass._try_converting  # pylint: disable=W0212; protected-access
+                or processor_type._try_converting_add_attributes is not DataProcessorAbstractBaseClass._try_converting_add_attributes  # pylint: disable=W0212; protected-access
+            ):
+                return None
+            if processor._is_expected_data_type(data):  # pylint: disable=W0212; protected-access
+                if processor_type._add_attributes is not DataProcessorAbstractBaseClass._add_attributes:  # pylint: disable=W0212; protected-access
+                    return None
+                return processor
+        return None
+
     def _try_converting_add_attributes(  # pylint: disable=W0613;unused-argument
         self,
         parent: XmlElementTypeAlias,
@@ -466,6 +1374,10 @@ class DataProcessorAbstractBaseClass(ABC):
         if e is None:
             return None
         self._add_attributes(config=self.config, parent=parent, current=e, data=data)
+        if _ELEMENT_OBSERVATIONS.get():
+            _notify_element_observations(self, e)
+        if self.config.share_leaf_elements:
+            return self._share_leaf_element(parent=parent, current=e)
         return e
 
     def convert(
@@ -509,6 +1421,7 @@ class DataProcessorAbstractBaseClass(ABC):
         config: ConfigTypeAlias,
         data: Any,
         attrib: OptionalXmlAttributesTypeAlias = None,
+        statistics: Optional['ConversionStatistics'] = None,
         **kwargs: object
     ) -> XmlElementTypeAlias:
         """
@@ -519,20 +1432,71 @@ class DataProcessorAbstractBaseClass(ABC):
             config (ConfigTypeAlias): _description_
             data (Any): _description_
             attrib (OptionalXmlAttributesTypeAlias, optional): _description_. Defaults to None.
+            statistics (Optional[ConversionStatistics], optional): A
+                `libs.conversion_statistics.ConversionStatistics`, filled with the size
+                and timings of this conversion. Defaults to None.
 
         Returns:
             XmlElementTypeAlias: _description_
         """
+        try:
+            if config.slow_conversion_capture is not None:
+                return config.slow_conversion_capture.measure_conversion(
+                    cls, config=config, data=data, attrib=attrib, statistics=statistics, **kwargs
+                )
+            if statistics is not None:
+                return statistics.measure_conversion(cls, config=config, data=data, attrib=attrib, **kwargs)
+            root = cls._begin_conversion(config=config, attrib=attrib, **kwargs)
+            cls._process(config=config, parent=root, data=data, child_name=None, **kwargs)
+            return root
+        finally:
+            cls._end_conversion(config)
+
+    @classmethod
+    def _begin_conversion(
+        cls,
+        config: ConfigTypeAlias,
+        attrib: OptionalXmlAttributesTypeAlias = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        """
+        Reset the per-conversion state of the configuration and create the root element.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+            attrib (OptionalXmlAttributesTypeAlias, optional): _description_. Defaults to None.
+
+        Returns:
+            XmlElementTypeAlias: The root element.
+        """
+        if config.frozen is not None:
+            config.freeze()
         config.elements_sequential_counter = 0
-        root: XmlElementTypeAlias = XmlElementNameBaseClass.create_root_element(
+        config.subtree_memo.clear()
+        config.immutable_containers.clear()
+        config.reference_elements.clear()
+        config.reference_id_counter = 0
+        config.leaf_elements.clear()
+        return XmlElementNameBaseClass.create_root_element(
             config=config,
             tag=None,
             attrib=attrib,
             kwargs=kwargs
         )
 
-        cls._process(config=config, parent=root, data=data, child_name=None, **kwargs)
-        return root
+    @staticmethod
+    def _end_conversion(config: ConfigTypeAlias) -> None:
+        """
+        Drop the per-conversion state of the configuration that refers to the data and
+        to the tree, so neither is kept alive by the configuration once converted.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+        """
+        config.reference_elements.clear()
+        config.subtree_memo.clear()
+        config.immutable_containers.clear()
+        config.leaf_elements.clear()
 
     @classmethod
     def _locate_appropriate_data_processor(
@@ -596,6 +1560,23 @@ class DataProcessorAbstractBaseClass(ABC):
         child_name: Optional[str] = None,
         **kwargs: object
     ) -> DataProcessorReturnTypeAlias:
+        if config.track_references:
+            reference = config.reference_elements.get(id(data))
+            if reference is not None:
+                _, referenced, processor = reference
+                return processor._create_idref_element(  # pylint: disable=W0212; protected-access
+                    parent=parent,
+                    referenced=referenced,
+                    data=data,
+                    child_name=child_name
+                )
+        memoize: bool = config.memoize_immutable_subtrees and not config.track_references
+        if memoize:
+            key = (id(data), child_name)
+            memo = config.subtree_memo.get(key)
+            if memo is not None:
+                return cls._clone_subtree(config=config, parent=parent, source=memo[1])
+
         e = cls._locate_appropriate_data_processor(
             config=config,
             parent=parent,
@@ -603,8 +1584,46 @@ class DataProcessorAbstractBaseClass(ABC):
             child_name=child_name
         )
         assert e is not None
+
+        # The items are converted first: their immutability is already known.
+        if memoize and config.last_chance_processor.classifier.is_immutable_container(data, config.immutable_containers):
+            config.subtree_memo[key] = (data, e)
         return e
 
+    @classmethod
+    def _clone_subtree(
+        cls,
+        config: ConfigTypeAlias,
+        parent: XmlElementTypeAlias,
+        source: XmlElementTypeAlias
+    ) -> XmlElementTypeAlias:
+        """
+        Append a copy of `source` and its descendants to `parent`. The elements are
+        created in the same order as a conversion would, so the `INC_SEQ_ID` attributes
+        are numbered the same. `INC_ALT_ID` attributes get new values.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+            parent (XmlElementTypeAlias): Element receiving the copy.
+            source (XmlElementTypeAlias): Element to copy.
+
+        Returns:
+            XmlElementTypeAlias: The copy of `source`.
+        """
+        element = parent.create_child_element(config, source.tag, source.text)
+        attributes = source.attributes.copy()
+        seq_id_name = config.attr_flag_names[AttributeFlags.INC_SEQ_ID]
+        if seq_id_name in element.attributes:
+            attributes[seq_id_name] = element.attributes[seq_id_name]
+        alt_id_name = ATTRIBUTE_FLAGS_NAMES[AttributeFlags.INC_ALT_ID]
+        if alt_id_name in attributes:
+            attributes[alt_id_name] = _new_alt_id()
+        element.attributes = attributes
+
+        for child in source.children:
+            cls._clone_subtree(config=config, parent=element, source=child)
+        return element
+
     def _attr_alt_id(  # pylint: disable=W0613;unused-argument
         self,
         parent: XmlElementTypeAlias,
@@ -625,7 +1644,7 @@ class DataProcessorAbstractBaseClass(ABC):
         """
         attrflag: Final[AttributeFlags] = AttributeFlags.INC_ALT_ID
         key: Final[str] = ATTRIBUTE_FLAGS_NAMES[attrflag]
-        return {key: str(uuid.uuid4())}
+        return {key: _new_alt_id()}
 
     def _attr_binary_encoding(  # pylint: disable=W0613;unused-argument
         self,
@@ -865,9 +1884,11 @@ class DataProcessorAbstractBaseClass(ABC):
             data (Any): _description_
         """
         attr: XmlAttributesTypeAlias = {}
+        frozen = self.config.frozen
+        flags: int = self.config.attr_flags.value if frozen is None else frozen.attr_flags_value
 
         if (
-            (AttributeFlags.INC_BINARY_ENCODING & self.config.attr_flags) and
+            (_INC_BINARY_ENCODING & flags) and
             self._classifier.is_binary(data)
         ):
             a = self._attr_binary_encoding(
@@ -878,7 +1899,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if AttributeFlags.INC_DEBUG_INFO & self.config.attr_flags:
+        if _INC_DEBUG_INFO & flags:
             a = self._attr_debug_info(
                 parent=parent,
                 current=current,
@@ -887,7 +1908,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if (AttributeFlags.INC_FIELD_COMMENT & self.config.attr_flags) \
+        if (_INC_FIELD_COMMENT & flags) \
                 and self._get_field_comment(data, **kwargs) is not None:
             a = self._attr_field_comment(
                 parent=parent,
@@ -898,7 +1919,7 @@ class DataProcessorAbstractBaseClass(ABC):
             attr |= a
 
         if (
-            (AttributeFlags.INC_FIELD_TYPE_HINT & self.config.attr_flags)
+            (_INC_FIELD_TYPE_HINT & flags)
             and self._get_field_type_hint(data, **kwargs) is not None
         ):
             a = self._attr_field_type_hint(
@@ -909,7 +1930,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if (AttributeFlags.INC_FORMAT_STRING_HINT & self.config.attr_flags) \
+        if (_INC_FORMAT_STRING_HINT & flags) \
                 and self._get_format_string_hint(data, **kwargs) is not None:
             a = self._attr_format_string_hint(
                 parent=parent,
@@ -919,7 +1940,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if (AttributeFlags.INC_LEN & self.config.attr_flags) and isinstance(data, abc.Sized):
+        if (_INC_LEN & flags) and isinstance(data, abc.Sized):
             a = self._attr_len(
                 parent=parent,
                 current=current,
@@ -928,7 +1949,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if AttributeFlags.INC_PYTHON_DATA_TYPE & self.config.attr_flags:
+        if _INC_PYTHON_DATA_TYPE & flags:
             a = self._attr_python_data_type(
                 parent=parent,
                 current=current,
@@ -940,7 +1961,7 @@ class DataProcessorAbstractBaseClass(ABC):
         # Don't process AttributeFlags.INC_SEQ_ID here.
         # It is processed and added when the Element is created.
 
-        if AttributeFlags.INC_LENGTH_ELEMENT_TEXT & self.config.attr_flags:
+        if _INC_LENGTH_ELEMENT_TEXT & flags:
             a = self._attr_length_element_text(
                 parent=parent,
                 current=current,
@@ -949,7 +1970,7 @@ class DataProcessorAbstractBaseClass(ABC):
             )
             attr |= a
 
-        if AttributeFlags.INC_XSD_DATA_TYPE & self.config.attr_flags:
+        if _INC_XSD_DATA_TYPE & flags:
             a = self._attr_xsd_data_type(
                 parent=parent,
                 current=current,
@@ -961,6 +1982,258 @@ class DataProcessorAbstractBaseClass(ABC):
         current.attributes |= attr
 
 
+class ElementTemplate:
+    """
+    How a value of one exact type is emitted under one element name, made once by
+    `DataProcessorAbstractBaseClass._make_element_template`.
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessorAbstractBaseClass,
+        tag: str,
+        tag_attributes: OptionalXmlAttributesTypeAlias,
+        attribute_slots: Tuple[XmlAttributesTypeAlias | Callable[..., XmlAttributesTypeAlias], ...]
+    ) -> None:
+        self.processor = processor
+        """
+        Processor converting the value.
+        """
+        self.tag = tag
+        """
+        Valid element name.
+        """
+        self.tag_attributes = tag_attributes
+        """
+        Attribute holding the original element name, when it was not valid.
+        """
+        self.attribute_slots = attribute_slots
+        """
+        Attributes in the order they are added. Either static attributes, or a method
+        computing attributes that depend on the value.
+        """
+
+
+class FrozenConfig:
+    """
+    Immutable, hashable snapshot of a configuration, made by `ConfigBaseClass.freeze`.
+
+    The options are copied, and what the processors would otherwise look up for each
+    element is resolved once: the element name override of each processor, the
+    attribute names and the codecs. Two snapshots of configurations with the same
+    options and the same processors are equal, so a snapshot is a safe cache key.
+    """
+
+    __slots__ = (
+        'key',
+        'options',
+        'attr_flags',
+        'attr_flags_value',
+        'attr_flag_names',
+        'seq_id_attribute',
+        'processors',
+        'element_names',
+        'codec_text',
+        'codec_binary',
+        '_hash',
+    )
+
+    key: Hashable
+    """
+    `make_key(config)`.
+    """
+    options: MappingProxyType[str, Any]
+    """
+    The options of the configuration: its public attributes of simple types.
+    """
+    attr_flags: AttributeFlags
+    attr_flags_value: int
+    """
+    `attr_flags.value`, faster to test.
+    """
+    attr_flag_names: MappingProxyType[AttributeFlags, str]
+    seq_id_attribute: str
+    """
+    Name of the `INC_SEQ_ID` attribute.
+    """
+    processors: Tuple[DataProcessorAbstractBaseClass, ...]
+    """
+    The processors, in the order they are tried.
+    """
+    element_names: MappingProxyType[int, Optional[str]]
+    """
+    Element name override of each processor, keyed by its id.
+    """
+    codec_text: codecs.CodecInfo
+    codec_binary: codecs.CodecInfo
+    _hash: int
+
+    _NOT_OPTIONS: Final[FrozenSet[str]] = frozenset({'frozen', 'reference_id_counter', 'slow_conversion_capture'})
+    """
+    Public attributes of the configuration that are not options.
+    """
+
+    _OPTION_TYPES: Final[Tuple[type, ...]] = (type(None), bool, int, float, str, enum.Enum)
+
+    def __init__(self, config: ConfigTypeAlias, key: Optional[Hashable] = None) -> None:
+        """
+        Args:
+            config (ConfigTypeAlias): Configuration to snapshot.
+            key (Optional[Hashable], optional): `make_key(config)`, if already computed.
+                Defaults to None.
+
+        Raises:
+            ValueError: An option has an invalid value.
+            LookupError: A codec is not found.
+        """
+        self._validate(config)
+        processors = self._processors(config)
+        setattr_ = super().__setattr__
+        setattr_('key', self.make_key(config) if key is None else key)
+        setattr_('options', MappingProxyType(self._options(config)))
+        setattr_('attr_flags', config.attr_flags)
+        setattr_('attr_flags_value', config.attr_flags.value)
+        setattr_('attr_flag_names', MappingProxyType(dict(config.attr_flag_names)))
+        setattr_('seq_id_attribute', config.attr_flag_names[AttributeFlags.INC_SEQ_ID])
+        setattr_('processors', processors)
+        setattr_('element_names', MappingProxyType({
+            id(processor): processor._get_element_name_from_config()  # pylint: disable=W0212; protected-access
+            for processor in processors
+        }))
+        setattr_('codec_text', config.codec_text.codec)
+        setattr_('codec_binary', config.codec_binary.codec)
+        setattr_('_hash', hash(self.key))
+
+    @staticmethod
+    def _processors(config: ConfigTypeAlias) -> Tuple[DataProcessorAbstractBaseClass, ...]:
+        return tuple(
+            config.custom_pre_processors + config.default_processors
+            + config.custom_post_processors + [config.last_chance_processor]
+        )
+
+    @classmethod
+    def _options(cls, config: ConfigTypeAlias) -> Dict[str, Any]:
+        return {
+            name: value
+            for name, value in vars(config).items()
+            if not name.startswith('_')
+            and name not in cls._NOT_OPTIONS
+            and isinstance(value, cls._OPTION_TYPES)
+        }
+
+    @classmethod
+    def make_key(cls, config: ConfigTypeAlias) -> Hashable:
+        """
+        The options, attribute names, processor classes and codecs of `config`.
+        Snapshots are compared by their key.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+
+        Returns:
+            Hashable: _description_
+        """
+        return (
+            type(config),
+            tuple(cls._options(config).items()),
+            tuple(config.attr_flag_names.items()),
+            tuple(map(type, cls._processors(config))),
+            (config.codec_text.codec_name, config.codec_text.codec_error_handler),
+            (config.codec_binary.codec_name, config.codec_binary.codec_error_handler),
+        )
+
+    @staticmethod
+    def _validate(config: ConfigTypeAlias) -> None:
+        is_valid_name = XmlElementNameBaseClass._DEFAULT_REGEX_PATTERN_IS_VALID_ELEMENT_NAME.fullmatch  # pylint: disable=W0212; protected-access
+
+        names: Dict[str, Any] = {
+            'root_label': config.root_label,
+            'label_invalid_xml_element_name': config.label_invalid_xml_element_name,
+            'label_invalid_xml_element_name_attribute': config.label_invalid_xml_element_name_attribute,
+            'label_reference_id_attribute': config.label_reference_id_attribute,
+            'label_reference_idref_attribute': config.label_reference_idref_attribute,
+        }
+        names |= {
+            name: value
+            for name, value in vars(config).items()
+            if name.startswith('override_') and name.endswith('_label') and value is not None
+        }
+        names |= {f'attr_flag_names[{flag}]': name for flag, name in config.attr_flag_names.items()}
+        for option, name in names.items():
+            if not isinstance(name, str) or is_valid_name(name) is None:
+                raise ValueError(f'{option} is not a valid XML name: {name!r}')
+
+        missing = [flag for flag in AttributeFlags if flag not in config.attr_flag_names]
+        if missing:
+            raise ValueError(f'attr_flag_names has no name for {missing}')
+        if not isinstance(config.attr_flags, AttributeFlags):
+            raise ValueError(f'attr_flags is not an AttributeFlags: {config.attr_flags!r}')
+        if not isinstance(config.binary_chunk_size, int) or config.binary_chunk_size <= 0:
+            raise ValueError(f'binary_chunk_size must be a positive integer: {config.binary_chunk_size!r}')
+
+        if not hasattr(config, 'last_chance_processor'):
+            raise ValueError('last_chance_processor is not set')
+        processors = config.custom_pre_processors + config.default_processors \
+            + config.custom_post_processors + [config.last_chance_processor]
+        for processor in processors:
+            if not isinstance(processor, DataProcessorAbstractBaseClass):
+                raise ValueError(f'Not a data processor: {processor!r}')
+            if processor.config is not config:
+                raise ValueError(f'{type(processor).__name__} belongs to another configuration')
+
+        # Raise LookupError now rather than during a conversion.
+        _ = config.codec_text.codec
+        _ = config.codec_binary.codec
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, FrozenConfig):
+            return NotImplemented
+        return self._hash == other._hash and self.key == other.key
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({dict(self.options)!r})'
+
+    def matches(self, config: ConfigTypeAlias, key: Optional[Hashable] = None) -> bool:
+        """
+        Test whether this is still the snapshot of `config`: same key and same
+        processor instances.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+            key (Optional[Hashable], optional): `make_key(config)`, if already computed.
+                Defaults to None.
+
+        Returns:
+            bool: _description_
+        """
+        if self.key != (self.make_key(config) if key is None else key):
+            return False
+        processors = self._processors(config)
+        return len(processors) == len(self.processors) \
+            and all(a is b for a, b in zip(processors, self.processors))
+
+    def element_name(self, processor: DataProcessorAbstractBaseClass) -> Optional[str]:
+        """
+        Args:
+            processor (DataProcessorAbstractBaseClass): A processor of the configuration.
+
+        Returns:
+            Optional[str]: Its element name override, `_get_element_name_from_config()`.
+        """
+        return self.element_names[id(processor)]
+
+
 class XmlElementNameBaseClass:
     """
     Abstract base class responsible for creating XML elements and
@@ -981,7 +2254,7 @@ class XmlElementNameBaseClass:
         self,
         config: ConfigTypeAlias,
         tag: str,
-        text: Optional[str],
+        text: Optional[XmlTextTypeAlias],
         attrib: OptionalXmlAttributesTypeAlias,
         parent: OptionalXmlElementTypeAlias
     ) -> None:
@@ -1002,6 +2275,9 @@ class XmlElementNameBaseClass:
         """
         Reference to the parent of this node. If this is a root
         element, the parent is None.
+        Not reliable when `ConfigBaseClass.share_leaf_elements` is True: a shared
+        leaf has several parents and its `parent` is None. Use `iter_with_parents`
+        to get the parents of the elements of such a tree.
         """
         # If we have a parent, append self to their list of children.
         if parent is not None:
@@ -1012,7 +2288,7 @@ class XmlElementNameBaseClass:
         List of child elements.
         """
 
-        self.text: Optional[str] = text
+        self.text: Optional[XmlTextTypeAlias] = text
         """
         Text within the element. `<tag>text</tag>`
         """
@@ -1074,15 +2350,34 @@ class XmlElementNameBaseClass:
         else:
             return (
                 self.config.label_invalid_xml_element_name,
-                {self.config.label_invalid_xml_element_name_attribute: tag}
+                {self.config.label_invalid_xml_element_name_attribute: (
+                    sanitize_text(tag, self.config.sanitize_text_replacement)
+                    if self.config.sanitize_text else tag
+                )}
             )
 
+    def iter_with_parents(self) -> Iterator[Tuple[XmlElementTypeAlias, OptionalXmlElementTypeAlias]]:
+        """
+        Walk this element and its descendants in document order. Unlike the `parent`
+        attribute, the parents are correct when leaf elements are shared, see
+        `ConfigBaseClass.share_leaf_elements`.
+
+        Yields:
+            Tuple[XmlElementTypeAlias, OptionalXmlElementTypeAlias]: Each element with
+            its parent. The parent of this element is its `parent` attribute.
+        """
+        stack: List[Tuple[XmlElementTypeAlias, OptionalXmlElementTypeAlias]] = [(self, self.parent)]
+        while stack:
+            element, parent = stack.pop()
+            yield element, parent
+            stack.extend((child, element) for child in reversed(element.children))
+
     @classmethod
     def create_root_element(
         cls,
         config: ConfigTypeAlias,
         tag: Optional[str] = None,
-        text: Optional[str] = None,
+        text: Optional[XmlTextTypeAlias] = None,
         attrib: OptionalXmlAttributesTypeAlias = None,
         **kwargs: object
     ) -> XmlElementTypeAlias:
@@ -1112,7 +2407,7 @@ class XmlElementNameBaseClass:
         self,
         config: ConfigTypeAlias,
         tag: str,
-        text: Optional[str] = None,
+        text: Optional[XmlTextTypeAlias] = None,
         attrib: OptionalXmlAttributesTypeAlias = None,
         **kwargs: object
     ) -> XmlElementTypeAlias:
@@ -1143,7 +2438,7 @@ class XmlElementNameBaseClass:
         config: ConfigTypeAlias,
         parent: OptionalXmlElementTypeAlias,
         tag: str,
-        text: Optional[str] = None,
+        text: Optional[XmlTextTypeAlias] = None,
         attrib: OptionalXmlAttributesTypeAlias = None,
         **kwargs: object
     ) -> XmlElementTypeAlias:
@@ -1168,7 +2463,11 @@ class XmlElementNameBaseClass:
         )
         counter: int = config.increment_elements_sequential_counter()  # always increment
 
-        if AttributeFlags.INC_SEQ_ID & config.attr_flags:
-            element.attributes |= config.make_attribute(AttributeFlags.INC_SEQ_ID, str(counter))
+        frozen = config.frozen
+        if frozen is None:
+            if AttributeFlags.INC_SEQ_ID & config.attr_flags:
+                element.attributes |= config.make_attribute(AttributeFlags.INC_SEQ_ID, str(counter))
+        elif _INC_SEQ_ID & frozen.attr_flags_value:
+            element.attributes[frozen.seq_id_attribute] = str(counter)
 
         return element
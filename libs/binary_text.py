@@ -0,0 +1,162 @@
+"""
+Encode binary data to text in fixed-size chunks.
+"""
+import io
+from typing import Any, Iterator, Optional
+from libs.codec_wrapper import CodecWrapper
+
+
+def as_byte_view(view: memoryview) -> memoryview:
+    """
+    Return a flat view of unsigned bytes over the same buffer as `view`.
+    Only a non-contiguous buffer needs to be copied.
+
+    Args:
+        view (memoryview): View of any buffer-protocol object.
+
+    Returns:
+        memoryview: One dimensional view with format `B`.
+    """
+    if view.format == 'B' and view.ndim == 1:
+        return view
+    if view.c_contiguous:
+        return view.cast('B')
+    return memoryview(view.tobytes())
+
+
+def iter_binary_chunks(source: Any, chunk_size: int) -> Iterator[bytes | memoryview]:
+    """
+    Yield consecutive chunks of `chunk_size` bytes. Only the last chunk may be shorter.
+
+    Args:
+        source (Any): A buffer-protocol object, which is sliced without copying,
+            or a readable binary file, which is read from its current position.
+        chunk_size (int): Number of bytes in each chunk.
+
+    Yields:
+        bytes | memoryview: The next chunk.
+    """
+    if isinstance(source, io.IOBase):
+        while True:
+            chunk = source.read(chunk_size)
+            # Raw files may return short reads before the end of the file.
+            while chunk and len(chunk) < chunk_size:
+                more = source.read(chunk_size - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            if not chunk:
+                return
+            yield chunk
+    else:
+        with memoryview(source) as buffer:
+            view = as_byte_view(buffer)
+            for i in range(0, view.nbytes, chunk_size):
+                yield view[i:i + chunk_size]
+
+
+class BinaryText:
+    """
+    Textual representation of a binary value that is encoded chunk by chunk,
+    each time it is iterated, using the codec's incremental encoder.
+
+    The value is never encoded as a whole, so it can be written straight to the
+    output. The value must not change, and a file must stay open, until the text
+    is no longer needed.
+    """
+
+    def __init__(self, source: Any, codec: CodecWrapper, chunk_size: int) -> None:
+        """
+        Args:
+            source (Any): A buffer-protocol object or a readable binary file.
+            codec (CodecWrapper): A codec listed in `SLICEABLE_CODECS`. Its current
+                codec is kept, changing the wrapper afterwards has no effect.
+            chunk_size (int): Number of bytes encoded at a time. Rounded down to the
+                slice alignment of the codec.
+        """
+        alignment = codec.slice_alignment
+        assert alignment is not None
+        self._source = source
+        self._codec_name = codec.codec.name
+        self._incremental_encoder = codec.incremental_encoder
+        self._chunk_size = max(chunk_size // alignment, 1) * alignment
+        self._hexlify = codec.binary_output
+        self._start: Optional[int] = None
+        if isinstance(source, io.IOBase) and source.seekable():
+            self._start = source.tell()
+
+    @property
+    def is_repeatable(self) -> bool:
+        """
+        Returns:
+            bool: True if the text can be produced more than once. False for a
+            file that cannot seek back to where it started.
+        """
+        return not isinstance(self._source, io.IOBase) or self._start is not None
+
+    def _source_size(self) -> Optional[int]:
+        """
+        Returns:
+            Optional[int]: Number of bytes that will be encoded, or None if unknown.
+        """
+        if not isinstance(self._source, io.IOBase):
+            with memoryview(self._source) as buffer:
+                return buffer.nbytes
+        if self._start is None:
+            return None
+        end = self._source.seek(0, io.SEEK_END)
+        self._source.seek(self._start)
+        return end - self._start
+
+    def _iter_encoded(self) -> Iterator[str]:
+        if self._start is not None:
+            self._source.seek(self._start)
+        # The encoders of binary codecs take bytes, `codecs.IncrementalEncoder` is typed for text.
+        encoder: Any = self._incremental_encoder()
+        for chunk in iter_binary_chunks(self._source, self._chunk_size):
+            encoded = encoder.encode(chunk)
+            yield encoded.hex() if self._hexlify else encoded.decode()
+        encoded = encoder.encode(b'', True)
+        yield encoded.hex() if self._hexlify else encoded.decode()
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Yield the text chunk by chunk. Leading and trailing whitespace is removed,
+        the same as `str.strip()` on the text of a single `encode` call.
+        """
+        pending = ''
+        leading = True
+        for text in self._iter_encoded():
+            if leading:
+                text = text.lstrip()
+                leading = not text
+            stripped = text.rstrip()
+            if stripped:
+                if pending:
+                    yield pending
+                yield stripped
+                pending = text[len(stripped):]
+            else:
+                pending += text
+
+    def __len__(self) -> int:
+        size = self._source_size()
+        if size is not None and self._codec_name == 'base64':
+            if size == 0:
+                return 0
+            lines, remainder = divmod(size, 57)
+            length = lines * 77
+            if remainder:
+                length += 4 * ((remainder + 2) // 3) + 1
+            return length - 1  # without the final line break
+        if size is not None and self._codec_name == 'hex':
+            return 2 * size
+        return sum(len(text) for text in self)
+
+    def __bool__(self) -> bool:
+        if self._hexlify:
+            return True  # compressed output is never empty
+        return self._source_size() != 0
+
+    def __str__(self) -> str:
+        return ''.join(self)
@@ -0,0 +1,212 @@
+"""
+Caches shared by the data processors of a configuration.
+"""
+import sys
+from collections.abc import Hashable
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def is_cacheable_scalar(data: Any) -> bool:
+    """
+    Test whether the text of `data` can be cached by `ScalarTextCache`.
+
+    Args:
+        data (Any): Value to test.
+
+    Returns:
+        bool: True for exactly `int`, `bool` and `str`, and for `float` other than
+        zero (`-0.0 == 0.0`) and `nan` (never equal to itself). False otherwise.
+    """
+    data_type = type(data)
+    if data_type is int or data_type is bool or data_type is str:
+        return True
+    return data_type is float and data == data and data != 0.0
+
+
+class ScalarTextCache:
+    """
+    Bounded memo from (type, value) to the interned textual representation of a
+    hashable immutable scalar. Equal values repeated many times in the data then
+    share one string, which is built only once.
+
+    Only values whose text is fully determined by (type, value) may be cached. For
+    example `0.0 == -0.0` and `Decimal('1.0') == Decimal('1.00')` have different
+    texts, and `nan` is never equal to itself, so those must not be cached.
+    """
+
+    def __init__(self, max_size: int = 4096) -> None:
+        """
+        Args:
+            max_size (int, optional): Maximum number of texts kept. The oldest text
+                is dropped first. Zero disables the cache. Defaults to 4096.
+        """
+        self.max_size: int = max_size
+        """
+        Maximum number of texts kept. Zero disables the cache.
+        """
+        self.hits: int = 0
+        """
+        Number of texts found in the cache.
+        """
+        self.misses: int = 0
+        """
+        Number of texts that had to be built.
+        """
+        self.evictions: int = 0
+        """
+        Number of texts dropped to make room for a new one.
+        """
+        self._texts: Dict[Tuple[type, Any], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def get_text(self, data: Any, to_text: Callable[[Any], str]) -> str:
+        """
+        Return the text of `data`, building it with `to_text` if it is not cached.
+
+        Args:
+            data (Any): A hashable immutable scalar.
+            to_text (Callable[[Any], str]): Builds the text of `data`.
+
+        Returns:
+            str: The interned text.
+        """
+        key = (type(data), data)
+        text = self._texts.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+
+        self.misses += 1
+        text = to_text(data)
+        max_size = self.max_size
+        if max_size <= 0:
+            return text
+        text = sys.intern(text)
+        while len(self._texts) >= max_size:
+            # Drop the oldest text. Another thread may drop it first, or change the
+            # texts while they are iterated.
+            try:
+                del self._texts[next(iter(self._texts))]
+            except (StopIteration, KeyError, RuntimeError):
+                continue
+            self.evictions += 1
+        self._texts[key] = text
+        return text
+
+    def clear(self) -> None:
+        """
+        Drop all the texts and reset the counters.
+        """
+        self._texts.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Counters and current size of the cache.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._texts),
+            'max_size': self.max_size,
+        }
+
+
+class ShapeTemplateCache:
+    """
+    Bounded cache of the emission templates of dictionaries, keyed by their shape
+    (keys, exact types of the values and attribute flags). See
+    `ConfigBaseClass.use_shape_templates`.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """
+        Args:
+            max_size (int, optional): Maximum number of templates kept. The oldest
+                template is dropped first. Zero disables the cache. Defaults to 1024.
+        """
+        self.max_size: int = max_size
+        """
+        Maximum number of templates kept. Zero disables the cache.
+        """
+        self.hits: int = 0
+        """
+        Number of dictionaries emitted with a cached template.
+        """
+        self.misses: int = 0
+        """
+        Number of dictionaries whose shape had no template.
+        """
+        self.evictions: int = 0
+        """
+        Number of templates dropped to make room for a new one.
+        """
+        self._templates: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, shape: Hashable) -> Optional[Any]:
+        """
+        Args:
+            shape (Hashable): Shape of a dictionary.
+
+        Returns:
+            Optional[Any]: The template of the shape, or None if it is not cached.
+        """
+        template = self._templates.get(shape)
+        if template is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return template
+
+    def put(self, shape: Hashable, template: Any) -> None:
+        """
+        Cache the template of a shape.
+
+        Args:
+            shape (Hashable): Shape of a dictionary.
+            template (Any): Its template.
+        """
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+        while len(self._templates) >= max_size:
+            # Drop the oldest template, tolerating the changes of other threads, see
+            # `ScalarTextCache.get_text`.
+            try:
+                del self._templates[next(iter(self._templates))]
+            except (StopIteration, KeyError, RuntimeError):
+                continue
+            self.evictions += 1
+        self._templates[shape] = template
+
+    def clear(self) -> None:
+        """
+        Drop all the templates and reset the counters. Needed after changing the
+        labels, codecs or processors of the configuration.
+        """
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Counters and current size of the cache.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._templates),
+            'max_size': self.max_size,
+        }
@@ -1,13 +1,34 @@
 """
 Wrapper to handle codec encoders.
 """
-from typing import Optional
+from typing import Callable, Dict, Final, FrozenSet, Optional
 import codecs
 
 
+SLICEABLE_CODECS: Final[Dict[str, int]] = {
+    'base64': 57,
+    'bz2': 1,
+    'hex': 1,
+    'zlib': 1,
+}
+"""
+Codecs, keyed by their official name, whose incremental encoder produces the same
+output when it is fed consecutive slices of the input as when the whole input is
+encoded in one call. The value is the number of bytes each slice must be a multiple
+of. `base64` inserts a line break after every 57 input bytes.
+"""
+
+BINARY_OUTPUT_CODECS: Final[FrozenSet[str]] = frozenset({'bz2', 'zlib'})
+"""
+Sliceable codecs whose output is not ASCII text. Their output is represented in
+hexadecimal.
+"""
+
+
 class CodecWrapper:
     """
-    Wrapper to handle the instantion of a codec.
+    Wrapper to handle the instantion of a codec. The codec is looked up once,
+    when its name is set, so it can be shared by every element of a conversion.
     """
 
     _codecinfo: Optional[codecs.CodecInfo] = None
@@ -15,6 +36,17 @@ class CodecWrapper:
     Store the codec information loaded from the codec registry.
     """
 
+    _slice_alignment: Optional[int] = None
+    """
+    Slice alignment of the loaded codec. See `SLICEABLE_CODECS`.
+    """
+
+    _binary_output: bool = False
+    """
+    Flag indicating that the output of the loaded codec is not ASCII text.
+    See `BINARY_OUTPUT_CODECS`.
+    """
+
     codec_error_handler: str = 'surrogatepass'
     """
     Flag indicating how we are going to handle errors. By default the flag is set
@@ -29,6 +61,13 @@ class CodecWrapper:
     Name of the default codec we will be using. By default it is `UTF-8`.
     """
 
+    def __init__(self, codec_name: str = 'utf_8') -> None:
+        """
+        Args:
+            codec_name (str, optional): Name of a valid codec. Defaults to 'utf_8'.
+        """
+        self.codec_name = codec_name
+
     @ property
     def codec_name(self) -> str:
         """
@@ -42,33 +81,68 @@ class CodecWrapper:
     @ codec_name.setter
     def codec_name(self, codec_name: str) -> None:
         """
-        Setter for the codec name.
+        Setter for the codec name. The codec is looked up now. An unknown name
+        is only reported when the codec is used.
 
         Args:
             codec_name (str): Name of a valid codec.
         """
         self._codec_name = codec_name
+        try:
+            self._load(codecs.lookup(codec_name))
+        except LookupError:
+            self._load(None)
+
+    def _load(self, codecinfo: Optional[codecs.CodecInfo]) -> None:
+        """
+        Store the codec and the values derived from it.
+
+        Args:
+            codecinfo (Optional[codecs.CodecInfo]): Loaded codec, or None if the
+                codec name is unknown.
+        """
+        self._codecinfo = codecinfo
+        name = None if codecinfo is None else codecinfo.name
+        self._slice_alignment = SLICEABLE_CODECS.get(name) if name else None
+        self._binary_output = name in BINARY_OUTPUT_CODECS
+
+    def __getstate__(self) -> Dict[str, object]:
+        """
+        A codec found in the codec registry is pickled by name, and looked up again
+        when it is unpickled.
+        """
+        state = self.__dict__.copy()
+        codecinfo = state.get('_codecinfo')
+        if codecinfo is not None:
+            try:
+                registered = codecs.lookup(self._codec_name) is codecinfo
+            except LookupError:
+                registered = False
+            if registered:
+                for name in ('_codecinfo', '_slice_alignment', '_binary_output'):
+                    state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        if '_codecinfo' not in state:
+            self._load(codecs.lookup(self._codec_name))
 
     @ property
     def codec(self) -> codecs.CodecInfo:
         """
-        Getter for the codec. If the codec has not been loaded,
-        load it now.
+        Getter for the codec.
+
+        Raises:
+            LookupError: The codec name is unknown.
 
         Returns:
             codecs.CodecInfo: Return the loaded CodecInfo class.
         """
-
         if self._codecinfo is None:
-            self._codecinfo = codecs.lookup(self._codec_name)
-        else:
-            assert self._codecinfo.name is not None
-            # A codec is already loaded, but is it the one we want?
-            if self._codecinfo.name.lower() != self._codec_name.lower():
-                self._codecinfo = codecs.lookup(self._codec_name)
-
-        # Get the official codec name.
-        self._codec_name = self._codecinfo.name
+            # Raises the same error as when the name was set.
+            self._load(codecs.lookup(self._codec_name))
+            assert self._codecinfo is not None
         return self._codecinfo
 
     @ codec.setter
@@ -80,4 +154,65 @@ class CodecWrapper:
             codecinfo (codecs.CodecInfo): A codec that has been previously loaded.
         """
         self._codec_name = codecinfo.name
-        self._codecinfo = codecinfo
+        self._load(codecinfo)
+
+    @ property
+    def incremental_encoder(self) -> Callable[..., codecs.IncrementalEncoder]:
+        """
+        Getter for the incremental encoder factory of the codec, the same as
+        `codecs.getincrementalencoder(codec_name)`.
+
+        Example: `encoder = cw.incremental_encoder(cw.codec_error_handler)`
+
+        The encoders of binary codecs, eg `base64`, take bytes, although
+        `codecs.IncrementalEncoder` is typed for text: annotate them as `Any`.
+
+        Raises:
+            LookupError: The codec name is unknown or the codec has no incremental encoder.
+
+        Returns:
+            Callable[..., codecs.IncrementalEncoder]: Takes the optional error handler.
+        """
+        factory = self.codec.incrementalencoder
+        if factory is None:
+            raise LookupError(self._codec_name)
+        return factory
+
+    @ property
+    def incremental_decoder(self) -> Callable[..., codecs.IncrementalDecoder]:
+        """
+        Getter for the incremental decoder factory of the codec, the same as
+        `codecs.getincrementaldecoder(codec_name)`.
+
+        Raises:
+            LookupError: The codec name is unknown or the codec has no incremental decoder.
+
+        Returns:
+            Callable[..., codecs.IncrementalDecoder]: Takes the optional error handler.
+        """
+        factory = self.codec.incrementaldecoder
+        if factory is None:
+            raise LookupError(self._codec_name)
+        return factory
+
+    @ property
+    def slice_alignment(self) -> Optional[int]:
+        """
+        Getter for the slice alignment of the codec. See `SLICEABLE_CODECS`.
+
+        Returns:
+            Optional[int]: Number of bytes each slice must be a multiple of, or None
+            if the codec must encode the whole input in one call.
+        """
+        return self._slice_alignment
+
+    @ property
+    def binary_output(self) -> bool:
+        """
+        Getter for the flag indicating the output of the codec is not ASCII text.
+        See `BINARY_OUTPUT_CODECS`.
+
+        Returns:
+            bool: True if the output is represented in hexadecimal.
+        """
+        return self._binary_output
@@ -3,9 +3,10 @@ Concrete class for configuration. This class
 can be used for production.
 """
 
-from typing import override
+from typing import Any, Iterable, Optional, override
 from libs.abstract_baseclasses import ConfigBaseClass
 from libs.data_processor import (
+    DataProcessor_array,
     DataProcessor_binary,
     DataProcessor_bool,
     DataProcessor_calendar,
@@ -19,6 +20,7 @@ from libs.data_processor import (
     DataProcessor_numeric,
     DataProcessor_namedtuple,
     DataProcessor_post_processor_for_classes,
+    DataProcessor_range,
     DataProcessor_sequence,
     DataProcessor_str,
     DataProcessor_time,
@@ -28,6 +30,8 @@ from libs.data_processor import (
     DataProcessor_zoneinfo,
 )
 from libs.data_type_identification import DataTypeIdentification
+from libs.profiling import ElementEndCallbackTypeAlias, ElementStartCallbackTypeAlias, ProcessorProfiler
+from libs.warmup import ConversionProfile, warm
 
 
 class Config(ConfigBaseClass):
@@ -41,6 +45,7 @@ class Config(ConfigBaseClass):
         super().__init__()
 
         self.default_processors.extend([
+            DataProcessor_array(self),
             DataProcessor_binary(self),
             DataProcessor_bool(self),
             DataProcessor_calendar(self),
@@ -52,6 +57,7 @@ class Config(ConfigBaseClass):
             DataProcessor_none(self),
             DataProcessor_numeric(self),
             DataProcessor_namedtuple(self),
+            DataProcessor_range(self),
             DataProcessor_sequence(self),
             DataProcessor_str(self),
             DataProcessor_time(self),
@@ -63,3 +69,43 @@ class Config(ConfigBaseClass):
         self.custom_post_processors.append(DataProcessor_post_processor_for_classes(self))
         self.last_chance_processor = DataProcessor_last_chance(self)
         self.data_type_identification = DataTypeIdentification()
+
+    def warm(self, samples: Iterable[Any] = (), profile: Optional[ConversionProfile] = None) -> ConversionProfile:
+        """
+        Fill the caches of this configuration by converting representative data.
+        See `libs.warmup.warm`.
+
+        Example, at startup: `config.warm(profile=ConversionProfile.load(path))`.
+
+        Args:
+            samples (Iterable[Any], optional): Representative data. Defaults to ().
+            profile (Optional[ConversionProfile], optional): A profile returned by an
+                earlier call. Defaults to None.
+
+        Returns:
+            ConversionProfile: The profile of `samples`, merged with `profile`. Save
+            it with `ConversionProfile.save`.
+        """
+        return warm(config=self, samples=samples, profile=profile)
+
+    def profile(
+        self,
+        on_element_start: Optional[ElementStartCallbackTypeAlias] = None,
+        on_element_end: Optional[ElementEndCallbackTypeAlias] = None
+    ) -> ProcessorProfiler:
+        """
+        Count and time the work of each processor during the conversions made in a
+        `with` block. See `libs.profiling.ProcessorProfiler`.
+
+        Example: `with config.profile() as profiler: ...`, then `print(profiler.report())`.
+
+        Args:
+            on_element_start (Optional[ElementStartCallbackTypeAlias], optional): Called when
+                a processor accepts a value. Defaults to None.
+            on_element_end (Optional[ElementEndCallbackTypeAlias], optional): Called when an
+                element is complete. Defaults to None.
+
+        Returns:
+            ProcessorProfiler: _description_
+        """
+        return ProcessorProfiler(config=self, on_element_start=on_element_start, on_element_end=on_element_end)
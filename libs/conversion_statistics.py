@@ -0,0 +1,365 @@
+"""
+Statistics of conversions, for capacity planning and alerting on payload growth.
+
+Pass a `ConversionStatistics` to `DataProcessorAbstractBaseClass.convert_to_xml`
+to fill it with the size of the tree and the time of each phase of the conversion.
+Add the statistics of many conversions to a `StatisticsRegistry`, which writes
+their totals in the Prometheus text format to a file or serves them over HTTP.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Final, Iterator, List, Optional, Tuple
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    ElementObservation,
+    OptionalXmlAttributesTypeAlias,
+    XmlElementTypeAlias
+)
+
+PhaseTimeTypeAlias = Tuple[float, float]
+"""
+Wall time and CPU time of the thread, in seconds.
+"""
+
+ELEMENTS_BUCKETS: Final[Tuple[float, ...]] = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+"""
+Upper bounds of the histogram of the number of elements per conversion.
+"""
+
+
+class _Phase:
+    """
+    Context manager adding its duration to a phase of `ConversionStatistics`.
+    """
+
+    def __init__(self, statistics: 'ConversionStatistics', name: str) -> None:
+        self.statistics = statistics
+        self.name = name
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+
+    def __enter__(self) -> '_Phase':
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        wall, cpu = self.statistics.phases.get(self.name, (0.0, 0.0))
+        self.statistics.phases[self.name] = (
+            wall + time.perf_counter() - self.wall,
+            cpu + time.thread_time() - self.cpu
+        )
+
+
+class ConversionStatistics:
+    """
+    Size and timings of one conversion. Filled by `convert_to_xml` when it is passed
+    as `statistics`, and reset each time.
+
+    Other phases, eg writing the output, can be timed with `phase`:
+        with statistics.phase('serialize'):
+            text = convert_to_string(root)
+    """
+
+    def __init__(self) -> None:
+        self.elements: int = 0
+        """
+        Number of elements in the tree, including the root.
+        """
+        self.max_depth: int = 0
+        """
+        Depth of the deepest element. The root is at depth 0.
+        """
+        self.elements_per_processor: Counter[str] = Counter()
+        """
+        Number of elements made by each processor class. Elements copied from memoized
+        subtrees (`memoize_immutable_subtrees`) and references are not made by a processor.
+        """
+        self.attribute_bytes: int = 0
+        """
+        Size in UTF-8 of the names and values of the attributes, before escaping.
+        """
+        self.text_bytes: int = 0
+        """
+        Size in UTF-8 of the texts of the elements, before escaping.
+        """
+        self.cache_hits: Dict[str, int] = {}
+        """
+        Hits of `scalar_text_cache` and `shape_template_cache` during the conversion.
+        """
+        self.cache_misses: Dict[str, int] = {}
+        """
+        Misses of `scalar_text_cache` and `shape_template_cache` during the conversion.
+        """
+        self.phases: Dict[str, PhaseTimeTypeAlias] = {}
+        """
+        Wall time and CPU time of each phase: `begin` (reset of the state and root
+        element), `convert` (the processors), `measure` (the walk of the tree filling
+        these statistics) and any phase timed with `phase`.
+        """
+
+    def reset(self) -> None:
+        """
+        Clear the statistics.
+        """
+        self.__init__()  # type: ignore[misc]  # pylint: disable=C2801; unnecessary-dunder-call
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Returns:
+            _Phase: A context manager adding the time of its block to the phase `name`.
+        """
+        return _Phase(self, name)
+
+    def hit_rate(self, cache: str) -> Optional[float]:
+        """
+        Args:
+            cache (str): `scalar_text_cache` or `shape_template_cache`.
+
+        Returns:
+            Optional[float]: Hits divided by lookups, or None if the cache was not used.
+        """
+        hits = self.cache_hits.get(cache, 0)
+        lookups = hits + self.cache_misses.get(cache, 0)
+        return hits / lookups if lookups else None
+
+    def measure_conversion(
+        self,
+        processor_class: type[DataProcessorAbstractBaseClass],
+        config: ConfigTypeAlias,
+        data: Any,
+        attrib: OptionalXmlAttributesTypeAlias = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        """
+        Convert `data` like `convert_to_xml`, and fill the statistics.
+
+        Returns:
+            XmlElementTypeAlias: The root element.
+        """
+        self.reset()
+        caches = {name: getattr(config, name) for name in ('scalar_text_cache', 'shape_template_cache')}
+        before = {name: (cache.hits, cache.misses) for name, cache in caches.items()}
+        # Counted in this thread only: the processors, and the conversions of other
+        # threads, are left as they are.
+        processor_elements: Counter[type] = Counter()
+
+        def count(processor: DataProcessorAbstractBaseClass, element: XmlElementTypeAlias) -> None:  # pylint: disable=W0613;unused-argument
+            processor_elements[type(processor)] += 1
+
+        with self.phase('begin'):
+            root = processor_class._begin_conversion(config=config, attrib=attrib, **kwargs)  # pylint: disable=W0212; protected-access
+        with self.phase('convert'), ElementObservation(config, count):
+            processor_class._process(config=config, parent=root, data=data, child_name=None, **kwargs)  # pylint: disable=W0212; protected-access
+
+        with self.phase('measure'):
+            for processor_type, elements in processor_elements.items():
+                self.elements_per_processor[processor_type.__name__] += elements
+            for name, cache in caches.items():
+                hits, misses = before[name]
+                self.cache_hits[name] = cache.hits - hits
+                self.cache_misses[name] = cache.misses - misses
+            self._measure_tree(root)
+        return root
+
+    def _measure_tree(self, root: XmlElementTypeAlias) -> None:
+        """
+        Count the elements, depth and bytes of the tree.
+        """
+        attribute_bytes = 0
+        text_bytes = 0
+        elements = 0
+        max_depth = 0
+        stack: List[Tuple[XmlElementTypeAlias, int]] = [(root, 0)]
+        while stack:
+            element, depth = stack.pop()
+            elements += 1
+            max_depth = max(max_depth, depth)
+            for name, value in element.attributes.items():
+                attribute_bytes += len(name.encode('utf-8')) + len(value.encode('utf-8'))
+            text = element.text
+            if isinstance(text, str):
+                text_bytes += len(text.encode('utf-8'))
+            elif text is not None:
+                # Deferred binary text is ASCII.
+                text_bytes += len(text)
+            depth += 1
+            stack.extend((child, depth) for child in element.children)
+        self.elements = elements
+        self.max_depth = max_depth
+        self.attribute_bytes = attribute_bytes
+        self.text_bytes = text_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: The statistics.
+        """
+        return {
+            'elements': self.elements,
+            'max_depth': self.max_depth,
+            'elements_per_processor': dict(self.elements_per_processor),
+            'attribute_bytes': self.attribute_bytes,
+            'text_bytes': self.text_bytes,
+            'cache_hits': dict(self.cache_hits),
+            'cache_misses': dict(self.cache_misses),
+            'phases': {name: {'wall': wall, 'cpu': cpu} for name, (wall, cpu) in self.phases.items()},
+        }
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class StatisticsRegistry:
+    """
+    Totals of the statistics of many conversions, written in the Prometheus text
+    exposition format.
+
+    Example:
+        registry = StatisticsRegistry()
+        registry.serve(port=9464)
+        ...
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data, statistics=statistics)
+        registry.add(statistics)
+    """
+
+    def __init__(self, namespace: str = 'dict2xml') -> None:
+        """
+        Args:
+            namespace (str, optional): Prefix of the metric names. Defaults to 'dict2xml'.
+        """
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.conversions: int = 0
+        self.elements: int = 0
+        self.max_depth: int = 0
+        self.attribute_bytes: int = 0
+        self.text_bytes: int = 0
+        self.elements_per_processor: Counter[str] = Counter()
+        self.cache_hits: Counter[str] = Counter()
+        self.cache_misses: Counter[str] = Counter()
+        self.phase_wall_seconds: Dict[str, float] = {}
+        self.phase_cpu_seconds: Dict[str, float] = {}
+        self.elements_buckets: List[int] = [0] * len(ELEMENTS_BUCKETS)
+        """
+        Number of conversions with at most each of `ELEMENTS_BUCKETS` elements.
+        """
+
+    def add(self, statistics: ConversionStatistics) -> None:
+        """
+        Add the statistics of a conversion to the totals. Can be called from many threads.
+        """
+        with self._lock:
+            self.conversions += 1
+            self.elements += statistics.elements
+            self.max_depth = max(self.max_depth, statistics.max_depth)
+            self.attribute_bytes += statistics.attribute_bytes
+            self.text_bytes += statistics.text_bytes
+            self.elements_per_processor.update(statistics.elements_per_processor)
+            self.cache_hits.update(statistics.cache_hits)
+            self.cache_misses.update(statistics.cache_misses)
+            for name, (wall, cpu) in statistics.phases.items():
+                self.phase_wall_seconds[name] = self.phase_wall_seconds.get(name, 0.0) + wall
+                self.phase_cpu_seconds[name] = self.phase_cpu_seconds.get(name, 0.0) + cpu
+            for i, bound in enumerate(ELEMENTS_BUCKETS):
+                if statistics.elements <= bound:
+                    self.elements_buckets[i] += 1
+
+    def _metrics(self) -> Iterator[Tuple[str, str, str, List[Tuple[str, Any]]]]:
+        """
+        Yields:
+            Tuple[str, str, str, List[Tuple[str, Any]]]: Name, type, help and samples
+            (labels and value) of each metric.
+        """
+        yield 'conversions_total', 'counter', 'Number of conversions.', [('', self.conversions)]
+        yield 'elements_total', 'counter', 'Number of elements made.', [('', self.elements)]
+        yield 'max_depth', 'gauge', 'Depth of the deepest tree converted.', [('', self.max_depth)]
+        yield 'attribute_bytes_total', 'counter', 'UTF-8 bytes of the attribute names and values, before escaping.', [('', self.attribute_bytes)]
+        yield 'text_bytes_total', 'counter', 'UTF-8 bytes of the element texts, before escaping.', [('', self.text_bytes)]
+        yield 'processor_elements_total', 'counter', 'Number of elements made by each processor.', [
+            (f'processor="{_escape_label(name)}"', count) for name, count in sorted(self.elements_per_processor.items())
+        ]
+        yield 'cache_hits_total', 'counter', 'Hits of each cache.', [
+            (f'cache="{_escape_label(name)}"', count) for name, count in sorted(self.cache_hits.items())
+        ]
+        yield 'cache_misses_total', 'counter', 'Misses of each cache.', [
+            (f'cache="{_escape_label(name)}"', count) for name, count in sorted(self.cache_misses.items())
+        ]
+        yield 'phase_wall_seconds_total', 'counter', 'Wall time of each phase of the conversions.', [
+            (f'phase="{_escape_label(name)}"', seconds) for name, seconds in sorted(self.phase_wall_seconds.items())
+        ]
+        yield 'phase_cpu_seconds_total', 'counter', 'CPU time of each phase of the conversions.', [
+            (f'phase="{_escape_label(name)}"', seconds) for name, seconds in sorted(self.phase_cpu_seconds.items())
+        ]
+
+    def to_prometheus(self) -> str:
+        """
+        Returns:
+            str: The totals in the Prometheus text exposition format, version 0.0.4.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, metric_type, help_text, samples in self._metrics():
+                name = f'{self.namespace}_{name}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+            name = f'{self.namespace}_conversion_elements'
+            lines.append(f'# HELP {name} Number of elements per conversion.')
+            lines.append(f'# TYPE {name} histogram')
+            for bound, count in zip(ELEMENTS_BUCKETS, self.elements_buckets):
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {self.conversions}')
+            lines.append(f'{name}_sum {self.elements}')
+            lines.append(f'{name}_count {self.conversions}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str | os.PathLike[str]) -> None:
+        """
+        Write `to_prometheus()` to a file, eg for the textfile collector of the node
+        exporter. The file is replaced at once, readers never see a partial file.
+        """
+        temporary = f'{os.fspath(path)}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary, path)
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> Any:
+        """
+        Serve `to_prometheus()` at `/metrics` from a daemon thread.
+
+        Args:
+            host (str, optional): Address to listen on. Defaults to '127.0.0.1', local only.
+            port (int, optional): Port to listen on. Defaults to 0, any free port.
+
+        Returns:
+            Any: The `http.server.ThreadingHTTPServer`. Its `server_address` gives the
+            port, `shutdown()` stops it.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # pylint: disable=C0415; import-outside-toplevel
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # pylint: disable=C0103; invalid-name
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622; redefined-builtin
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -2,15 +2,19 @@
 Code to process and transform data into XML.
 """
 # pylint: disable=C0103; invalid-name
-from typing import Any, Final, Optional, override
+from typing import Any, Final, Iterable, List, Optional, Tuple, override
 import datetime as dt
 import re
-import inspect
+import types
 from libs.abstract_baseclasses import (
     DataProcessorAbstractBaseClass,
     DataProcessorReturnTypeAlias,
-    XmlElementTypeAlias
+    ElementTemplate,
+    XmlElementTypeAlias,
+    XmlTextTypeAlias
 )
+from libs.binary_text import BinaryText
+from libs.caches import is_cacheable_scalar
 from libs.misc import convert_windows_tz_name_to_iani_name
 
 
@@ -76,6 +80,11 @@ class DataProcessor_bool(DataProcessorAbstractBaseClass):
 class DataProcessor_binary(DataProcessorAbstractBaseClass):
     """
     Encode binary values.
+
+    Accepts any object supporting the buffer protocol (`bytes`, `bytearray`,
+    `memoryview`, `mmap.mmap`, ...) and open binary files. When the codec allows it,
+    the value is encoded in chunks taken directly from the buffer or file, so it
+    is never copied into a `bytes`. See `ConfigBaseClass.stream_binary`.
     """
 
     def _get_default_element_name(self, data: Any) -> str:
@@ -93,14 +102,23 @@ class DataProcessor_binary(DataProcessorAbstractBaseClass):
         current: XmlElementTypeAlias,
         data: Any,
         **kwargs: object
-    ) -> Optional[str]:
-        codec = self.config.codec_binary.codec
-        encoded_text, _ = codec.encode(data)
-        if encoded_text.isascii():
-            text = encoded_text.decode().strip()
-        else:
-            text = encoded_text.hex().strip()
-        return text
+    ) -> Optional[XmlTextTypeAlias]:
+        codec_binary = self.config.codec_binary
+        if codec_binary.slice_alignment is None:
+            # The codec needs the whole value in one call.
+            if self._classifier.is_binary_file(data):
+                data = data.read()
+            encoded_text, _ = codec_binary.codec.encode(data)
+            if encoded_text.isascii():
+                text = encoded_text.decode().strip()
+            else:
+                text = encoded_text.hex().strip()
+            return text
+
+        binary_text = BinaryText(data, codec_binary, self.config.binary_chunk_size)
+        if self.config.stream_binary and binary_text.is_repeatable:
+            return binary_text
+        return str(binary_text)
 
 
 class DataProcessor_calendar(DataProcessorAbstractBaseClass):
@@ -190,6 +208,10 @@ class DataProcessor_dict(DataProcessorAbstractBaseClass):
         child_name: Optional[str] = None,
         **kwargs: object
     ) -> None:
+        if self.config.use_shape_templates and not self.config.track_references:
+            self._process_with_shape_template(current=current, data=data)
+            return
+
         for k, v in data.items():
             self._process(
                 config=self.config,
@@ -198,6 +220,55 @@ class DataProcessor_dict(DataProcessorAbstractBaseClass):
                 child_name=str(k)
             )
 
+    def _process_with_shape_template(
+        self,
+        current: XmlElementTypeAlias,
+        data: Any
+    ) -> None:
+        """
+        Emit the values of `data` with the template cached for its shape, or convert
+        them normally and cache a template. See `use_shape_templates`.
+
+        Args:
+            current (XmlElementTypeAlias): Element of the dictionary.
+            data (Any): The dictionary.
+        """
+        config = self.config
+        # The types of the keys too: `1`, `1.0` and `True` are equal keys, with different names.
+        shape = (
+            tuple(data),
+            tuple(map(type, data)),
+            tuple(map(type, data.values())),
+            config.attr_flags if config.frozen is None else config.frozen
+        )
+        templates: Optional[List[Tuple[str, Optional[ElementTemplate]]]] = config.shape_template_cache.get(shape)
+        if templates is None:
+            templates = []
+            for k, v in data.items():
+                name = str(k)
+                e = self._process(config=config, parent=current, data=v, child_name=name)
+                assert e is not None
+                processor = self._locate_template_processor(config=config, data=v)
+                template = None if processor is None else processor._make_element_template(  # pylint: disable=W0212; protected-access
+                    parent=current,
+                    current=e,
+                    data=v,
+                    child_name=name
+                )
+                templates.append((name, template))
+            config.shape_template_cache.put(shape, templates)
+            return
+
+        for (name, template), v in zip(templates, data.values()):
+            if template is None:
+                self._process(config=config, parent=current, data=v, child_name=name)
+            else:
+                template.processor._try_converting_from_template(parent=current, data=v, template=template)  # pylint: disable=W0212; protected-access
+
+
+def _enum_value_to_text(data: Any) -> str:
+    return str(data.value)
+
 
 class DataProcessor_enum(DataProcessorAbstractBaseClass):
     """
@@ -224,6 +295,8 @@ class DataProcessor_enum(DataProcessorAbstractBaseClass):
         data: Any,
         **kwargs: object
     ) -> Optional[str]:
+        if is_cacheable_scalar(data.value):
+            return self.config.scalar_text_cache.get_text(data, _enum_value_to_text)
         return str(data.value)
 
 
@@ -309,6 +382,8 @@ class DataProcessor_numeric(DataProcessorAbstractBaseClass):
         data: Any,
         **kwargs: object
     ) -> Optional[str]:
+        if is_cacheable_scalar(data):
+            return self.config.scalar_text_cache.get_text(data, str)
         return str(data)
 
 
@@ -346,6 +421,143 @@ class DataProcessor_sequence(DataProcessorAbstractBaseClass):
                 child_name=self.config.override_child_item_label
             )
 
+    def _locate_uniform_item_processor(self, sample: Any) -> Optional[DataProcessorAbstractBaseClass]:
+        """
+        Find the processor that would encode `sample`, provided it is one whose
+        text is simply `str(item)`.
+
+        Args:
+            sample (Any): An item representative of every item in the sequence.
+
+        Returns:
+            Optional[DataProcessorAbstractBaseClass]: The processor, or None if a
+            processor with its own text formatting would be used, or if there are
+            custom pre-processors: they may accept some items of a type and not
+            others, so each item is dispatched.
+        """
+        if self.config.custom_pre_processors:
+            return None
+        for processor in self.config.default_processors:
+            if processor._is_expected_data_type(sample):  # pylint: disable=W0212; protected-access
+                if type(processor) in (DataProcessor_numeric, DataProcessor_str):  # pylint: disable=C0123; unidiomatic-typecheck
+                    return processor
+                return None
+        return None
+
+    def _process_uniform_items(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        texts: Iterable[str]
+    ) -> None:
+        """
+        Emit one child element per item of a sequence whose items all share one type.
+        The item processor is located once instead of once per item, and `texts`
+        supplies the already formatted text of each item.
+
+        Args:
+            parent (XmlElementTypeAlias): _description_
+            current (XmlElementTypeAlias): _description_
+            data (Any): Sequence supporting `len` and indexing.
+            texts (Iterable[str]): Text of each item, in the same order as `data`.
+        """
+        if len(data) == 0:
+            return
+        processor = self._locate_uniform_item_processor(data[0])
+        if processor is None:
+            DataProcessor_sequence._recursively_process_any_nested_objects(
+                self,
+                parent=parent,
+                current=current,
+                data=data
+            )
+            return
+        child_name = self.config.override_child_item_label
+        for item, text in zip(data, texts):
+            processor._try_converting_with_text(  # pylint: disable=W0212; protected-access
+                parent=current,
+                data=item,
+                text=text,
+                child_name=child_name
+            )
+
+
+class DataProcessor_array(DataProcessor_sequence):
+    """
+    Encode an `array.array` value.
+
+    Every item shares the type given by the typecode, so the items are formatted
+    in bulk without dispatching each one to a processor.
+    """
+
+    _UNICODE_TYPECODES: Final[str] = 'uw'
+
+    @override
+    def _is_expected_data_type(self, data: Any) -> bool:
+        return self._classifier.is_array(data)
+
+    @override
+    def _get_textual_representation_of_data(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        **kwargs: object
+    ) -> Optional[str]:
+        if not self.config.compact_array:
+            return None
+        if data.typecode in self._UNICODE_TYPECODES:
+            return ' '.join(data.tounicode())
+        return ' '.join(map(str, data))
+
+    @override
+    def _recursively_process_any_nested_objects(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        child_name: Optional[str] = None,
+        **kwargs: object
+    ) -> None:
+        if self.config.compact_array:
+            current.attributes['typecode'] = data.typecode
+            return
+        # Iterating the array reads its buffer directly, without making a copy.
+        texts = data if data.typecode in self._UNICODE_TYPECODES else map(str, data)
+        self._process_uniform_items(parent=parent, current=current, data=data, texts=texts)
+
+
+class DataProcessor_range(DataProcessor_sequence):
+    """
+    Encode a `range` value.
+
+    A range is fully described by its start, stop and step, so it is either emitted
+    compactly or expanded without dispatching each item to a processor.
+    """
+
+    @override
+    def _is_expected_data_type(self, data: Any) -> bool:
+        return self._classifier.is_range(data)
+
+    @override
+    def _recursively_process_any_nested_objects(
+        self,
+        parent: XmlElementTypeAlias,
+        current: XmlElementTypeAlias,
+        data: Any,
+        child_name: Optional[str] = None,
+        **kwargs: object
+    ) -> None:
+        if self.config.compact_range:
+            current.attributes |= {
+                'start': str(data.start),
+                'stop': str(data.stop),
+                'step': str(data.step),
+            }
+            return
+        self._process_uniform_items(parent=parent, current=current, data=data, texts=map(str, data))
+
 
 class DataProcessor_str(DataProcessorAbstractBaseClass):
     """
@@ -636,8 +848,12 @@ class DataProcessor_post_processor_for_classes(DataProcessorAbstractBaseClass):
         # can we iterate over its values?
         # Does it have a __dict__ we iterate over?
         return hasattr(data, '__dict__') and \
-            not inspect.isfunction(data) and \
-            not inspect.ismethod(data)
+            not isinstance(data, types.FunctionType | types.MethodType)
+
+    @override
+    def _is_reference_tracked(self, data: Any) -> bool:
+        # Objects are mutable, and may reference each other.
+        return True
 
     @override
     def _recursively_process_any_nested_objects(
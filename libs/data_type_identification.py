@@ -3,13 +3,23 @@ Code used to classify what type of data it is, so it can be
 converted to text.
 """
 import array
-import calendar
 from collections import ChainMap, abc, deque
 import enum
+import io
 import numbers
-from typing import Any
+import sys
+from typing import Any, Dict, Final, FrozenSet, Optional, Tuple
 import datetime as dt
-from zoneinfo import ZoneInfo
+
+
+IMMUTABLE_SCALAR_TYPES: Final[FrozenSet[type]] = frozenset({
+    type(None), bool, int, float, complex, str, bytes,
+    dt.date, dt.datetime, dt.time, dt.timedelta,
+})
+"""
+Exact types whose instances cannot change. Subclasses are excluded because they
+may add mutable state.
+"""
 
 
 class DataTypeIdentification:
@@ -18,6 +28,13 @@ class DataTypeIdentification:
     an unknown object.
     """
 
+    def is_array(self, data: Any) -> bool:
+        """
+        Returns:
+            bool: True if data is an instance of `array.array`. False otherwise.
+        """
+        return isinstance(data, array.array)
+
     def is_bytes(self, data: Any) -> bool:
         """
         Returns:
@@ -32,13 +49,35 @@ class DataTypeIdentification:
         """
         return isinstance(data, bytearray)
 
+    def is_buffer(self, data: Any) -> bool:
+        """
+        `array.array` also supports the buffer protocol, but it is a sequence of
+        typed items rather than binary data, so it is excluded.
+
+        Returns:
+            bool: True if data supports the buffer protocol, eg `memoryview` or `mmap.mmap`.
+            False otherwise.
+        """
+        return isinstance(data, abc.Buffer) and not self.is_array(data)
+
+    def is_binary_file(self, data: Any) -> bool:
+        """
+        Returns:
+            bool: True if data is a binary file object, eg returned by `open(name, 'rb')`.
+            False otherwise.
+        """
+        return isinstance(data, io.BufferedIOBase | io.RawIOBase)
+
     def is_binary(self, data: Any) -> bool:
         """
         Returns:
-            bool: True if data is an instance of `bytes` or `bytearray`. False otherwise.
+            bool: True if data is an instance of `bytes`, `bytearray`, any other
+            object supporting the buffer protocol or a binary file. False otherwise.
         """
         return self.is_bytes(data) \
-            or self.is_bytearray(data)
+            or self.is_bytearray(data) \
+            or self.is_buffer(data) \
+            or self.is_binary_file(data)
 
     def is_bool(self, data: Any) -> bool:
         """
@@ -52,7 +91,10 @@ class DataTypeIdentification:
         Returns:
             bool: True if data is an instance of `calendar`. False otherwise.
         """
-        return isinstance(data, calendar.Calendar)
+        # `calendar` is not imported here, to keep the import of this module cheap.
+        # Until it is imported elsewhere, no calendar can exist.
+        calendar = sys.modules.get('calendar')
+        return calendar is not None and isinstance(data, calendar.Calendar)
 
     def is_chainmap(self, data: Any) -> bool:
         """
@@ -61,6 +103,17 @@ class DataTypeIdentification:
         """
         return isinstance(data, ChainMap)
 
+    def is_container(self, data: Any) -> bool:
+        """
+        Returns:
+            bool: True if data holds other values: a collection (`dict`, `list`,
+            `tuple`, `set`, ...) or an iterator, but not text or binary data.
+            False otherwise.
+        """
+        return isinstance(data, abc.Collection | abc.Iterator) \
+            and not self.is_str(data) \
+            and not self.is_binary(data)
+
     def is_date(self, data: Any) -> bool:
         """
         Returns:
@@ -89,6 +142,43 @@ class DataTypeIdentification:
         """
         return isinstance(data, enum.Enum)
 
+    def is_immutable(self, data: Any) -> bool:
+        """
+        Returns:
+            bool: True if data is `None`, a `bool`, `int`, `float`, `complex`, `str`,
+            `bytes`, date, time, timedelta, an `enum` member, or a `tuple` (including
+            `NamedTuple`) or `frozenset` containing only such values. False otherwise.
+        """
+        if type(data) in IMMUTABLE_SCALAR_TYPES or isinstance(data, enum.Enum):
+            return True
+        return self.is_immutable_container(data)
+
+    def is_immutable_container(self, data: Any, known: Optional[Dict[int, Tuple[Any, bool]]] = None) -> bool:
+        """
+        Args:
+            data (Any): _description_
+            known (Optional[Dict[int, Tuple[Any, bool]]], optional): Results already
+                computed, keyed by the id of the container, and completed by this call.
+                Each nested container is then only scanned once. The container is kept
+                with its result so its id cannot be reused. Defaults to None.
+
+        Returns:
+            bool: True if data is a `tuple` (including `NamedTuple`) or `frozenset`
+            containing only immutable values, see `is_immutable`. False otherwise.
+        """
+        if not isinstance(data, tuple | frozenset):
+            return False
+        if known is None:
+            return all(self.is_immutable(item) for item in data)
+        entry = known.get(id(data))
+        if entry is None:
+            immutable = all(
+                self.is_immutable_container(item, known) if isinstance(item, tuple | frozenset) else self.is_immutable(item)
+                for item in data
+            )
+            entry = known[id(data)] = (data, immutable)
+        return entry[1]
+
     def is_namedtuple(self, data: Any) -> bool:
         """
         Returns:
@@ -120,6 +210,13 @@ class DataTypeIdentification:
             and str(type(data)) != "<class 'bool'>"  # type: ignore
         )
 
+    def is_range(self, data: Any) -> bool:
+        """
+        Returns:
+            bool: True if data is an instance of `range`. False otherwise.
+        """
+        return isinstance(data, range)
+
     def is_sequence(self, data: Any) -> bool:
         """
         Returns:
@@ -162,7 +259,9 @@ class DataTypeIdentification:
         Returns:
             bool: True if data is an instance of `ZoneInfo`. False otherwise.
         """
-        return isinstance(data, ZoneInfo)
+        # Same as `is_calendar`, `zoneinfo` is only loaded by whoever makes a `ZoneInfo`.
+        zoneinfo = sys.modules.get('zoneinfo')
+        return zoneinfo is not None and isinstance(data, zoneinfo.ZoneInfo)
 
     def is_tzinfo(self, data: Any) -> bool:
         """
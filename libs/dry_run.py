@@ -0,0 +1,268 @@
+"""
+Predict the size of the XML of some data before writing it, eg for a
+`Content-Length` header or to choose between in-memory and streamed output.
+
+`plan_output` runs the processors of a clone of the configuration on the data, and
+measures each element as soon as it is complete, with the escaping of the writer
+and the codec of the output. The descendants of measured elements are dropped, so
+the tree is never held whole and no XML text is built. The size is exactly the
+length of `convert_to_bytes` with the same arguments.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    ElementObservation,
+    OptionalXmlAttributesTypeAlias,
+    XmlElementTypeAlias
+)
+from libs.codec_wrapper import CodecWrapper
+from libs.profiling import active_profiler
+from libs.xml_element_wrapper_converters import ENCODINGS_WITHOUT_DECLARATION, write_xml_bytes
+from libs.xml_text import escape_attribute, escape_text
+
+MeasureTypeAlias = Tuple[int, int, int]
+"""
+Encoded length, number of elements and height of an element and its descendants.
+"""
+
+_ADDITIVITY_SAMPLES: Tuple[Tuple[str, str], ...] = (('a', 'b'), ('é', 'é'), ('a', '中'))
+
+
+class OutputPlan:
+    """
+    Size of the XML of some data.
+    """
+
+    def __init__(self, elements: int, max_depth: int, byte_length: int, pruned: bool) -> None:
+        self.elements = elements
+        """
+        Number of elements, including the root.
+        """
+        self.max_depth = max_depth
+        """
+        Depth of the deepest element. The root is at depth 0.
+        """
+        self.byte_length = byte_length
+        """
+        Length of the encoded XML, including the XML declaration if written.
+        """
+        self.pruned = pruned
+        """
+        True if the elements were dropped once measured. False if the whole tree was
+        built, then measured, see `plan_output`.
+        """
+
+    def __repr__(self) -> str:
+        return f'OutputPlan(elements={self.elements}, max_depth={self.max_depth}, byte_length={self.byte_length}, pruned={self.pruned})'
+
+
+class _CountingStream:
+    """
+    Binary stream only counting the bytes written to it.
+    """
+
+    def __init__(self) -> None:
+        self.length = 0
+
+    def write(self, data: bytes) -> int:
+        self.length += len(data)
+        return len(data)
+
+
+class _ElementMeasurer:
+    """
+    Encoded length of elements, computed with the rules of `_write_element`.
+    """
+
+    def __init__(self, codec: CodecWrapper, space: Optional[str]) -> None:
+        self._encode = codec.codec.encode
+        self.space = space
+        self.ascii_compatible = self._encode('<a b="&"/>\n', 'strict')[0] == b'<a b="&"/>\n'
+        self.measured: Dict[XmlElementTypeAlias, MeasureTypeAlias] = {}
+        """
+        Elements measured whose parent is not measured yet.
+        """
+        self._indentations: Dict[int, int] = {}
+
+    def is_additive(self) -> bool:
+        """
+        Returns:
+            bool: True if the length of encoded text is the sum of the lengths of its
+            parts: the codec writes no byte order mark and keeps no state.
+        """
+        for a, b in _ADDITIVITY_SAMPLES:
+            if self.length(a) + self.length(b) != self.length(a + b):
+                return False
+        return True
+
+    def length(self, text: str) -> int:
+        if self.ascii_compatible and text.isascii():
+            return len(text)
+        return len(self._encode(text, 'xmlcharrefreplace')[0])
+
+    def _indentation(self, level: int) -> int:
+        length = self._indentations.get(level)
+        if length is None:
+            assert self.space is not None
+            length = self._indentations[level] = self.length('\n' + self.space * level)
+        return length
+
+    @staticmethod
+    def _level(element: XmlElementTypeAlias) -> int:
+        level = 0
+        while element.parent is not None:
+            element = element.parent
+            level += 1
+        return level
+
+    def measure(self, element: XmlElementTypeAlias, level: Optional[int] = None) -> MeasureTypeAlias:
+        """
+        Measure `element`, using the measures of its children that are already measured.
+
+        Args:
+            element (XmlElementTypeAlias): _description_
+            level (Optional[int], optional): Depth of the element, only needed when
+                indenting. Defaults to None, found from its parents.
+
+        Returns:
+            MeasureTypeAlias: _description_
+        """
+        length = self.length
+        tag = element.tag
+        size = length('<' + tag)
+        for key, value in element.attributes.items():
+            size += length(f' {key}="{escape_attribute(value)}"')
+
+        children = element.children
+        text = element.text
+        space = self.space
+        if space is not None and children:
+            if level is None:
+                level = self._level(element)
+            if not text or (isinstance(text, str) and not text.strip()):
+                text = '\n' + space * (level + 1)
+
+        if not text and not children:
+            return size + length(' />'), 1, 0
+
+        size += length('>')
+        if isinstance(text, str):
+            size += length(escape_text(text))
+        elif text is not None:
+            for chunk in text:
+                size += length(escape_text(chunk))
+
+        elements = 1
+        height = 0
+        child_level = None if level is None else level + 1
+        measured = self.measured
+        for child in children:
+            child_measure = measured.pop(child, None)
+            if child_measure is None:
+                child_measure = self.measure(child, child_level)
+            size += child_measure[0]
+            elements += child_measure[1]
+            height = max(height, child_measure[2] + 1)
+        if space is not None and children:
+            assert level is not None
+            size += (len(children) - 1) * self._indentation(level + 1) + self._indentation(level)
+        return size + length('</' + tag + '>'), elements, height
+
+    def record(  # pylint: disable=W0613;unused-argument
+        self,
+        processor: DataProcessorAbstractBaseClass,
+        element: XmlElementTypeAlias
+    ) -> None:
+        """
+        Measure a complete element that has children, and drop its grandchildren.
+        Its children are kept until it is shared or not, which depends on them.
+        Leaves are measured with their parent, they may still be replaced by a
+        shared leaf.
+        """
+        children = element.children
+        if children:
+            self.measured[element] = self.measure(element)
+            for child in children:
+                child.children.clear()
+
+
+def _count(root: XmlElementTypeAlias) -> Tuple[int, int]:
+    """
+    Returns:
+        Tuple[int, int]: Number of elements and height of the tree.
+    """
+    elements = 0
+    height = 0
+    stack: List[Tuple[XmlElementTypeAlias, int]] = [(root, 0)]
+    while stack:
+        element, depth = stack.pop()
+        elements += 1
+        height = max(height, depth)
+        stack.extend((child, depth + 1) for child in element.children)
+    return elements, height
+
+
+def plan_output(
+    config: ConfigTypeAlias,
+    data: Any,
+    space: Optional[str] = None,
+    codec: Optional[CodecWrapper] = None,
+    xml_declaration: Optional[bool] = None,
+    attrib: OptionalXmlAttributesTypeAlias = None
+) -> OutputPlan:
+    """
+    Size of the XML of `data`, without writing it. The arguments are those of
+    `convert_to_xml` and `convert_to_bytes`.
+
+    The whole tree is built, then measured, when an element may still change once
+    complete (`track_references`), when complete elements are copied
+    (`memoize_immutable_subtrees`), when the configuration is profiled, since its
+    processors cannot be cloned then, or when the codec writes a byte order mark or
+    keeps state between writes (eg `utf-16`). Otherwise a clone of the configuration
+    is converted, `config` and its conversions are left as they are.
+
+    Binary files streamed with `stream_binary` are read, and must be able to seek
+    back to be written afterwards.
+
+    Args:
+        config (ConfigTypeAlias): _description_
+        data (Any): _description_
+        space (Optional[str], optional): Indentation per level. Defaults to None.
+        codec (Optional[CodecWrapper], optional): Output codec. Defaults to None,
+            `config.codec_text`.
+        xml_declaration (Optional[bool], optional): An XML declaration is written.
+            Defaults to None, only if the codec is not UTF-8.
+        attrib (OptionalXmlAttributesTypeAlias, optional): Attributes of the root. Defaults to None.
+
+    Returns:
+        OutputPlan: _description_
+    """
+    if codec is None:
+        codec = config.codec_text
+    measurer = _ElementMeasurer(codec, space)
+    if (
+        config.track_references
+        or config.memoize_immutable_subtrees
+        or active_profiler(config) is not None
+        or not measurer.is_additive()
+    ):
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data, attrib=attrib)
+        stream = _CountingStream()
+        write_xml_bytes(root, stream, space=space, codec=codec, xml_declaration=xml_declaration)  # type: ignore[arg-type]
+        elements, height = _count(root)
+        return OutputPlan(elements, height, stream.length, pruned=False)
+
+    # The elements are dropped from a private clone: conversions of `config` in other
+    # threads are not affected. The scalar texts only depend on the options, their
+    # cache is shared. The shape templates are made by the processors of `config`,
+    # the clone makes its own.
+    clone = config.clone(scalar_text_cache=config.scalar_text_cache)
+    with ElementObservation(clone, measurer.record):
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=clone, data=data, attrib=attrib)
+    size, elements, height = measurer.measure(root, 0)
+    measurer.measured.clear()
+    encoding = codec.codec.name
+    if xml_declaration or (xml_declaration is None and encoding not in ENCODINGS_WITHOUT_DECLARATION):
+        size += measurer.length(f"<?xml version='1.0' encoding='{encoding}'?>\n")
+    return OutputPlan(elements, height, size, pruned=True)
@@ -0,0 +1,219 @@
+"""
+Update a converted XML tree after its data has changed, rebuilding only the elements
+of the values that changed.
+
+The elements of a dictionary converted by `DataProcessor_dict` are in the order of
+its keys, one element per key. When the keys of a dictionary are unchanged, only the
+elements of the changed values are rebuilt. Otherwise the whole dictionary is rebuilt.
+Any other value is rebuilt as a whole.
+"""
+from collections.abc import Hashable
+from typing import Any, Iterable, List, Optional, Sequence
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    XmlElementTypeAlias
+)
+from libs.attributes import AttributeFlags
+from libs.data_processor import DataProcessor_dict
+
+
+def _has_one_element_per_key(config: ConfigTypeAlias, data: Any, element: XmlElementTypeAlias) -> bool:
+    """
+    Test whether the children of `element` are the elements of the values of `data`,
+    in the same order.
+
+    Args:
+        config (ConfigTypeAlias): _description_
+        data (Any): Value converted to `element`.
+        element (XmlElementTypeAlias): _description_
+
+    Returns:
+        bool: True if `data` is converted by `DataProcessor_dict` and `element` has
+        one child per key.
+    """
+    for processor in config.custom_pre_processors + config.default_processors:
+        if processor._is_expected_data_type(data):  # pylint: disable=W0212; protected-access
+            return isinstance(processor, DataProcessor_dict) and len(element.children) == len(data)
+    return False
+
+
+def _is_same_data(previous_data: Any, data: Any) -> bool:
+    """
+    Test whether `previous_data` and `data` are converted to the same elements: same
+    types at every level, and equal values. `==` alone is not enough, eg
+    `True == 1 == 1.0`, and the keys of equal dictionaries may be in another order.
+
+    Args:
+        previous_data (Any): _description_
+        data (Any): _description_
+
+    Returns:
+        bool: True if nothing needs to be rebuilt.
+    """
+    if previous_data is data:
+        return True
+    if type(previous_data) is not type(data):
+        return False
+    if isinstance(data, dict):
+        return len(previous_data) == len(data) and all(
+            _is_same_data(previous_key, key) and _is_same_data(previous_value, value)
+            for (previous_key, previous_value), (key, value) in zip(previous_data.items(), data.items())
+        )
+    if isinstance(data, (list, tuple, set, frozenset)):
+        # Items in the order they are converted.
+        return len(previous_data) == len(data) and all(map(_is_same_data, previous_data, data))
+    return bool(previous_data == data)
+
+
+def _element_path(element_tags: List[str]) -> str:
+    return '/'.join(element_tags)
+
+
+class _Rebuilder:
+    """
+    Rebuild elements in place and record their paths.
+    """
+
+    def __init__(self, config: ConfigTypeAlias) -> None:
+        self.config = config
+        self.changed: List[str] = []
+
+    def rebuild(
+        self,
+        parent: XmlElementTypeAlias,
+        index: int,
+        data: Any,
+        child_name: Optional[str],
+        parent_tags: List[str]
+    ) -> None:
+        """
+        Convert `data` again and put the new element in place of the child `index` of `parent`.
+        """
+        new = DataProcessorAbstractBaseClass._process(  # pylint: disable=W0212; protected-access
+            config=self.config,
+            parent=parent,
+            data=data,
+            child_name=child_name
+        )
+        assert new is not None and parent.children[-1] is new
+        parent.children.pop()
+        parent.children[index] = new
+        self.changed.append(_element_path(parent_tags + [new.tag]))
+
+    def diff(
+        self,
+        parent: XmlElementTypeAlias,
+        index: int,
+        previous_data: Any,
+        data: Any,
+        child_name: Optional[str],
+        parent_tags: List[str]
+    ) -> None:
+        """
+        Rebuild the elements of the values of `data` that differ from `previous_data`.
+        """
+        if _is_same_data(previous_data, data):
+            return
+        element = parent.children[index]
+        if (
+            not _has_one_element_per_key(self.config, data, element)
+            or not _has_one_element_per_key(self.config, previous_data, element)
+            or list(previous_data) != list(data)
+        ):
+            self.rebuild(parent, index, data, child_name, parent_tags)
+            return
+        tags = parent_tags + [element.tag]
+        for i, (key, value) in enumerate(data.items()):
+            self.diff(element, i, previous_data[key], value, str(key), tags)
+
+    def follow(
+        self,
+        root: XmlElementTypeAlias,
+        data: Any,
+        path: Sequence[Hashable]
+    ) -> None:
+        """
+        Rebuild the element of the value at `path`. If a dictionary on the way does
+        not have the expected elements, or does not have the key, it is rebuilt instead.
+        """
+        parent, index, child_name, tags = root, 0, None, [root.tag]
+        for key in path:
+            element = parent.children[index]
+            if not _has_one_element_per_key(self.config, data, element) or key not in data:
+                break
+            parent, index, child_name = element, list(data).index(key), str(key)
+            tags.append(element.tag)
+            data = data[key]
+        self.rebuild(parent, index, data, child_name, tags)
+
+
+def _renumber_sequential_ids(config: ConfigTypeAlias, root: XmlElementTypeAlias) -> None:
+    """
+    Number the `INC_SEQ_ID` attributes again in document order.
+    """
+    name = config.attr_flag_names[AttributeFlags.INC_SEQ_ID]
+    counter = 0
+    for element, _ in root.iter_with_parents():
+        counter += 1
+        element.attributes[name] = str(counter)
+    config.elements_sequential_counter = counter
+
+
+def reconvert_to_xml(
+    config: ConfigTypeAlias,
+    root: XmlElementTypeAlias,
+    data: Any,
+    previous_data: Any = None,
+    changed_paths: Optional[Iterable[Sequence[Hashable]]] = None
+) -> List[str]:
+    """
+    Update `root`, returned by `DataProcessorAbstractBaseClass.convert_to_xml`, in place
+    so it is the conversion of `data`.
+
+    The changes are either found by comparing `data` with `previous_data`, the data
+    `root` was converted from, or given by `changed_paths`. `previous_data` must not
+    be the same object as `data` modified in place, since it must hold the old values.
+
+    When `INC_SEQ_ID` is set, the sequential ids of the whole tree are numbered again.
+    `config.track_references` is not supported, the whole tree is rebuilt.
+
+    Args:
+        config (ConfigTypeAlias): The configuration `root` was converted with.
+        root (XmlElementTypeAlias): Root element to update.
+        data (Any): The new data.
+        previous_data (Any, optional): The data `root` was converted from. Used when
+            `changed_paths` is None. Defaults to None.
+        changed_paths (Optional[Iterable[Sequence[Hashable]]], optional): Key paths of
+            the values that changed, added or were removed, eg `[('server', 'port')]`.
+            Defaults to None, compare `data` with `previous_data`.
+
+    Returns:
+        List[str]: Path of each rebuilt element, tags separated by `/`, eg
+        `root/dict/server/port`.
+    """
+    config.subtree_memo.clear()
+    config.immutable_containers.clear()
+    config.leaf_elements.clear()
+    rebuilder = _Rebuilder(config)
+    try:
+        if config.track_references:
+            config.reference_elements.clear()
+            config.reference_id_counter = 0
+            rebuilder.rebuild(root, 0, data, None, [root.tag])
+        elif changed_paths is None:
+            rebuilder.diff(root, 0, previous_data, data, None, [root.tag])
+        else:
+            # Shorter paths first, so paths inside a rebuilt element can be skipped.
+            rebuilt: List[Sequence[Hashable]] = []
+            for path in sorted(changed_paths, key=len):
+                if any(tuple(path[:len(done)]) == tuple(done) for done in rebuilt):
+                    continue
+                rebuilder.follow(root, data, path)
+                rebuilt.append(path)
+
+        if rebuilder.changed and AttributeFlags.INC_SEQ_ID & config.attr_flags:
+            _renumber_sequential_ids(config, root)
+        return rebuilder.changed
+    finally:
+        DataProcessorAbstractBaseClass._end_conversion(config)  # pylint: disable=W0212; protected-access
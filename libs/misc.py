@@ -1,9 +1,8 @@
 """
 Miscellaneous helper functions.
 """
-import platform
-from typing import Any, Dict, Optional, cast
-import tzlocal
+import sys
+from typing import Any, Dict, Optional
 
 
 def coalesce(*values: Any) -> Optional[Any]:
@@ -18,7 +17,7 @@ def iswindows() -> bool:
     Returns:
         bool: True if running on Windows, otherwise False.
     """
-    return platform.system() == 'Windows'
+    return sys.platform == 'win32'
 
 
 def ismac() -> bool:
@@ -28,7 +27,7 @@ def ismac() -> bool:
     Returns:
         bool: True if running on Mac, otherwise False.
     """
-    return platform.system() == 'Darwin'
+    return sys.platform == 'darwin'
 
 
 def islinux() -> bool:
@@ -38,7 +37,7 @@ def islinux() -> bool:
     Returns:
         bool: True if running on Linux, otherwise False.
     """
-    return platform.system() == 'Linux'
+    return sys.platform.startswith('linux')
 
 
 def convert_windows_tz_name_to_iani_name(tzname: str) -> str:
@@ -54,7 +53,10 @@ def convert_windows_tz_name_to_iani_name(tzname: str) -> str:
     Returns:
         str: Returns the IANA timezone name.
     """
-    wintz: Dict[str, str] = cast(Dict[str, str], tzlocal.win32.win_tz)  # type: ignore
+    # The table of tzlocal is only loaded when a Windows time zone name is found.
+    # It is plain data, available on every platform.
+    from tzlocal.windows_tz import win_tz  # pylint: disable=C0415; import-outside-toplevel
+    wintz: Dict[str, str] = win_tz
     if tzname in wintz.values():
         # Nothing to do, the name is in the correct format
         return tzname
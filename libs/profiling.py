@@ -0,0 +1,318 @@
+"""
+Find which processors, attribute emitters and element names a slow conversion
+spends its time in.
+
+While a `ProcessorProfiler` is entered, the methods of the processors of its
+configuration are replaced by timed wrappers, set on the processor instances.
+While a profiler is entered, `XmlElementNameBaseClass._fix_invalid_xml_element_name`
+is also replaced, for the elements of all configurations: the elements of the
+configurations that are not profiled are not timed, but pay a lookup of their
+profiler. Everything is restored when the last profiler exits: conversions then
+run the same code as before, at the same speed.
+"""
+import time
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    DataProcessorReturnTypeAlias,
+    XmlAttributesTypeAlias,
+    XmlElementNameBaseClass,
+    XmlElementTypeAlias
+)
+
+ElementStartCallbackTypeAlias = Callable[[DataProcessorAbstractBaseClass, Any], None]
+"""
+Called with the processor and the value, when the processor accepts the value.
+"""
+
+ElementEndCallbackTypeAlias = Callable[[DataProcessorAbstractBaseClass, Any, XmlElementTypeAlias], None]
+"""
+Called with the processor, the value and its element, once the element and its
+descendants are complete.
+"""
+
+TIMED_METHODS: Final[Tuple[str, ...]] = (
+    '_is_expected_data_type',
+    '_get_textual_representation_of_data',
+    '_add_attributes',
+    '_add_template_attributes',
+)
+"""
+Methods of the processors whose calls are counted and timed.
+"""
+
+_WRAPPED_METHODS: Final[Tuple[str, ...]] = TIMED_METHODS + (
+    '_try_converting_add_attributes',
+    '_try_converting_from_template',
+)
+
+_ACTIVE: Dict[int, 'ProcessorProfiler'] = {}
+"""
+Entered profilers, by `id` of their configuration.
+"""
+
+_FIX_INVALID_XML_ELEMENT_NAME: Final = XmlElementNameBaseClass._fix_invalid_xml_element_name  # pylint: disable=W0212; protected-access
+
+
+def _profiled_fix_invalid_xml_element_name(
+    element: XmlElementNameBaseClass,
+    tag: str
+) -> Tuple[str, XmlAttributesTypeAlias]:
+    """
+    Replaces `XmlElementNameBaseClass._fix_invalid_xml_element_name` of all the
+    elements while a profiler is entered. Only the elements of profiled
+    configurations are timed.
+    """
+    profiler = _ACTIVE.get(id(element.config))
+    if profiler is None:
+        return _FIX_INVALID_XML_ELEMENT_NAME(element, tag)
+    start = time.perf_counter()
+    result = _FIX_INVALID_XML_ELEMENT_NAME(element, tag)
+    profiler.tag_fix_seconds += time.perf_counter() - start
+    profiler.tag_fixes += 1
+    if result[1]:
+        profiler.invalid_tags += 1
+    return result
+
+
+def active_profiler(config: ConfigTypeAlias) -> Optional['ProcessorProfiler']:
+    """
+    Returns:
+        Optional[ProcessorProfiler]: The profiler entered for `config`, if any.
+    """
+    return _ACTIVE.get(id(config))
+
+
+class ProcessorStats:
+    """
+    Counters of one processor.
+    """
+
+    def __init__(self) -> None:
+        self.tries: int = 0
+        """
+        Number of values offered to the processor by the dispatch.
+        """
+        self.elements: int = 0
+        """
+        Number of elements made by the processor, including those made from templates.
+        """
+        self.templated: int = 0
+        """
+        Number of elements made from shape templates, without dispatch.
+        """
+        self.calls: Dict[str, int] = dict.fromkeys(TIMED_METHODS, 0)
+        """
+        Number of calls of each of `TIMED_METHODS`.
+        """
+        self.seconds: Dict[str, float] = dict.fromkeys(TIMED_METHODS, 0.0)
+        """
+        Cumulative time in each of `TIMED_METHODS`.
+        """
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: The counters.
+        """
+        return {
+            'tries': self.tries,
+            'elements': self.elements,
+            'templated': self.templated,
+            'calls': dict(self.calls),
+            'seconds': dict(self.seconds),
+        }
+
+
+class ProcessorProfiler:
+    """
+    Context manager counting and timing the work of each processor of a configuration
+    during the conversions made in its `with` block.
+
+    Example:
+        with ProcessorProfiler(config) as profiler:
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)
+        print(profiler.report())
+
+    Do not clone or pickle the configuration in the block: the copies would keep
+    the wrappers. A configuration can only be profiled by one profiler at a time.
+    A profiler can be entered again, its counters then add up.
+    """
+
+    def __init__(
+        self,
+        config: ConfigTypeAlias,
+        on_element_start: Optional[ElementStartCallbackTypeAlias] = None,
+        on_element_end: Optional[ElementEndCallbackTypeAlias] = None
+    ) -> None:
+        """
+        Args:
+            config (ConfigTypeAlias): _description_
+            on_element_start (Optional[ElementStartCallbackTypeAlias], optional): Called
+                when a processor accepts a value, before its element is made. Processors
+                whose `_try_converting` does not call `_is_expected_data_type` only report
+                the start just before the end. Defaults to None.
+            on_element_end (Optional[ElementEndCallbackTypeAlias], optional): Called when
+                an element is complete. Defaults to None.
+        """
+        self.config = config
+        self.on_element_start = on_element_start
+        self.on_element_end = on_element_end
+        self.processors: Dict[DataProcessorAbstractBaseClass, ProcessorStats] = {}
+        """
+        Counters of each processor, in the order they are tried.
+        """
+        self.tag_fixes: int = 0
+        """
+        Number of element names checked by `_fix_invalid_xml_element_name`.
+        """
+        self.invalid_tags: int = 0
+        """
+        Number of element names that were replaced because they were not valid.
+        """
+        self.tag_fix_seconds: float = 0.0
+        """
+        Cumulative time in `_fix_invalid_xml_element_name`.
+        """
+        self._saved: List[Tuple[DataProcessorAbstractBaseClass, Dict[str, Any]]] = []
+        self._frames: List[List[Any]] = []
+
+    def __enter__(self) -> 'ProcessorProfiler':
+        if id(self.config) in _ACTIVE:
+            raise RuntimeError('The configuration is already profiled')
+        # A processor may be in several lists, it is only wrapped once.
+        for processor in dict.fromkeys(self.config._all_processors()):  # pylint: disable=W0212; protected-access
+            self._wrap(processor)
+        if not _ACTIVE:
+            XmlElementNameBaseClass._fix_invalid_xml_element_name = _profiled_fix_invalid_xml_element_name  # type: ignore[assignment]  # pylint: disable=W0212; protected-access
+        _ACTIVE[id(self.config)] = self
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        del _ACTIVE[id(self.config)]
+        if not _ACTIVE:
+            XmlElementNameBaseClass._fix_invalid_xml_element_name = _FIX_INVALID_XML_ELEMENT_NAME  # type: ignore[method-assign]  # pylint: disable=W0212; protected-access
+        for processor, saved in self._saved:
+            for name in _WRAPPED_METHODS:
+                processor.__dict__.pop(name, None)
+            processor.__dict__.update(saved)
+        self._saved.clear()
+        self._frames.clear()
+
+    def _wrap(self, processor: DataProcessorAbstractBaseClass) -> None:
+        """
+        Set the timed wrappers of the methods of `processor` on the instance. Its
+        counters are kept from a previous `with` block.
+        """
+        stats = self.processors.get(processor)
+        if stats is None:
+            stats = self.processors[processor] = ProcessorStats()
+        self._saved.append((processor, {name: processor.__dict__[name] for name in _WRAPPED_METHODS if name in processor.__dict__}))
+        frames = self._frames
+        perf_counter = time.perf_counter
+
+        def timed(name: str) -> Callable[..., Any]:
+            method = getattr(processor, name)
+            calls = stats.calls
+            seconds = stats.seconds
+
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    seconds[name] += perf_counter() - start
+                    calls[name] += 1
+            return wrapper
+
+        for name in TIMED_METHODS:
+            setattr(processor, name, timed(name))
+
+        is_expected_data_type = processor._is_expected_data_type  # pylint: disable=W0212; protected-access
+
+        def is_expected_data_type_start(data: Any) -> bool:
+            result = is_expected_data_type(data)
+            if result and frames:
+                frame = frames[-1]
+                if frame[0] is processor and frame[1] is data and not frame[2]:
+                    frame[2] = True
+                    if self.on_element_start is not None:
+                        self.on_element_start(processor, data)
+            return result
+        processor._is_expected_data_type = is_expected_data_type_start  # type: ignore[method-assign]  # pylint: disable=W0212; protected-access
+
+        try_converting_add_attributes = processor._try_converting_add_attributes  # pylint: disable=W0212; protected-access
+
+        def counted_try_converting_add_attributes(
+            parent: XmlElementTypeAlias,
+            data: Any,
+            child_name: Optional[str] = None,
+            **kwargs: object
+        ) -> DataProcessorReturnTypeAlias:
+            stats.tries += 1
+            frame = [processor, data, False]
+            frames.append(frame)
+            try:
+                e = try_converting_add_attributes(parent=parent, data=data, child_name=child_name, **kwargs)
+            finally:
+                frames.pop()
+            if e is not None:
+                stats.elements += 1
+                if not frame[2] and self.on_element_start is not None:
+                    self.on_element_start(processor, data)
+                if self.on_element_end is not None:
+                    self.on_element_end(processor, data, e)
+            return e
+        processor._try_converting_add_attributes = counted_try_converting_add_attributes  # type: ignore[method-assign]  # pylint: disable=W0212; protected-access
+
+        try_converting_from_template = processor._try_converting_from_template  # pylint: disable=W0212; protected-access
+
+        def counted_try_converting_from_template(*args: Any, **kwargs: Any) -> XmlElementTypeAlias:
+            data = kwargs['data'] if 'data' in kwargs else args[1]
+            if self.on_element_start is not None:
+                self.on_element_start(processor, data)
+            e = try_converting_from_template(*args, **kwargs)
+            stats.elements += 1
+            stats.templated += 1
+            if self.on_element_end is not None:
+                self.on_element_end(processor, data, e)
+            return e
+        processor._try_converting_from_template = counted_try_converting_from_template  # type: ignore[method-assign]  # pylint: disable=W0212; protected-access
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: The counters of each processor, by class name, and of the
+            element names.
+        """
+        processors: Dict[str, Any] = {}
+        for processor, stats in self.processors.items():
+            name = type(processor).__name__
+            if name in processors:
+                name = f'{name}#{id(processor):x}'
+            processors[name] = stats.to_dict()
+        return {
+            'processors': processors,
+            'tag_fixes': self.tag_fixes,
+            'invalid_tags': self.invalid_tags,
+            'tag_fix_seconds': self.tag_fix_seconds,
+        }
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: A table of the processors that were offered a value, the slowest
+            first, with their cumulative times in milliseconds.
+        """
+        columns = ('expected', 'text', 'attributes', 'template attrs')
+        lines = [f'{"processor":44} {"tries":>8} {"elements":>9} {"templated":>9} ' + ' '.join(f'{c:>14}' for c in columns)]
+        rows = [(processor, stats) for processor, stats in self.processors.items() if stats.tries or stats.elements]
+        rows.sort(key=lambda row: -sum(row[1].seconds.values()))
+        for processor, stats in rows:
+            lines.append(
+                f'{type(processor).__name__:44} {stats.tries:8} {stats.elements:9} {stats.templated:9} '
+                + ' '.join(f'{stats.seconds[name] * 1000:14.3f}' for name in TIMED_METHODS)
+            )
+        lines.append(f'tag fixing: {self.tag_fixes} names, {self.invalid_tags} invalid, {self.tag_fix_seconds * 1000:.3f} ms')
+        return '\n'.join(lines)
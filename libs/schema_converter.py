@@ -0,0 +1,350 @@
+"""
+Specialised converters for declared record types.
+
+When the type of the data is declared with a `TypedDict`, a `NamedTuple` or a
+dataclass, the processor, the element name and the static attributes of each field
+are known before any value is seen. `compile_converter` resolves them once and
+generates a Python function that emits the fields in order, without looking for
+a processor per value.
+
+The output is the same as `DataProcessorAbstractBaseClass.convert_to_xml`. Each
+value is checked against its declared type, and any value that does not conform
+is converted normally.
+"""
+import dataclasses
+import enum
+import inspect
+import types
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, override
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    ElementTemplate,
+    OptionalXmlAttributesTypeAlias,
+    XmlElementNameBaseClass,
+    XmlElementTypeAlias,
+    XmlTextTypeAlias
+)
+from libs.data_processor import (
+    DataProcessor_dict,
+    DataProcessor_namedtuple,
+    DataProcessor_post_processor_for_classes
+)
+
+ConverterTypeAlias = Callable[..., XmlElementTypeAlias]
+"""
+`converter(data, attrib=None)`, returns the root element.
+"""
+
+_SCALAR_SAMPLES: Dict[type, Any] = {
+    type(None): None,
+    bool: False,
+    int: 0,
+    float: 0.5,
+    complex: 0j,
+    str: '',
+    bytes: b'',
+}
+"""
+A sample value of each scalar type whose element only depends on the type.
+"""
+
+
+def _is_typeddict(annotation: Any) -> bool:
+    return typing.is_typeddict(annotation)
+
+
+def _is_namedtuple(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, tuple) and hasattr(annotation, '_fields')
+
+
+def _is_dataclass(annotation: Any) -> bool:
+    return isinstance(annotation, type) and dataclasses.is_dataclass(annotation)
+
+
+def _is_record(annotation: Any) -> bool:
+    return _is_typeddict(annotation) or _is_namedtuple(annotation) or _is_dataclass(annotation)
+
+
+def _alternatives(annotation: Any) -> Tuple[Any, ...]:
+    """
+    The types of a `Union` or `Optional`, or the annotation itself.
+    """
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        return typing.get_args(annotation)
+    if annotation is None:
+        return (type(None),)
+    return (annotation,)
+
+
+class _ScratchElement(XmlElementNameBaseClass):
+    """
+    Element the templates are made from. It is not part of any document.
+    """
+
+    @override
+    def create_child_element(
+        self,
+        config: ConfigTypeAlias,
+        tag: str,
+        text: Optional[XmlTextTypeAlias] = None,
+        attrib: OptionalXmlAttributesTypeAlias = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        return super().create_child_element(config, tag, text, attrib, **kwargs)
+
+
+class _ConverterCompiler:
+    """
+    Generate the source of the functions converting each record type, and the
+    namespace they run in.
+    """
+
+    def __init__(self, config: ConfigTypeAlias) -> None:
+        self.config = config
+        self.namespace: Dict[str, Any] = {
+            '_process': DataProcessorAbstractBaseClass._process,  # pylint: disable=W0212; protected-access
+            'config': config,
+        }
+        self.lines: List[str] = []
+        self.record_functions: Dict[Any, str] = {}
+        self.scratch_parent = _ScratchElement(config, 'scratch', None, None, None)
+        self.scratch_current = _ScratchElement(config, 'scratch', None, None, None)
+
+    def add_constant(self, value: Any) -> str:
+        """
+        Add `value` to the namespace of the generated code, and return its name.
+        """
+        name = f'_c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def make_template(
+        self,
+        data: Any,
+        child_name: Optional[str],
+        expected: Optional[Type[DataProcessorAbstractBaseClass]] = None
+    ) -> Optional[ElementTemplate]:
+        """
+        Make the template of the element of `data` named `child_name`.
+
+        Returns:
+            Optional[ElementTemplate]: None if the processor of `data` cannot emit from a
+            template, or is not an `expected` processor converting its values in the
+            same way, or if there are custom pre-processors: they may accept some values
+            of a type and not others, so the processor of a sample is not the one of
+            every value.
+        """
+        if self.config.custom_pre_processors:
+            return None
+        processor = DataProcessorAbstractBaseClass._locate_template_processor(  # pylint: disable=W0212; protected-access
+            config=self.config,
+            data=data
+        )
+        if processor is None:
+            return None
+        if expected is not None and not (
+            isinstance(processor, expected)
+            and type(processor)._recursively_process_any_nested_objects is expected._recursively_process_any_nested_objects  # pylint: disable=W0212; protected-access
+            and type(processor)._get_textual_representation_of_data  # pylint: disable=W0212; protected-access
+            is DataProcessorAbstractBaseClass._get_textual_representation_of_data  # pylint: disable=W0212; protected-access
+        ):
+            return None
+        return processor._make_element_template(  # pylint: disable=W0212; protected-access
+            parent=self.scratch_parent,
+            current=self.scratch_current,
+            data=data,
+            child_name=child_name
+        )
+
+    @staticmethod
+    def record_sample(annotation: Any) -> Tuple[Any, Type[DataProcessorAbstractBaseClass]]:
+        """
+        An instance of a record type, and the processor expected to convert it.
+        """
+        if _is_typeddict(annotation):
+            return {}, DataProcessor_dict
+        if _is_namedtuple(annotation):
+            return annotation._make([None] * len(annotation._fields)), DataProcessor_namedtuple
+        return object.__new__(annotation), DataProcessor_post_processor_for_classes
+
+    def record_template(self, annotation: Any, child_name: Optional[str]) -> Optional[ElementTemplate]:
+        """
+        Make the template of the element of a record, and generate its function.
+        """
+        sample, expected = self.record_sample(annotation)
+        template = self.make_template(sample, child_name, expected)
+        if template is not None:
+            self.record_function(annotation)
+        return template
+
+    def record_function(self, annotation: Any) -> str:
+        """
+        Generate the function converting a record type, once per type.
+
+        The function is `f(parent, data, template, child_name)`. A record that does not
+        conform to its type is converted with `_process`.
+        """
+        name = self.record_functions.get(annotation)
+        if name is not None:
+            return name
+        name = self.record_functions[annotation] = f'_record_{len(self.record_functions)}'
+
+        hints = typing.get_type_hints(annotation)
+        body: List[str] = []
+        if _is_typeddict(annotation):
+            keys = self.add_constant(tuple(hints))
+            body.append(f'if type(data) is not dict or tuple(data) != {keys}:')
+            fields = [(key, f'data[{key!r}]', hint, False) for key, hint in hints.items()]
+        elif _is_namedtuple(annotation):
+            body.append(f'if type(data) is not {self.add_constant(annotation)}:')
+            fields = [
+                (key, f'data[{i}]', hints.get(key, Any), False)
+                for i, key in enumerate(annotation._fields)
+            ]
+        else:
+            fields = self.dataclass_fields(annotation, hints, body)
+        body.append('    return _process(config=config, parent=parent, data=data, child_name=child_name)')
+        body.append('e = parent.create_child_element(config, template.tag, attrib=template.tag_attributes)')
+        for field_name, value, hint, may_be_callable in fields:
+            body.append(f'v = {value}')
+            body.extend(self.field_code(hint, field_name, may_be_callable))
+        body.append('return template.processor._add_template_attributes(parent=parent, current=e, data=data, template=template)')
+
+        self.lines.append(f'def {name}(parent, data, template, child_name):')
+        self.lines.extend('    ' + line for line in body)
+        self.lines.append('')
+        return name
+
+    def dataclass_fields(
+        self,
+        annotation: Any,
+        hints: Dict[str, Any],
+        body: List[str]
+    ) -> List[Tuple[str, str, Any, bool]]:
+        """
+        The attributes of a dataclass, in the order `DataProcessor_post_processor_for_classes`
+        converts them: the sorted names of `dir()` without the magic ones.
+        """
+        field_names = {field.name for field in dataclasses.fields(annotation)}
+        body.append(
+            f'if type(data) is not {self.add_constant(annotation)} '
+            f'or data.__dict__.keys() != {self.add_constant(frozenset(field_names))}:'
+        )
+        fields = []
+        for attr in sorted(set(dir(annotation)) | field_names):
+            if attr.startswith('__') and attr.endswith('__'):
+                continue
+            if attr not in field_names and inspect.isfunction(inspect.getattr_static(annotation, attr)):
+                # A method, skipped like any callable.
+                continue
+            hint = hints.get(attr, Any) if attr in field_names else Any
+            fields.append((attr, f'data.{attr}', hint, True))
+        return fields
+
+    def field_code(self, annotation: Any, child_name: str, may_be_callable: bool) -> List[str]:
+        """
+        Generate the code emitting the value `v` of a field annotated with `annotation`.
+        """
+        lines: List[str] = []
+        seen: set = set()
+        for alternative in _alternatives(annotation):
+            if alternative in _SCALAR_SAMPLES or (isinstance(alternative, type) and issubclass(alternative, enum.Enum)):
+                check = f'type(v) is {self.add_constant(alternative)}'
+                if isinstance(alternative, type) and issubclass(alternative, enum.Enum):
+                    members = list(alternative)
+                    if not members:
+                        continue
+                    template = self.make_template(members[0], child_name)
+                else:
+                    template = self.make_template(_SCALAR_SAMPLES[alternative], child_name)
+                if template is None or check in seen:
+                    continue
+                t = self.add_constant(template)
+                emit = f'{t}.processor._try_converting_from_template(e, v, {t})'
+            elif _is_record(alternative):
+                check = 'type(v) is dict' if _is_typeddict(alternative) else f'type(v) is {self.add_constant(alternative)}'
+                template = self.record_template(alternative, child_name)
+                if template is None or check in seen:
+                    continue
+                emit = f'{self.record_functions[alternative]}(e, v, {self.add_constant(template)}, {child_name!r})'
+            else:
+                continue
+            seen.add(check)
+            lines.append(f'{"elif" if lines else "if"} {check}:')
+            lines.append(f'    {emit}')
+
+        generic = f'_process(config=config, parent=e, data=v, child_name={child_name!r})'
+        if may_be_callable:
+            generic = f'if not callable(v): {generic}'
+        if not lines:
+            return [generic]
+        return lines + ['else:', f'    {generic}']
+
+
+def compile_converter(annotation: Any, config: ConfigTypeAlias) -> ConverterTypeAlias:
+    """
+    Generate a converter specialised for records of type `annotation`, a `TypedDict`,
+    a `NamedTuple` or a dataclass. The processors, the element names and the static
+    attributes of the record and of its fields are resolved once.
+
+    Fields annotated with `None`, `bool`, `int`, `float`, `complex`, `str`, `bytes`,
+    an enum, another record type, or a `Union` of those, are emitted directly. Any
+    other field, and any value that does not conform to its declared type, is
+    converted with `_process`. A `TypedDict` conforms when its keys are the declared
+    ones in the declared order. Dataclasses with `__slots__` are not supported.
+
+    The converter returns the same tree as `DataProcessorAbstractBaseClass.convert_to_xml`.
+    It falls back to `convert_to_xml` when `config.track_references` is set, when
+    `config.attr_flags` changed since the converter was generated, or when `config`
+    has custom pre-processors, which may depend on the values. Generate it again
+    after changing the labels, codecs or processors of `config`.
+
+    Args:
+        annotation (Any): The record type.
+        config (ConfigTypeAlias): _description_
+
+    Raises:
+        TypeError: `annotation` is not a supported record type.
+
+    Returns:
+        ConverterTypeAlias: `converter(data, attrib=None)`, returns the root element.
+    """
+    if not _is_record(annotation):
+        raise TypeError(f'Expected a TypedDict, a NamedTuple or a dataclass, not {annotation!r}')
+    if _is_dataclass(annotation) and '__slots__' in vars(annotation):
+        raise TypeError(f'Dataclasses with __slots__ are not supported: {annotation!r}')
+
+    # Making the templates must not change the state of the conversion in progress.
+    counter = config.elements_sequential_counter
+    try:
+        compiler = _ConverterCompiler(config)
+        root_template = compiler.record_template(annotation, None)
+    finally:
+        config.elements_sequential_counter = counter
+    if root_template is None:
+        # The record is converted by a processor that does not emit from templates.
+        compiler.lines.clear()
+        compiler.record_functions.clear()
+
+    exec('\n'.join(compiler.lines), compiler.namespace)  # pylint: disable=W0122; exec-used
+    record = compiler.namespace[compiler.record_functions[annotation]] if root_template is not None else None
+    attr_flags = config.attr_flags
+    convert_to_xml = DataProcessorAbstractBaseClass.convert_to_xml
+    begin_conversion = DataProcessorAbstractBaseClass._begin_conversion  # pylint: disable=W0212; protected-access
+    end_conversion = DataProcessorAbstractBaseClass._end_conversion  # pylint: disable=W0212; protected-access
+
+    def converter(data: Any, attrib: OptionalXmlAttributesTypeAlias = None) -> XmlElementTypeAlias:
+        if record is None or config.track_references or config.attr_flags != attr_flags:
+            return convert_to_xml(config=config, data=data, attrib=attrib)
+        root = begin_conversion(config=config, attrib=attrib)
+        try:
+            record(root, data, root_template, None)
+        finally:
+            end_conversion(config)
+        return root
+
+    converter.__doc__ = f'Convert a {getattr(annotation, "__name__", annotation)} to XML.'
+    converter.source = '\n'.join(compiler.lines)  # type: ignore[attr-defined]
+    return converter
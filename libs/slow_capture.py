@@ -0,0 +1,271 @@
+"""
+Capture the shape of the data of the conversions that are over budget, without
+their values, so the outliers can be reproduced and optimised offline.
+
+Set `config.slow_conversion_capture` to a `SlowConversionCapture`. Each conversion
+over its time or element budget writes one JSON line to a rotating file: the
+histogram of the key paths, the depth, the largest sequences, the types of the
+values and the processors converting them. Values are never written, and keys are
+replaced by their type, except the key names listed in `allowed_keys`.
+"""
+import datetime as dt
+import json
+import logging
+import logging.handlers
+import os
+import re
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, AbstractSet, Any, Dict, Final, Iterable, List, Optional, Tuple
+from libs.abstract_baseclasses import (
+    ConfigTypeAlias,
+    DataProcessorAbstractBaseClass,
+    OptionalXmlAttributesTypeAlias,
+    XmlElementTypeAlias
+)
+
+if TYPE_CHECKING:
+    from libs.conversion_statistics import ConversionStatistics
+
+_SAFE_KEY: Final[re.Pattern[str]] = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]{0,63}')
+"""
+Keys written as they are when not redacting. Other keys, eg containing spaces, `@`
+or digits first, may be data and are replaced by `<str>`. Keys looking like names
+may still be data, eg user names, hence the redaction by default.
+"""
+
+_SEQUENCE_TYPES: Final = (list, tuple, set, frozenset)
+
+
+def _key_segment(key: Any, redact_keys: bool, allowed_keys: AbstractSet[str]) -> str:
+    if isinstance(key, str) and (key in allowed_keys or (not redact_keys and _SAFE_KEY.fullmatch(key) is not None)):
+        return key
+    return f'<{type(key).__name__}>'
+
+
+def shape_summary(
+    config: ConfigTypeAlias,
+    data: Any,
+    redact_keys: bool = True,
+    allowed_keys: Iterable[str] = (),
+    max_values: int = 1_000_000,
+    top: int = 20
+) -> Dict[str, Any]:
+    """
+    Summarize the shape of `data`, without its values.
+
+    Paths start at `$` and join the keys of dictionaries, and the attributes of class
+    instances, with `.`. Items of lists, tuples and sets are `[]`, eg `$.orders[].id`.
+    A container seen again (shared or recursive) is not walked again. The processor
+    of each value is the one selected for the first value of its type.
+
+    Args:
+        config (ConfigTypeAlias): Configuration whose processors are recorded.
+        data (Any): _description_
+        redact_keys (bool, optional): Replace every key by its type. Defaults to True.
+            If False, only the keys that do not look like names, see `_SAFE_KEY`.
+        allowed_keys (Iterable[str], optional): Keys written as they are, eg the
+            field names of a schema. Defaults to none.
+        max_values (int, optional): Number of values walked, at most. Defaults to 1_000_000.
+        top (int, optional): Number of paths, sequences, types and processors kept. Defaults to 20.
+
+    Returns:
+        Dict[str, Any]: `values`, `max_depth`, `truncated`, the most frequent `paths`,
+        `types` and `processors`, and the `largest_sequences`.
+    """
+    processors = config._all_processors()  # pylint: disable=W0212; protected-access
+    allowed = frozenset(allowed_keys)
+    processor_names: Dict[type, str] = {}
+    paths: Counter[str] = Counter()
+    types: Counter[str] = Counter()
+    processor_counts: Counter[str] = Counter()
+    sequences: List[Tuple[int, str]] = []
+    seen = set()
+    max_depth = 0
+    values = 0
+    stack: List[Tuple[Any, str, int]] = [(data, '$', 0)]
+    while stack and values < max_values:
+        value, path, depth = stack.pop()
+        values += 1
+        max_depth = max(max_depth, depth)
+        paths[path] += 1
+        value_type = type(value)
+        types[value_type.__name__] += 1
+        # The processor `_locate_appropriate_data_processor` selects for this type.
+        name = processor_names.get(value_type)
+        if name is None:
+            name = processor_names[value_type] = next(
+                (type(processor).__name__ for processor in processors if processor._is_expected_data_type(value)),  # pylint: disable=W0212; protected-access
+                '-'
+            )
+        processor_counts[name] += 1
+
+        items: List[Tuple[str, Any]]
+        if isinstance(value, dict):
+            items = [(f'{path}.{_key_segment(key, redact_keys, allowed)}', item) for key, item in value.items()]
+        elif isinstance(value, _SEQUENCE_TYPES):
+            sequences.append((len(value), path))
+            items = [(path + '[]', item) for item in value]
+        elif hasattr(value, '__dict__') and not isinstance(value, type) and value_type.__module__ != 'builtins':
+            items = [(f'{path}.{_key_segment(key, redact_keys, allowed)}', item) for key, item in vars(value).items()]
+        else:
+            continue
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        depth += 1
+        stack.extend((item, child_path, depth) for child_path, item in reversed(items))
+
+    sequences.sort(key=lambda sequence: -sequence[0])
+    return {
+        'values': values,
+        'truncated': bool(stack),
+        'max_depth': max_depth,
+        'paths': dict(paths.most_common(top)),
+        'distinct_paths': len(paths),
+        'largest_sequences': [{'path': path, 'length': length} for length, path in sequences[:top]],
+        'types': dict(types.most_common(top)),
+        'processors': dict(processor_counts.most_common(top)),
+    }
+
+
+class SlowConversionCapture:
+    """
+    Time each conversion of a configuration, and write the shape summary of the data
+    of those over budget as a JSON line, to a file rotated by size.
+
+    Example:
+        config.slow_conversion_capture = SlowConversionCapture('slow.jsonl', max_seconds=1.0)
+    """
+
+    def __init__(
+        self,
+        path: Optional[str | os.PathLike[str]] = None,
+        max_seconds: Optional[float] = 1.0,
+        max_elements: Optional[int] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        handler: Optional[logging.Handler] = None,
+        redact_keys: bool = True,
+        allowed_keys: Iterable[str] = (),
+        max_values: int = 1_000_000,
+        top: int = 20
+    ) -> None:
+        """
+        Args:
+            path (Optional[str | os.PathLike[str]], optional): File receiving the captures.
+                Defaults to None, `handler` must be given.
+            max_seconds (Optional[float], optional): Time budget of a conversion. Defaults to 1.0.
+            max_elements (Optional[int], optional): Element budget of a conversion. Defaults
+                to None, unlimited.
+            max_bytes (int, optional): Size at which the file is rotated. Defaults to 10 MiB.
+            backup_count (int, optional): Number of rotated files kept. Defaults to 5.
+            handler (Optional[logging.Handler], optional): Handler receiving the captures,
+                as log records whose message is the JSON line, instead of `path`.
+                Defaults to None.
+            redact_keys (bool, optional): See `shape_summary`. Defaults to True.
+            allowed_keys (Iterable[str], optional): See `shape_summary`. Defaults to none.
+            max_values (int, optional): See `shape_summary`. Defaults to 1_000_000.
+            top (int, optional): See `shape_summary`. Defaults to 20.
+
+        Raises:
+            ValueError: Neither `path` nor `handler` is given.
+        """
+        if handler is None:
+            if path is None:
+                raise ValueError('Either path or handler must be given')
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+        self.handler = handler
+        self.max_seconds = max_seconds
+        self.max_elements = max_elements
+        self.redact_keys = redact_keys
+        self.allowed_keys = frozenset(allowed_keys)
+        self.max_values = max_values
+        self.top = top
+        self.captures: int = 0
+        """
+        Number of conversions captured.
+        """
+
+    def is_over_budget(self, seconds: float, elements: int) -> bool:
+        """
+        Returns:
+            bool: True if a conversion of this duration and size is captured.
+        """
+        return (
+            (self.max_seconds is not None and seconds > self.max_seconds)
+            or (self.max_elements is not None and elements > self.max_elements)
+        )
+
+    def measure_conversion(
+        self,
+        processor_class: type[DataProcessorAbstractBaseClass],
+        config: ConfigTypeAlias,
+        data: Any,
+        attrib: OptionalXmlAttributesTypeAlias = None,
+        statistics: Optional['ConversionStatistics'] = None,
+        **kwargs: object
+    ) -> XmlElementTypeAlias:
+        """
+        Convert `data` like `convert_to_xml`, and capture it if over budget.
+
+        Returns:
+            XmlElementTypeAlias: The root element.
+        """
+        start = time.perf_counter()
+        if statistics is not None:
+            root = statistics.measure_conversion(processor_class, config=config, data=data, attrib=attrib, **kwargs)
+        else:
+            root = processor_class._begin_conversion(config=config, attrib=attrib, **kwargs)  # pylint: disable=W0212; protected-access
+            processor_class._process(config=config, parent=root, data=data, child_name=None, **kwargs)  # pylint: disable=W0212; protected-access
+        seconds = time.perf_counter() - start
+        elements = config.elements_sequential_counter
+        if self.is_over_budget(seconds, elements):
+            self.capture(config, data, seconds, elements)
+        return root
+
+    def capture(self, config: ConfigTypeAlias, data: Any, seconds: float, elements: int) -> Dict[str, Any]:
+        """
+        Write the shape summary of `data`.
+
+        Args:
+            config (ConfigTypeAlias): _description_
+            data (Any): _description_
+            seconds (float): Duration of the conversion.
+            elements (int): Number of elements made.
+
+        Returns:
+            Dict[str, Any]: The record written.
+        """
+        record = {
+            'time': dt.datetime.now(dt.timezone.utc).isoformat(timespec='seconds'),
+            'seconds': round(seconds, 6),
+            'elements': elements,
+            'max_seconds': self.max_seconds,
+            'max_elements': self.max_elements,
+        }
+        record |= shape_summary(
+            config,
+            data,
+            redact_keys=self.redact_keys,
+            allowed_keys=self.allowed_keys,
+            max_values=self.max_values,
+            top=self.top
+        )
+        self.handler.handle(logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': json.dumps(record, separators=(',', ':')),
+        }))
+        self.captures += 1
+        return record
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self.handler.close()
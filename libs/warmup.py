@@ -0,0 +1,257 @@
+"""
+Warm up a configuration before it serves its first conversions.
+
+The first conversions with a configuration are slower: the shape templates, the
+texts of repeated scalars and the configuration snapshot are built on first use.
+`warm` converts representative data to fill them, and returns a `ConversionProfile`
+of the types and dictionary shapes it saw. The profile can be saved to a JSON file
+and used to warm a new configuration at startup, without the data.
+"""
+import enum
+import importlib
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from libs.abstract_baseclasses import ConfigTypeAlias, DataProcessorAbstractBaseClass
+
+ShapeTypeAlias = Tuple[Tuple[Any, ...], Tuple[type, ...]]
+"""
+Keys of a dictionary, and the exact types of its values.
+"""
+
+_JSON_KEY_TYPES: Tuple[type, ...] = (str, int, float, bool, type(None))
+
+_SAMPLE_TYPES: Tuple[type, ...] = (
+    type(None), bool, int, float, complex, str, bytes, bytearray, dict, list, tuple, set, frozenset
+)
+"""
+Types whose instances made without arguments are converted like any other instance.
+"""
+
+
+def _type_name(value_type: type) -> str:
+    return f'{value_type.__module__}:{value_type.__qualname__}'
+
+
+def _resolve_type(name: str) -> Optional[type]:
+    """
+    The type named `module:qualname`, importing its module. None if it cannot be found.
+    """
+    if name == _type_name(type(None)):
+        # Not an attribute of `builtins`.
+        return type(None)
+    module_name, _, qualname = name.partition(':')
+    try:
+        value: Any = importlib.import_module(module_name)
+        for attr in qualname.split('.'):
+            value = getattr(value, attr)
+    except (ImportError, AttributeError):
+        return None
+    return value if isinstance(value, type) else None
+
+
+def _sample(value_type: type) -> Tuple[bool, Any]:
+    """
+    A value of type `value_type` to convert in place of real data.
+
+    Returns:
+        Tuple[bool, Any]: False if no such value can be made safely.
+    """
+    if issubclass(value_type, enum.Enum):
+        members = list(value_type)
+        return (True, members[0]) if members else (False, None)
+    if value_type in _SAMPLE_TYPES:
+        return True, value_type()
+    return False, None
+
+
+class ConversionProfile:
+    """
+    Counts of the exact types of the values, and of the shapes of the dictionaries,
+    seen in the data given to `warm`.
+    """
+
+    VERSION: int = 1
+    """
+    Version of the file format of `save` and `load`.
+    """
+
+    def __init__(self) -> None:
+        self.types: Counter[type] = Counter()
+        """
+        Number of values of each exact type.
+        """
+        self.shapes: Counter[ShapeTypeAlias] = Counter()
+        """
+        Number of dictionaries of each shape. Only dictionaries whose keys are
+        strings, numbers, booleans or None are counted.
+        """
+
+    def record(self, data: Any) -> None:
+        """
+        Count the types and shapes of `data` and of the values nested in its
+        dictionaries, lists, tuples and sets.
+
+        Args:
+            data (Any): _description_
+        """
+        seen = set()
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            value_type = type(value)
+            self.types[value_type] += 1
+            if isinstance(value, dict | list | tuple | set | frozenset):
+                if id(value) in seen:
+                    continue
+                seen.add(id(value))
+                if isinstance(value, dict):
+                    values = list(value.values())
+                    if all(type(key) in _JSON_KEY_TYPES for key in value):
+                        self.shapes[(tuple(value), tuple(map(type, values)))] += 1
+                    stack.extend(reversed(values))
+                else:
+                    stack.extend(value)
+
+    def merge(self, other: 'ConversionProfile') -> None:
+        """
+        Add the counts of `other` to this profile.
+        """
+        self.types.update(other.types)
+        self.shapes.update(other.shapes)
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: The profile as JSON data. Types are named `module:qualname`,
+            the most frequent types and shapes come first.
+        """
+        return {
+            'version': self.VERSION,
+            'types': {_type_name(value_type): count for value_type, count in self.types.most_common()},
+            'shapes': [
+                {'keys': list(keys), 'types': [_type_name(value_type) for value_type in value_types], 'count': count}
+                for (keys, value_types), count in self.shapes.most_common()
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'ConversionProfile':
+        """
+        Rebuild a profile from `to_json()`. The modules of the types are imported.
+        Types that cannot be found, and the shapes using them, are dropped.
+
+        Args:
+            data (Dict[str, Any]): _description_
+
+        Raises:
+            ValueError: `data` is not a profile of a supported version.
+
+        Returns:
+            ConversionProfile: _description_
+        """
+        if not isinstance(data, dict) or data.get('version') != cls.VERSION:
+            raise ValueError(f'Not a conversion profile of version {cls.VERSION}')
+        profile = cls()
+        types: Dict[str, Optional[type]] = {}
+
+        def resolve(name: str) -> Optional[type]:
+            if name not in types:
+                types[name] = _resolve_type(name)
+            return types[name]
+
+        for name, count in data['types'].items():
+            value_type = resolve(name)
+            if value_type is not None:
+                profile.types[value_type] += count
+        for shape in data['shapes']:
+            value_types = [resolve(name) for name in shape['types']]
+            if None not in value_types and len(value_types) == len(shape['keys']):
+                profile.shapes[(tuple(shape['keys']), tuple(value_types))] += shape['count']  # type: ignore[arg-type]
+        return profile
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """
+        Write the profile to a JSON file.
+        """
+        import json  # pylint: disable=C0415; import-outside-toplevel
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> 'ConversionProfile':
+        """
+        Read a profile written by `save`. Only load profiles you trust, since the
+        modules of their types are imported.
+        """
+        import json  # pylint: disable=C0415; import-outside-toplevel
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+    def samples(self, max_shapes: Optional[int] = None) -> List[Any]:
+        """
+        Data made up to follow the profile: one dictionary per shape, the most
+        frequent first, and a list holding a value of each type. Values of types
+        that cannot be made without real data are left out, and so are the shapes
+        using them.
+
+        Args:
+            max_shapes (Optional[int], optional): Maximum number of shapes. Defaults to None, all.
+
+        Returns:
+            List[Any]: _description_
+        """
+        made: Dict[type, Tuple[bool, Any]] = {}
+
+        def sample(value_type: type) -> Tuple[bool, Any]:
+            if value_type not in made:
+                made[value_type] = _sample(value_type)
+            return made[value_type]
+
+        samples: List[Any] = []
+        for keys, value_types in [shape for shape, _ in self.shapes.most_common(max_shapes)]:
+            values = [sample(value_type) for value_type in value_types]
+            if all(ok for ok, _ in values):
+                samples.append(dict(zip(keys, (value for _, value in values))))
+        samples.append([value for ok, value in map(sample, self.types) if ok])
+        return samples
+
+
+def warm(
+    config: ConfigTypeAlias,
+    samples: Iterable[Any] = (),
+    profile: Optional[ConversionProfile] = None
+) -> ConversionProfile:
+    """
+    Convert `samples`, and data made up from `profile`, with `config` and discard the
+    output. This fills `config.shape_template_cache` (when `use_shape_templates` is
+    True), `config.scalar_text_cache` and `config.frozen` (when the configuration is
+    frozen), and runs the code of each processor used.
+
+    Call it once the configuration is set up: the shape templates depend on the
+    labels, attribute flags, codecs and processors.
+
+    Args:
+        config (ConfigTypeAlias): _description_
+        samples (Iterable[Any], optional): Representative data. Defaults to ().
+        profile (Optional[ConversionProfile], optional): A profile returned by an earlier
+            call, eg loaded with `ConversionProfile.load` at startup. Its most frequent
+            shapes are converted, up to the size of `config.shape_template_cache`.
+            Defaults to None.
+
+    Returns:
+        ConversionProfile: The profile of `samples`, merged with `profile`.
+    """
+    learned = ConversionProfile()
+    data: List[Any] = []
+    if profile is not None:
+        learned.merge(profile)
+        # The least frequent shapes first, so they are dropped first from a full cache.
+        data.extend(reversed(profile.samples(config.shape_template_cache.max_size)))
+    for sample in samples:
+        learned.record(sample)
+        data.append(sample)
+
+    for sample in data:
+        DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=sample)
+    return learned
@@ -1,11 +1,28 @@
 """
-Given an XML element wrapper, convert it to an XML tree.
+Given an XML element wrapper, convert it to an XML tree or write it as XML text.
 """
-from typing import Optional
+import io
+from typing import BinaryIO, Callable, Final, List, Optional, TextIO
 import xml.etree.ElementTree as ET
 from libs.abstract_baseclasses import (
     XmlElementTypeAlias
 )
+from libs.codec_wrapper import CodecWrapper
+from libs.xml_text import escape_attribute, escape_text
+
+
+WRITE_BATCH_SIZE: Final[int] = 4096
+"""
+Number of text pieces collected before they are encoded and written to a binary
+stream. Keeps the number of encoder and stream calls low, while never holding
+more than a small part of the document.
+"""
+
+ENCODINGS_WITHOUT_DECLARATION: Final[frozenset[str]] = frozenset({'utf-8', 'us-ascii'})
+"""
+Official codec names for which an XML declaration is not needed by default.
+Same as `xml.etree.ElementTree`.
+"""
 
 
 def convert_to_etree(
@@ -26,9 +43,172 @@ def convert_to_etree(
         parent = ET.Element(xml_wrapper.tag, xml_wrapper.attributes)
     else:
         parent = ET.SubElement(parent, xml_wrapper.tag, xml_wrapper.attributes)
-    parent.text = xml_wrapper.text
+    text = xml_wrapper.text
+    # ElementTree needs the whole text, so deferred binary text is encoded here.
+    parent.text = text if text is None or isinstance(text, str) else str(text)
 
     for child in xml_wrapper.children:
         convert_to_etree(child, parent)
 
     return parent
+
+
+def _write_element(
+    write: Callable[[str], object],
+    xml_wrapper: XmlElementTypeAlias,
+    level: int,
+    space: Optional[str]
+) -> None:
+    """
+    Write an element and its children.
+
+    Args:
+        write (Callable[[str], object]): Receives the XML text piece by piece.
+        xml_wrapper (XmlElementTypeAlias): Element to write.
+        level (int): Depth of the element, used for indentation.
+        space (Optional[str]): Indentation per level, or None to not indent.
+    """
+    tag = xml_wrapper.tag
+    write('<' + tag)
+    for key, value in xml_wrapper.attributes.items():
+        write(f' {key}="{escape_attribute(value)}"')
+
+    children = xml_wrapper.children
+    text = xml_wrapper.text
+    if space is not None and children and (not text or (isinstance(text, str) and not text.strip())):
+        text = '\n' + space * (level + 1)
+
+    if not text and not children:
+        write(' />')
+        return
+
+    write('>')
+    if isinstance(text, str):
+        write(escape_text(text))
+    elif text is not None:
+        # Deferred binary text is encoded and written chunk by chunk.
+        for chunk in text:
+            write(escape_text(chunk))
+
+    if space is None:
+        for child in children:
+            _write_element(write, child, level + 1, space)
+    else:
+        child_indentation = '\n' + space * (level + 1)
+        last = len(children) - 1
+        for i, child in enumerate(children):
+            _write_element(write, child, level + 1, space)
+            write(child_indentation if i < last else '\n' + space * level)
+    write('</' + tag + '>')
+
+
+def write_xml(
+    xml_wrapper: XmlElementTypeAlias,
+    stream: TextIO,
+    space: Optional[str] = None
+) -> None:
+    """
+    Write the XML wrapper as XML text to a stream, without building an
+    `xml.etree.ElementTree` first. Deferred binary text is encoded chunk
+    by chunk and written straight to the stream.
+
+    The output is the same as
+    `ET.tostring(convert_to_etree(xml_wrapper), encoding='unicode')`, or with
+    `ET.indent(e, space)` applied first when `space` is given.
+
+    Args:
+        xml_wrapper (XmlElementTypeAlias): Root of the elements to write.
+        stream (TextIO): Stream receiving the text.
+        space (Optional[str], optional): Indentation per level, eg two spaces.
+            Defaults to None, no indentation.
+    """
+    _write_element(stream.write, xml_wrapper, 0, space)
+
+
+def convert_to_string(
+    xml_wrapper: XmlElementTypeAlias,
+    space: Optional[str] = None
+) -> str:
+    """
+    Convert the XML wrapper to XML text. See `write_xml`.
+
+    Args:
+        xml_wrapper (XmlElementTypeAlias): Root of the elements to convert.
+        space (Optional[str], optional): Indentation per level. Defaults to None.
+
+    Returns:
+        str: The XML text.
+    """
+    stream = io.StringIO()
+    write_xml(xml_wrapper, stream, space)
+    return stream.getvalue()
+
+
+def write_xml_bytes(
+    xml_wrapper: XmlElementTypeAlias,
+    stream: BinaryIO,
+    space: Optional[str] = None,
+    codec: Optional[CodecWrapper] = None,
+    xml_declaration: Optional[bool] = None
+) -> None:
+    """
+    Write the XML wrapper as encoded XML to a binary stream. The text is encoded
+    while it is written, by an incremental encoder. Characters the codec cannot
+    represent are written as character references.
+
+    The output is the same as
+    `ET.tostring(convert_to_etree(xml_wrapper), encoding=codec.codec.name)`.
+
+    Args:
+        xml_wrapper (XmlElementTypeAlias): Root of the elements to write.
+        stream (BinaryIO): Stream receiving the bytes.
+        space (Optional[str], optional): Indentation per level. Defaults to None.
+        codec (Optional[CodecWrapper], optional): Output codec. Defaults to None,
+            use `config.codec_text` of the XML wrapper.
+        xml_declaration (Optional[bool], optional): Write an XML declaration. Defaults
+            to None, only write it if the codec is not UTF-8.
+    """
+    if codec is None:
+        codec = xml_wrapper.config.codec_text
+    encoding = codec.codec.name
+    encoder = codec.incremental_encoder('xmlcharrefreplace')
+    pieces: List[str] = []
+
+    def flush(final: bool = False) -> None:
+        encoded = encoder.encode(''.join(pieces), final)
+        pieces.clear()
+        if encoded:
+            stream.write(encoded)
+
+    def write(text: str) -> None:
+        pieces.append(text)
+        if len(pieces) >= WRITE_BATCH_SIZE:
+            flush()
+
+    if xml_declaration or (xml_declaration is None and encoding not in ENCODINGS_WITHOUT_DECLARATION):
+        write(f"<?xml version='1.0' encoding='{encoding}'?>\n")
+    _write_element(write, xml_wrapper, 0, space)
+    flush(True)
+
+
+def convert_to_bytes(
+    xml_wrapper: XmlElementTypeAlias,
+    space: Optional[str] = None,
+    codec: Optional[CodecWrapper] = None,
+    xml_declaration: Optional[bool] = None
+) -> bytes:
+    """
+    Convert the XML wrapper to encoded XML. See `write_xml_bytes`.
+
+    Args:
+        xml_wrapper (XmlElementTypeAlias): Root of the elements to convert.
+        space (Optional[str], optional): Indentation per level. Defaults to None.
+        codec (Optional[CodecWrapper], optional): Output codec. Defaults to None.
+        xml_declaration (Optional[bool], optional): Write an XML declaration. Defaults to None.
+
+    Returns:
+        bytes: The encoded XML.
+    """
+    stream = io.BytesIO()
+    write_xml_bytes(xml_wrapper, stream, space, codec, xml_declaration)
+    return stream.getvalue()
@@ -0,0 +1,155 @@
+"""
+Escape text for XML output.
+
+Most values need no escaping, so a quick scan for the characters that must be
+escaped is done before anything is copied. Values that do need escaping are
+escaped in a single `str.translate` pass. Short ones, which are often repeated
+(status codes, country names, enum values, ...), are kept in a bounded cache.
+
+Characters that are not allowed in XML 1.0 can be removed or replaced the same way.
+"""
+import re
+from typing import Dict, Final, FrozenSet
+
+
+ESCAPE_CACHE_MAX_LENGTH: Final[int] = 64
+"""
+Longest value, in characters, that is kept in the escape caches. Longer values are
+rarely repeated.
+"""
+
+ESCAPE_CACHE_SIZE: Final[int] = 4096
+"""
+Maximum number of values kept in each escape cache. The oldest value is dropped
+first.
+"""
+
+_TEXT_ESCAPES: Final[Dict[int, str]] = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+})
+"""
+Translate table to escape the text of an element. Same as `xml.etree.ElementTree`.
+"""
+
+_ATTRIBUTE_ESCAPES: Final[Dict[int, str]] = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    '\r': '&#13;',
+    '\n': '&#10;',
+    '\t': '&#09;',
+})
+"""
+Translate table to escape the value of an attribute. Same as `xml.etree.ElementTree`.
+"""
+
+_text_cache: Dict[str, str] = {}
+"""
+Escaped text of an element, keyed by the original text.
+"""
+
+_attribute_cache: Dict[str, str] = {}
+"""
+Escaped value of an attribute, keyed by the original value.
+"""
+
+
+def _escape_cached(text: str, cache: Dict[str, str], table: Dict[int, str]) -> str:
+    escaped = cache.get(text)
+    if escaped is None:
+        escaped = text.translate(table)
+        if len(text) <= ESCAPE_CACHE_MAX_LENGTH:
+            while len(cache) >= ESCAPE_CACHE_SIZE:
+                # Drop the oldest entry. The cache is shared by threads: another one
+                # may drop it first, or change the cache while it is iterated.
+                try:
+                    del cache[next(iter(cache))]
+                except (StopIteration, KeyError, RuntimeError):
+                    pass
+            cache[text] = escaped
+    return escaped
+
+
+def escape_text(text: str) -> str:
+    """
+    Escape the text of an element.
+
+    Args:
+        text (str): Text to escape.
+
+    Returns:
+        str: The escaped text. `text` itself if nothing needs escaping.
+    """
+    if '&' not in text and '<' not in text and '>' not in text:
+        return text
+    return _escape_cached(text, _text_cache, _TEXT_ESCAPES)
+
+
+def escape_attribute(text: str) -> str:
+    """
+    Escape the value of an attribute.
+
+    Args:
+        text (str): Value to escape.
+
+    Returns:
+        str: The escaped value. `text` itself if nothing needs escaping.
+    """
+    if (
+        '&' not in text and '<' not in text and '>' not in text and '"' not in text
+        and '\r' not in text and '\n' not in text and '\t' not in text
+    ):
+        return text
+    return _escape_cached(text, _attribute_cache, _ATTRIBUTE_ESCAPES)
+
+
+def clear_escape_caches() -> None:
+    """
+    Empty the escape caches.
+    """
+    _text_cache.clear()
+    _attribute_cache.clear()
+
+
+INVALID_XML_CODEPOINTS: Final[FrozenSet[int]] = frozenset([
+    *range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20),
+    *range(0xD800, 0xE000),
+    0xFFFE, 0xFFFF,
+])
+"""
+Code points that are not allowed in an XML 1.0 document: control characters other
+than tab, line feed and carriage return, surrogates, U+FFFE and U+FFFF.
+"""
+
+_INVALID_XML_CHARACTER: Final[re.Pattern[str]] = re.compile(
+    '[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]'
+)
+
+_sanitize_tables: Dict[str, Dict[int, str]] = {}
+"""
+Translate tables replacing every invalid code point, keyed by the replacement.
+"""
+
+
+def sanitize_text(text: str, replacement: str = '') -> str:
+    """
+    Replace the characters that are not allowed in XML 1.0.
+
+    Args:
+        text (str): Text to sanitize.
+        replacement (str, optional): Replaces each invalid character. Defaults to '',
+            remove them.
+
+    Returns:
+        str: The sanitized text. `text` itself if it is already valid.
+    """
+    # Printable text never holds an invalid character, and the check is a fast scan.
+    if text.isprintable() or _INVALID_XML_CHARACTER.search(text) is None:
+        return text
+    table = _sanitize_tables.get(replacement)
+    if table is None:
+        table = _sanitize_tables[replacement] = dict.fromkeys(INVALID_XML_CODEPOINTS, replacement)
+    return text.translate(table)
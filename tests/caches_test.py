@@ -0,0 +1,86 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import enum
+import unittest
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.caches import ScalarTextCache, ShapeTemplateCache, is_cacheable_scalar
+from libs.config import Config
+
+
+class Status(enum.Enum):
+    OK = 'ok'
+    FAILED = 1
+    PENDING = [1]
+
+
+class TestScalarTextCache(unittest.TestCase):
+
+    def test_is_cacheable_scalar(self):
+        for data in [0, -1, 10**30, True, '', 'abc', 1.5, float('inf')]:
+            self.assertTrue(is_cacheable_scalar(data), data)
+        for data in [0.0, -0.0, float('nan'), Decimal('1.0'), 1j, (1,), None, Status.OK]:
+            self.assertFalse(is_cacheable_scalar(data), data)
+
+    def test_get_text(self):
+        cache = ScalarTextCache(max_size=2)
+        self.assertEqual(cache.get_text(1, str), '1')
+        self.assertEqual(cache.get_text(True, str), 'True')
+        self.assertIs(cache.get_text(1, str), cache.get_text(1, str))
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2, 'evictions': 0, 'size': 2, 'max_size': 2})
+
+        self.assertEqual(cache.get_text(1.0, str), '1.0')
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 3, 'evictions': 1, 'size': 2, 'max_size': 2})
+        self.assertEqual(cache.get_text(True, str), 'True')
+        self.assertEqual(cache.hits, 3)
+
+        cache.clear()
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'max_size': 2})
+
+        cache.max_size = 0
+        self.assertEqual(cache.get_text(1, str), '1')
+        self.assertEqual(len(cache), 0)
+
+    def test_threads(self):
+        cache = ScalarTextCache(max_size=100)
+
+        def get_texts(start: int) -> None:
+            for i in range(start, start + 1000):
+                self.assertEqual(cache.get_text(i, str), str(i))
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(get_texts, range(0, 8000, 500)))
+        self.assertLessEqual(len(cache), 100 + 8)
+
+    def test_conversion(self):
+        config = Config()
+        data = [Status.OK, Status.FAILED, Status.PENDING, 7, 7, 2.5, 0.0, -0.0, Status.OK, 7]
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)
+        texts = [child.text for child in ew.children[0].children]
+        self.assertEqual(texts, ['ok', '1', '[1]', '7', '7', '2.5', '0.0', '-0.0', 'ok', '7'])
+        self.assertIs(texts[3], texts[4])
+        self.assertEqual(config.scalar_text_cache.stats()['hits'], 3)
+        self.assertEqual(config.scalar_text_cache.stats()['misses'], 4)
+
+
+class TestShapeTemplateCache(unittest.TestCase):
+
+    def test_threads(self):
+        cache = ShapeTemplateCache(max_size=100)
+
+        def put(start: int) -> None:
+            for i in range(start, start + 1000):
+                cache.put(('key', i), [i])
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(put, range(0, 8000, 500)))
+        self.assertLessEqual(cache.stats()['size'], 100 + 8)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
@@ -6,6 +6,7 @@
 #   C0301 line-too-long
 import unittest
 import codecs
+import pickle
 
 from libs.codec_wrapper import CodecWrapper
 
@@ -49,6 +50,58 @@ class TestCodecWrapper(unittest.TestCase):
         cw.codec = c
         self.assertEqual(cw.codec, c)
 
+    def test_slice_alignment(self):
+        cw = CodecWrapper()
+        self.assertIsNone(cw.slice_alignment)
+        cw.codec_name = 'base64'
+        self.assertEqual(cw.slice_alignment, 57)
+        cw.codec_name = 'hex'
+        self.assertEqual(cw.slice_alignment, 1)
+        cw.codec_name = 'zip'
+        self.assertEqual(cw.slice_alignment, 1)
+        cw.codec_name = 'uu'
+        self.assertIsNone(cw.slice_alignment)
+
+    def test_codec_resolved_once(self):
+        cw = CodecWrapper('base64')
+        codec_tmp = cw.codec
+        self.assertIs(cw.codec, codec_tmp)
+        self.assertFalse(cw.binary_output)
+        cw.codec_name = 'zlib'
+        self.assertTrue(cw.binary_output)
+        cw.codec = codecs.lookup('latin_1')
+        self.assertEqual(cw.codec_name, 'iso8859-1')
+        self.assertIsNone(cw.slice_alignment)
+
+    def test_incremental_factories(self):
+        cw = CodecWrapper('utf_16')
+        self.assertIs(cw.incremental_encoder, codecs.getincrementalencoder('utf_16'))
+        self.assertIs(cw.incremental_decoder, codecs.getincrementaldecoder('utf_16'))
+        encoder = cw.incremental_encoder(cw.codec_error_handler)
+        encoded = encoder.encode('ab') + encoder.encode('c', True)
+        self.assertEqual(encoded, 'abc'.encode('utf_16'))
+        decoder = cw.incremental_decoder()
+        self.assertEqual(''.join(decoder.decode(encoded[i:i + 1]) for i in range(len(encoded))), 'abc')
+
+        cw.codec_name = 'unknown_codec'
+        with self.assertRaises(LookupError):
+            print(cw.incremental_encoder)
+
+    def test_pickle(self):
+        cw = CodecWrapper('hex')
+        cw.codec_error_handler = 'strict'
+        copy = pickle.loads(pickle.dumps(cw))
+        self.assertIs(copy.codec, codecs.lookup('hex'))
+        self.assertEqual(copy.codec_error_handler, 'strict')
+        self.assertEqual(copy.slice_alignment, 1)
+        self.assertNotIn(b'hex_encode', pickle.dumps(cw))
+
+        cw.codec_name = 'unknown_codec'
+        copy = pickle.loads(pickle.dumps(cw))
+        self.assertEqual(copy.codec_name, 'unknown_codec')
+        with self.assertRaises(LookupError):
+            print(copy.codec)
+
 
 if __name__ == '__main__':
     unittest.main()  # pragma: no cover
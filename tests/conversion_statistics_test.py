@@ -0,0 +1,113 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import os
+import tempfile
+import unittest
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.config import Config
+from libs.conversion_statistics import ConversionStatistics, StatisticsRegistry
+from libs.xml_element_wrapper_converters import convert_to_string
+
+
+class TestConversionStatistics(unittest.TestCase):
+    def test_statistics(self):
+        config = Config()
+        data = {'a': [1, 2, 'é'], 'b': {'c': None}}
+        statistics = ConversionStatistics()
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data, statistics=statistics)
+        self.assertEqual(convert_to_string(root), convert_to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)))
+
+        self.assertEqual(statistics.elements, 8)
+        self.assertEqual(statistics.max_depth, 3)
+        self.assertEqual(statistics.elements_per_processor, {
+            'DataProcessor_dict': 2, 'DataProcessor_sequence': 1, 'DataProcessor_numeric': 2, 'DataProcessor_str': 1, 'DataProcessor_none': 1,
+        })
+        # '1', '2' and 'é'.
+        self.assertEqual(statistics.text_bytes, 4)
+        self.assertEqual(statistics.attribute_bytes, 0)
+        self.assertEqual(statistics.hit_rate('shape_template_cache'), None)
+        self.assertEqual(set(statistics.phases), {'begin', 'convert', 'measure'})
+        with statistics.phase('serialize'):
+            convert_to_string(root)
+        self.assertGreaterEqual(statistics.phases['serialize'][0], 0)
+        self.assertEqual(statistics.to_dict()['elements'], 8)
+
+        # Reset by each conversion.
+        DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=[1], statistics=statistics)
+        self.assertEqual(statistics.elements, 3)
+        self.assertEqual(statistics.elements_per_processor, {'DataProcessor_sequence': 1, 'DataProcessor_numeric': 1})
+        self.assertNotIn('serialize', statistics.phases)
+        DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=['x', 'y'])
+        self.assertEqual(statistics.elements_per_processor, {'DataProcessor_sequence': 1, 'DataProcessor_numeric': 1})
+
+    def test_threads(self):
+        config = Config()
+
+        def convert(size: int) -> ConversionStatistics:
+            statistics = ConversionStatistics()
+            # Conversions of the same configuration without statistics, in other threads, are not counted.
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=['x'] * size)
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=list(range(size)), statistics=statistics)
+            return statistics
+
+        sizes = range(100, 2100, 100)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(convert, sizes))
+        for size, statistics in zip(sizes, results):
+            self.assertEqual(statistics.elements_per_processor, {'DataProcessor_sequence': 1, 'DataProcessor_numeric': size})
+            self.assertEqual(statistics.elements, size + 2)
+
+    def test_while_profiled(self):
+        config = Config()
+        statistics = ConversionStatistics()
+        with config.profile() as profiler:
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=[1, 2], statistics=statistics)
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=[3], statistics=statistics)
+        self.assertEqual(statistics.elements_per_processor, {'DataProcessor_sequence': 1, 'DataProcessor_numeric': 1})
+        self.assertEqual(sum(stats.elements for stats in profiler.processors.values()), 5)
+
+    def test_registry(self):
+        config = Config()
+        config.attr_flags = config.attr_flags.INC_PYTHON_DATA_TYPE
+        registry = StatisticsRegistry()
+        for data in ([1, 2], ['x'] * 200):
+            statistics = ConversionStatistics()
+            DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data, statistics=statistics)
+            registry.add(statistics)
+        text = registry.to_prometheus()
+        self.assertIn('# TYPE dict2xml_conversions_total counter\ndict2xml_conversions_total 2\n', text)
+        self.assertIn('dict2xml_elements_total 206\n', text)
+        self.assertIn('dict2xml_processor_elements_total{processor="DataProcessor_str"} 200\n', text)
+        self.assertIn('dict2xml_conversion_elements_bucket{le="10"} 1\n', text)
+        self.assertIn('dict2xml_conversion_elements_bucket{le="1000"} 2\n', text)
+        self.assertIn('dict2xml_conversion_elements_count 2\n', text)
+        self.assertIn('dict2xml_phase_cpu_seconds_total{phase="convert"} ', text)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dict2xml.prom')
+            registry.write_prometheus(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), text)
+            self.assertEqual(os.listdir(directory), ['dict2xml.prom'])
+
+        server = registry.serve()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+            with urllib.request.urlopen(f'{url}/metrics', timeout=10) as response:
+                self.assertEqual(response.headers['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+                self.assertEqual(response.read().decode('utf-8'), text)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f'{url}/other', timeout=10)  # pylint: disable=R1732; consider-using-with
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
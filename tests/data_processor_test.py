@@ -15,19 +15,28 @@ from typing import Any, List, NamedTuple
 from zoneinfo import ZoneInfo
 from uuid import UUID
 import array
+import base64
+import gc
+import mmap
+import pickle
+import tempfile
 import xml.etree.ElementTree as ET
 import datetime as dt
 import calendar
 import unittest
+import weakref
 import tzlocal
 from dateutil import tz
-from libs.abstract_baseclasses import XmlAttributesTypeAlias, XmlElementNameBaseClass
+from libs.abstract_baseclasses import ConfigBaseClass, ElementObservation, FrozenConfig, XmlAttributesTypeAlias, XmlElementNameBaseClass
 from libs.attributes import AttributeFlags, ATTRIBUTE_FLAGS_NAMES
+from libs.caches import ShapeTemplateCache
 from libs.codec_wrapper import CodecWrapper
 from libs.config import Config
 from libs.data_processor import (
     DataProcessorAbstractBaseClass,
     DataProcessor_binary,
+    DataProcessor_numeric,
+    DataProcessor_str,
     DataProcessor_tzinfo,
     DataProcessor_used_for_testing,
     DataProcessor_used_for_testing_use_hints
@@ -44,6 +53,12 @@ class Point3D(NamedTuple):
     z: int
 
 
+class DataProcessor_with_precision(DataProcessor_numeric):
+    def __init__(self, config, precision: int) -> None:
+        super().__init__(config)
+        self.precision = precision
+
+
 class TestDataProcessor(unittest.TestCase):
     test_data: List[Any] = [
         (None, str(type(None)), 'none'),
@@ -275,6 +290,20 @@ class TestDataProcessor(unittest.TestCase):
         expected = [False, False, False, False, False, False, False, False, False, False, False, False, False, False, False, False, True, False, False, False, False, False, False, False]
         self.assertListEqual(resp, expected)
 
+    def test_is_array(self):
+        func = self.datatypeidentification.is_array
+        resp = [func(x[0]) for x in self.test_data]
+        dbg = [(x[1], func(x[0]), x[2]) for x in self.test_data]
+        expected = [False, False, False, False, False, False, False, False, False, False, False, False, False, True, False, False, False, False, False, False, False, False, False, False]
+        self.assertListEqual(resp, expected)
+
+    def test_is_range(self):
+        func = self.datatypeidentification.is_range
+        resp = [func(x[0]) for x in self.test_data]
+        dbg = [(x[1], func(x[0]), x[2]) for x in self.test_data]
+        expected = [False, False, False, False, False, False, False, False, False, False, False, False, True, False, False, False, False, False, False, False, False, False, False, False]
+        self.assertListEqual(resp, expected)
+
     def test_DataProcessor_BaseClass(self):
         dp = DataProcessor_used_for_testing(self.config)
         self.baseclass_test_helper(dp)
@@ -329,6 +358,407 @@ class TestDataProcessor(unittest.TestCase):
         result = ET.tostring(e, encoding='unicode')
         self.assertEqual(result, '<root>\n  <binary>789c4b29cdcdadd44d219f04004d5e19a7</binary>\n</root>')
 
+    def test_DataProcessor_range_and_array(self):
+        data = {'r': range(2, 9, 3), 'a': array.array('d', [1.5, 2])}
+
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        result = ET.tostring(convert_to_etree(ew), encoding='unicode')
+        self.assertEqual(
+            result,
+            '<root><dict><r><numeric>2</numeric><numeric>5</numeric><numeric>8</numeric></r>'
+            '<a><numeric>1.5</numeric><numeric>2.0</numeric></a></dict></root>'
+        )
+
+        self.config.compact_range = True
+        self.config.compact_array = True
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        result = ET.tostring(convert_to_etree(ew), encoding='unicode')
+        self.assertEqual(
+            result,
+            '<root><dict><r start="2" stop="9" step="3" /><a typecode="d">1.5 2.0</a></dict></root>'
+        )
+
+    def test_DataProcessor_range_with_custom_pre_processor(self):
+        class DataProcessor_hex(DataProcessor_numeric):
+            def _get_textual_representation_of_data(self, parent, current, data, **kwargs):
+                return hex(data)
+
+        # A custom processor claiming the items disables the bulk path.
+        self.config.custom_pre_processors.append(DataProcessor_hex(self.config))
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=range(14, 16))
+        result = ET.tostring(convert_to_etree(ew), encoding='unicode')
+        self.assertEqual(result, '<root><sequence><numeric>0xe</numeric><numeric>0xf</numeric></sequence></root>')
+
+    def test_DataProcessor_range_with_value_dependent_pre_processor(self):
+        class DataProcessor_big(DataProcessor_numeric):
+            def _get_default_element_name(self, data):
+                return 'big'
+
+            def _is_expected_data_type(self, data):
+                return type(data) is int and data > 1  # pylint: disable=C0123; unidiomatic-typecheck
+
+        # The first item is not claimed by the custom processor, the later ones are.
+        self.config.custom_pre_processors.append(DataProcessor_big(self.config))
+        for data in (range(4), array.array('i', range(4))):
+            with self.subTest(data=data):
+                ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+                expected = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=list(range(4)))
+                result = ET.tostring(convert_to_etree(ew), encoding='unicode')
+                self.assertEqual(result, ET.tostring(convert_to_etree(expected), encoding='unicode'))
+                self.assertIn('<big>2</big><big>3</big>', result)
+
+    def test_DataProcessor_binary_buffer_protocol(self):
+        payload = bytes(range(256)) * 50
+        expected = base64.encodebytes(payload).decode().strip()
+        # Force the slicing path with a chunk size that is not a multiple of 57.
+        self.config.binary_chunk_size = 1000
+
+        with tempfile.TemporaryFile() as f:
+            f.write(payload)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0) as mm:
+                for data in [payload, bytearray(payload), memoryview(payload), mm]:
+                    ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+                    self.assertEqual(ew.children[0].tag, 'binary')
+                    self.assertEqual(ew.children[0].text, expected)
+
+        values = array.array('i', [1, 2, 3])
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=memoryview(values))
+        self.assertEqual(ew.children[0].text, base64.b64encode(values.tobytes()).decode())
+
+    def test_sanitize_text(self):
+        data = {'text': 'bell\x07 nul\x00 tab\t', 'bad\x01key': 'x', 'list': ['\ud800\uffff']}
+        self.config.attr_flags = AttributeFlags.INC_LENGTH_ELEMENT_TEXT
+
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertEqual(ew.children[0].children[0].text, data['text'])
+
+        self.config.sanitize_text = True
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        result = ET.tostring(convert_to_etree(ew), encoding='unicode')
+        self.assertEqual(
+            result,
+            '<root><dict length_element_text="0"><text length_element_text="13">bell nul tab\t</text>'
+            '<inv_tag_placeholder original_element_name="badkey" length_element_text="1">x</inv_tag_placeholder>'
+            '<list length_element_text="0"><str length_element_text="0" /></list></dict></root>'
+        )
+        ET.fromstring(result)
+
+        self.config.sanitize_text_replacement = '?'
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertEqual(ew.children[0].children[2].children[0].text, '??')
+
+    def test_memoize_immutable_subtrees(self):
+        shared = (1, 'a', (2.5, None), Point3D(1, 2, 3), AttributeFlags.INC_LEN, dt.date(2024, 1, 2), b'xyz')
+        mutable = ([1],)
+        data = {'a': [shared] * 3, 'b': shared, 'c': [mutable, mutable], 'd': [[shared], shared]}
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_ALL_DEBUG]:
+            self.config.attr_flags = flags
+            self.config.memoize_immutable_subtrees = False
+            expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+
+            self.config.memoize_immutable_subtrees = True
+            # The state of the conversion, as the last element completes.
+            state = {}
+
+            def snapshot(processor, element):  # pylint: disable=W0613;unused-argument
+                state['memo'] = list(self.config.subtree_memo)
+                state['containers'] = list(self.config.immutable_containers.values())
+
+            with ElementObservation(self.config, snapshot):
+                ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+            self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected)
+            self.assertEqual(sorted((str(child_name) for _, child_name in state['memo'])), ['None', 'None', 'None', 'b'])
+            # Each container is scanned once, its items before it.
+            self.assertEqual({id(container): immutable for container, immutable in state['containers']}, {
+                id(shared[2]): True, id(shared[3]): True, id(shared): True, id(mutable): False,
+            })
+            # Released once converted.
+            self.assertEqual((self.config.subtree_memo, self.config.immutable_containers), ({}, {}))
+            first, second = ew.children[0].children[0].children[:2]
+            self.assertIsNot(first, second)
+            self.assertIsNot(first.children[2], second.children[2])
+            self.assertIs(second.parent, ew.children[0].children[0])
+            self.assertIs(second.children[2].parent, second)
+
+        source = ew.children[0].children[1]
+        source.attributes['alt_id'] = 'old'
+        counter = self.config.elements_sequential_counter
+        clone = DataProcessorAbstractBaseClass._clone_subtree(config=self.config, parent=ew, source=source)
+        self.assertNotEqual(clone.attributes['alt_id'], 'old')
+        self.assertEqual(clone.attributes['id'], str(counter + 1))
+        self.assertEqual(list(clone.attributes), list(source.attributes))
+
+    def test_track_references(self):
+        class Node:
+            def __init__(self, name: str) -> None:
+                self.name = name
+                self.next: Any = None
+
+        shared = {'x': [1, 2]}
+        cycle: List[Any] = [shared]
+        cycle.append(cycle)
+        node = Node('n')
+        node.next = node
+        data = {'a': shared, 'b': [shared, (), ()], 'c': cycle, 'd': node}
+        self.config.attr_flags = AttributeFlags.NONE
+
+        with self.assertRaises(RecursionError):
+            DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+
+        self.config.track_references = True
+        self.config.memoize_immutable_subtrees = True
+        for _ in range(2):
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+            self.assertEqual(
+                ET.tostring(convert_to_etree(ew), encoding='unicode'),
+                '<root><dict><a ref_id="1"><x><numeric>1</numeric><numeric>2</numeric></x></a>'
+                '<b><dict idref="1" /><sequence /><sequence /></b>'
+                '<c ref_id="2"><dict idref="1" /><sequence idref="2" /></c>'
+                '<d ref_id="3"><name>n</name><next idref="3" /></d></dict></root>'
+            )
+
+        self.config.attr_flags = AttributeFlags.INC_SEQ_ID
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=[shared, shared])
+        self.assertEqual(
+            ET.tostring(convert_to_etree(ew), encoding='unicode'),
+            '<root id="1"><sequence id="2"><dict id="3" ref_id="1"><x id="4"><numeric id="5">1</numeric><numeric id="6">2</numeric></x></dict>'
+            '<dict id="7" idref="1" /></sequence></root>'
+        )
+
+    def test_conversion_state_released(self):
+        class Payload:
+            def __init__(self) -> None:
+                self.items = [1, 2]
+
+        # The configuration does not keep the data alive once converted.
+        self.config.track_references = True
+        payload = Payload()
+        payload_ref = weakref.ref(payload)
+        DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data={'a': payload, 'b': payload})
+        del payload
+        self.assertIsNone(payload_ref())
+        self.assertEqual(self.config.reference_elements, {})
+
+        self.config.track_references = False
+        self.config.memoize_immutable_subtrees = True
+        payload = Payload()
+        payload_ref = weakref.ref(payload)
+        DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=[(1, payload), (1, payload)])
+        del payload
+        self.assertIsNone(payload_ref())
+
+        self.config.memoize_immutable_subtrees = False
+        self.config.share_leaf_elements = True
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=['a', 'a', 1])
+        leaf_ref = weakref.ref(root.children[0].children[0])
+        del root
+        gc.collect()
+        self.assertIsNone(leaf_ref())
+        self.assertEqual(self.config.leaf_elements, {})
+
+    def test_share_leaf_elements(self):
+        data = [{'enabled': True, 'status': 'OK', 'tags': {}, 'values': [1, 2, 1]} for _ in range(10)]
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_DEBUG_INFO | AttributeFlags.INC_LENGTH_ELEMENT_TEXT]:
+            self.config.attr_flags = flags
+            self.config.share_leaf_elements = False
+            expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+            self.config.share_leaf_elements = True
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+            self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected)
+
+            pairs = list(ew.iter_with_parents())
+            self.assertEqual(len(pairs), 2 + 10 * 8)
+            self.assertEqual(len({id(element) for element, _ in pairs}), 2 + 10 * 2 + 5)
+            for element, parent in pairs[1:]:
+                self.assertTrue(any(child is element for child in parent.children))
+            self.assertIsNone(ew.children[0].children[3].children[0].parent)
+
+        self.config.attr_flags = AttributeFlags.INC_SEQ_ID
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertEqual(len({id(element) for element, _ in ew.iter_with_parents()}), 2 + 10 * 8)
+
+    def test_shape_templates(self):
+        data = [
+            {'id': i, 'name': f'n{i}', 'bad key': i % 2 == 0, 'when': dt.date(2024, 1, 1 + i), 'raw': b'xy', 'tags': ['a'] * i, 'meta': {'x': None}}
+            for i in range(5)
+        ] + [{'id': 'other type'}, {'id': 1, 'extra': 1.5}]
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_ALL_DEBUG & ~AttributeFlags.INC_ALT_ID]:
+            self.config.attr_flags = flags
+            self.config.use_shape_templates = False
+            expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+            self.config.use_shape_templates = True
+            self.config.shape_template_cache.clear()
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+            self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected)
+            self.assertEqual(self.config.shape_template_cache.stats(), {'hits': 8, 'misses': 4, 'evictions': 0, 'size': 4, 'max_size': 1024})
+
+        # Equal keys of other types have other names.
+        data_keys = [{1: 'a'}, {True: 'a'}, {1.0: 'a'}, {1: 'a'}]
+        self.config.use_shape_templates = False
+        expected_keys = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data_keys)), encoding='unicode')
+        self.assertIn('original_element_name="1.0"', expected_keys)
+        self.config.use_shape_templates = True
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data_keys)
+        self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected_keys)
+
+        # A processor customizing _try_converting is always called through _process.
+        self.config.custom_pre_processors.append(DataProcessor_used_for_testing(self.config))
+        self.config.shape_template_cache = ShapeTemplateCache(max_size=1)
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected)
+        self.assertGreater(self.config.shape_template_cache.evictions, 0)
+
+    def test_freeze(self):
+        data = {'id': 1, 'names': ['a', 'b'], 'flag': True, 'bad key': None}
+        self.config.attr_flags = AttributeFlags.INC_ALL_DEBUG & ~AttributeFlags.INC_ALT_ID
+        self.config.override_str_label = 'text'
+        expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+
+        frozen = self.config.freeze()
+        self.assertIs(self.config.frozen, frozen)
+        self.assertIs(self.config.freeze(), frozen)
+        self.assertEqual(frozen, FrozenConfig(self.config))
+        self.assertEqual(frozen.options['override_str_label'], 'text')
+        str_processor = next(processor for processor in self.config.default_processors if isinstance(processor, DataProcessor_str))
+        self.assertEqual(frozen.element_name(str_processor), 'text')
+        self.assertEqual(frozen.codec_binary.name, 'base64')
+        with self.assertRaises(AttributeError):
+            frozen.attr_flags = AttributeFlags.NONE  # type: ignore[misc]
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), expected)
+
+        # Equal options give equal snapshots, usable as cache keys.
+        other = Config()
+        other.attr_flags = self.config.attr_flags
+        other.override_str_label = 'text'
+        self.assertEqual(hash(other.freeze()), hash(frozen))
+        self.assertEqual(len({frozen, other.frozen}), 1)
+
+        # A changed configuration is frozen again by the next conversion.
+        self.config.override_str_label = None
+        self.config.attr_flags = AttributeFlags.INC_SEQ_ID
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        self.assertIsNot(self.config.frozen, frozen)
+        self.assertNotEqual(self.config.frozen, frozen)
+        self.assertEqual(ew.children[0].children[1].children[0].tag, 'str')
+        self.assertEqual(ew.children[0].children[1].children[0].attributes, {'id': '5'})
+
+        self.config.override_dict_label = 'bad key'
+        with self.assertRaises(ValueError):
+            self.config.freeze()
+        self.config.override_dict_label = None
+        self.config.binary_chunk_size = 0
+        with self.assertRaises(ValueError):
+            self.config.freeze()
+        self.config.binary_chunk_size = 1024
+        self.config.codec_text.codec_name = 'no such codec'
+        with self.assertRaises(LookupError):
+            self.config.freeze()
+
+    def test_clone(self):
+        data = {'id': 1, 'names': ['a', 'b'], 'raw': b'xy', 'flag': None}
+        self.config.attr_flags = AttributeFlags.INC_ALL_DEBUG & ~AttributeFlags.INC_ALT_ID
+        self.config.override_dict_label = 'record'
+        self.config.attr_flag_names[AttributeFlags.INC_LEN] = 'count'
+        self.config.custom_pre_processors.append(DataProcessor_used_for_testing(self.config))
+        expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+
+        clone = self.config.clone()
+        self.assertEqual(ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=clone, data=data)), encoding='unicode'), expected)
+        processors = clone.custom_pre_processors + clone.default_processors + clone.custom_post_processors + [clone.last_chance_processor]
+        originals = self.config.custom_pre_processors + self.config.default_processors + self.config.custom_post_processors + [self.config.last_chance_processor]
+        self.assertEqual([type(p) for p in processors], [type(p) for p in originals])
+        for processor, original in zip(processors, originals):
+            self.assertIsNot(processor, original)
+            self.assertIs(processor.config, clone)
+            self.assertIs(processor.classifier, original.classifier)
+
+        # Changing the clone leaves the original unchanged.
+        clone = self.config.clone(attr_flags=AttributeFlags.NONE, override_dict_label=None)
+        clone.attr_flag_names[AttributeFlags.INC_LEN] = 'size'
+        clone.codec_binary.codec_name = 'hex'
+        self.assertEqual(
+            ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=clone, data=data)), encoding='unicode'),
+            '<root><dict><id>1</id><names><str>a</str><str>b</str></names><raw>7879</raw><flag /></dict></root>'
+        )
+        self.assertEqual(self.config.attr_flag_names[AttributeFlags.INC_LEN], 'count')
+        self.assertEqual(self.config.codec_binary.codec_name, 'base64')
+        self.assertEqual(ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode'), expected)
+
+        # The processors are bound on first use, from those of the original when cloned,
+        # and the clone has its own caches.
+        clone = self.config.clone()
+        grandchild = clone.clone()
+        self.assertNotIn('default_processors', vars(clone))
+        self.config.custom_pre_processors.pop()
+        self.assertEqual(len(clone.custom_pre_processors), 1)
+        self.assertIs(clone.custom_pre_processors[0].config, clone)
+        self.assertIs(grandchild.last_chance_processor.config, grandchild)
+        self.assertIsNot(clone.scalar_text_cache, self.config.scalar_text_cache)
+        with self.assertRaises(AttributeError):
+            _ = clone.no_such_option
+
+        # Processors with their own state are copied by `_bind`.
+        class DataProcessor_with_state(DataProcessor_numeric):
+            def __init__(self, config, precision: int) -> None:
+                super().__init__(config)
+                self.precision = precision
+
+        self.config.custom_pre_processors.append(DataProcessor_with_state(self.config, 3))
+        clone = self.config.clone()
+        self.assertEqual(clone.custom_pre_processors[-1].precision, 3)
+        self.assertIs(clone.custom_pre_processors[-1].config, clone)
+
+        # Processors set on a clone before its first use are kept, by the overrides or later.
+        class DataProcessor_big(DataProcessor_numeric):
+            def _get_textual_representation_of_data(self, parent, current, data, **kwargs):
+                return 'BIG'
+
+        config = Config()
+        clone = config.clone(custom_pre_processors=[DataProcessor_big(config)])
+        other = config.clone()
+        other.custom_pre_processors = [DataProcessor_big(other)]
+        grandchild = other.clone()
+        for c in (clone, other, grandchild):
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=c, data=[5])
+            self.assertEqual(ET.tostring(convert_to_etree(ew), encoding='unicode'), '<root><sequence><numeric>BIG</numeric></sequence></root>')
+            self.assertEqual(len(c.default_processors), len(config.default_processors))
+        self.assertIs(grandchild.custom_pre_processors[0].config, grandchild)
+
+        with self.assertRaises(TypeError):
+            self.config.clone(no_such_option=1)
+
+    def test_pickle(self):
+        data = {'id': 1, 'names': ['a', 'b'], 'raw': b'xy', 'flag': None}
+        self.assertEqual(self.config.to_wire(), (Config, {}, None))
+        self.assertLess(len(pickle.dumps(self.config)), 200)
+
+        self.config.attr_flags = AttributeFlags.INC_ALL_DEBUG & ~AttributeFlags.INC_ALT_ID
+        self.config.root_label = 'doc'
+        self.config.attr_flag_names[AttributeFlags.INC_LEN] = 'count'
+        self.config.codec_binary.codec_name = 'hex'
+        self.config.codec_binary.codec_error_handler = 'strict'
+        self.config.scalar_text_cache.get_text(1, str)
+        self.config.custom_pre_processors.append(DataProcessor_with_precision(self.config, 3))
+        expected = ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)), encoding='unicode')
+        self.assertEqual(set(self.config.to_wire()[1]), {'attr_flags', 'root_label', 'attr_flag_names', '_codec_binary'})
+
+        config = pickle.loads(pickle.dumps(self.config))
+        self.assertEqual(len(config.scalar_text_cache), 0)
+        self.assertEqual(ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)), encoding='unicode'), expected)
+        self.assertEqual(config.codec_binary.codec_error_handler, 'strict')
+        self.assertEqual(config.custom_pre_processors[-1].precision, 3)
+        processors = config.custom_pre_processors + config.default_processors + config.custom_post_processors + [config.last_chance_processor]
+        for processor in processors:
+            self.assertIs(processor.config, config)
+            self.assertIs(processor.classifier, self.config.default_processors[0].classifier)
+
+        # The rebuilt configuration is independent of the configuration it was made from.
+        config.attr_flag_names[AttributeFlags.INC_LEN] = 'size'
+        self.assertEqual(ConfigBaseClass.from_wire(self.config.to_wire()).attr_flag_names[AttributeFlags.INC_LEN], 'count')
+        self.assertEqual(Config().attr_flag_names[AttributeFlags.INC_LEN], ATTRIBUTE_FLAGS_NAMES[AttributeFlags.INC_LEN])
+
     def test_DataProcessor_class_custom_post_processor(self):
         # cspell:ignore unmangled
         self.config.attr_flags = AttributeFlags.NONE
@@ -0,0 +1,77 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.codec_wrapper import CodecWrapper
+from libs.config import Config
+from libs.dry_run import plan_output
+from libs.xml_element_wrapper_converters import convert_to_bytes
+from tests.predefined_test_cases import TEST_CASE
+
+
+def make_codec(name: str) -> CodecWrapper:
+    codec = CodecWrapper()
+    codec.codec_name = name
+    return codec
+
+
+class TestDryRun(unittest.TestCase):
+    def assertPlan(self, config: Config, data, pruned: bool, **kwargs) -> None:
+        plan = plan_output(config, data, **kwargs)
+        self.assertEqual(plan.pruned, pruned)
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)
+        self.assertEqual(plan.byte_length, len(convert_to_bytes(root, **kwargs)))
+        elements = list(root.iter_with_parents())
+        self.assertEqual(plan.elements, len(elements))
+
+    def test_exact_size(self):
+        data = {'text': 'é中&<>"\n', 'list': [[1, 2], [3]], 'records': [{'a': i, 'b': 'x' * i} for i in range(5)], 'bytes': b'\x00\xff' * 100}
+        for flags in (AttributeFlags.NONE, AttributeFlags.INC_ALL_DEBUG):
+            for options in ({}, {'use_shape_templates': True}, {'share_leaf_elements': True}, {'stream_binary': True}):
+                for kwargs in ({}, {'space': '  '}, {'codec': make_codec('latin-1')}, {'codec': make_codec('ascii'), 'xml_declaration': True}):
+                    with self.subTest(flags=flags, options=options, kwargs=kwargs):
+                        config = Config()
+                        config.attr_flags = flags
+                        for name, value in options.items():
+                            setattr(config, name, value)
+                        self.assertPlan(config, data, True, **kwargs)
+        self.assertPlan(Config(), TEST_CASE, True, space='\t')
+
+    def test_depth(self):
+        data = {'a': [[{'b': 1}]]}
+        plan = plan_output(Config(), data)
+        self.assertEqual((plan.elements, plan.max_depth), (6, 5))
+
+    def test_fallback(self):
+        data = {'shared': (1, 2), 'again': [(1, 2)], 'text': 'é'}
+        config = Config()
+        self.assertPlan(config, data, False, codec=make_codec('utf-16'))
+        config.memoize_immutable_subtrees = True
+        self.assertPlan(config, data, False)
+        config = Config()
+        config.track_references = True
+        shared = [1, 2]
+        self.assertPlan(config, {'a': shared, 'b': shared}, False)
+
+    def test_concurrent_conversions(self):
+        config = Config()
+        data = {'records': [{'a': i, 'b': [str(i)] * 3} for i in range(200)]}
+        expected = convert_to_bytes(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+
+        def plan_and_convert(i: int) -> bytes:
+            if i % 2:
+                self.assertEqual(plan_output(config, data).byte_length, len(expected))
+            return convert_to_bytes(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for output in executor.map(plan_and_convert, range(16)):
+                self.assertEqual(output, expected)
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
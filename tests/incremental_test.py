@@ -0,0 +1,80 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import copy
+import unittest
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.incremental import reconvert_to_xml
+from libs.xml_element_wrapper_converters import convert_to_etree
+
+
+def to_string(ew) -> str:
+    return ET.tostring(convert_to_etree(ew), encoding='unicode')
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.config = Config()
+        self.previous = {
+            'server': {'host': 'localhost', 'port': 8080, 'tags': ['a', 'b']},
+            'users': {f'user{i}': {'id': i, 'enabled': True} for i in range(50)},
+            'version': 1,
+        }
+        self.data = copy.deepcopy(self.previous)
+        self.data['server']['port'] = 9090
+        self.data['users']['user7']['enabled'] = False
+        self.data['users']['user9']['name'] = 'nine'
+        self.data['server']['tags'].append('c')
+
+    def check(self, flags: AttributeFlags, **kwargs) -> list:
+        self.config.attr_flags = flags
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=self.previous)
+        changed = reconvert_to_xml(self.config, root, self.data, **kwargs)
+        config = Config()
+        config.attr_flags = flags
+        self.assertEqual(to_string(root), to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=self.data)))
+        if AttributeFlags.INC_SEQ_ID & flags:
+            self.assertEqual(self.config.elements_sequential_counter, config.elements_sequential_counter)
+        return changed
+
+    def test_diff(self):
+        expected = ['root/dict/server/port', 'root/dict/server/tags', 'root/dict/users/user7/enabled', 'root/dict/users/user9']
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_SEQ_ID | AttributeFlags.INC_LEN]:
+            self.assertEqual(self.check(flags, previous_data=self.previous), expected)
+
+    def test_changed_paths(self):
+        paths = [('users', 'user9', 'name'), ('server', 'port'), ('users', 'user7', 'enabled'), ('server', 'tags', 2), ('server', 'tags')]
+        expected = ['root/dict/server/port', 'root/dict/server/tags', 'root/dict/users/user7/enabled', 'root/dict/users/user9']
+        self.assertEqual(sorted(self.check(AttributeFlags.INC_SEQ_ID, changed_paths=paths)), expected)
+
+    def test_top_level_and_unchanged(self):
+        self.previous = copy.deepcopy(self.data)
+        self.assertEqual(self.check(AttributeFlags.NONE, previous_data=self.data), [])
+        self.data = [1, 2]
+        self.assertEqual(self.check(AttributeFlags.NONE, previous_data=self.previous), ['root/sequence'])
+        self.assertEqual(self.check(AttributeFlags.NONE, changed_paths=[('x',)]), ['root/sequence'])
+
+    def test_equal_values_of_other_types(self):
+        # Equal with `==`, but converted to other text and data types.
+        self.previous = {'a': True, 'b': {'x': 1}}
+        self.data = {'a': 1, 'b': {'x': 1.0}}
+        self.assertEqual(self.check(AttributeFlags.NONE, previous_data=self.previous), ['root/dict/a', 'root/dict/b/x'])
+        self.previous = {'b': {'x': 1.0}, 'a': 1}
+        self.assertEqual(self.check(AttributeFlags.NONE, previous_data=self.previous), ['root/dict'])
+
+    def test_with_shared_leaves_and_references(self):
+        self.config.share_leaf_elements = True
+        self.assertEqual(len(self.check(AttributeFlags.NONE, previous_data=self.previous)), 4)
+        self.config.track_references = True
+        self.assertEqual(self.check(AttributeFlags.NONE, previous_data=self.previous), ['root/dict'])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
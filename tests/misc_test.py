@@ -4,8 +4,10 @@
 #   C0115 missing-class-docstring
 #   C0116 missing-function-docstring
 #   C0301 line-too-long
+import subprocess
+import sys
 import unittest
-from libs.misc import coalesce
+from libs.misc import coalesce, convert_windows_tz_name_to_iani_name, islinux, ismac, iswindows
 
 
 class TestMisc(unittest.TestCase):
@@ -25,6 +27,21 @@ class TestMisc(unittest.TestCase):
         self.assertEqual(5, coalesce(5, 'g'))
         self.assertEqual('g', coalesce('g', 5))
 
+    def test_convert_windows_tz_name_to_iani_name(self):
+        self.assertEqual(convert_windows_tz_name_to_iani_name('AUS Eastern Standard Time'), 'Australia/Sydney')
+        self.assertEqual(convert_windows_tz_name_to_iani_name('Australia/Sydney'), 'Australia/Sydney')
+        self.assertEqual(convert_windows_tz_name_to_iani_name('Nowhere'), 'Nowhere')
+
+    def test_platform(self):
+        self.assertEqual([iswindows(), ismac(), islinux()].count(True), int(sys.platform in ('win32', 'darwin') or sys.platform.startswith('linux')))
+
+    def test_lazy_imports(self):
+        # Rarely used modules are only imported when first needed.
+        lazy = ('calendar', 'inspect', 'json', 'platform', 'tzlocal', 'uuid', 'zoneinfo')
+        code = f'import sys, libs.config; print(" ".join(m for m in {lazy!r} if m in sys.modules))'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), [])
+
 
 if __name__ == '__main__':
     unittest.main()  # pragma: no cover
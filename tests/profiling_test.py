@@ -0,0 +1,97 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import unittest
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import ConfigBaseClass, DataProcessorAbstractBaseClass, XmlElementNameBaseClass
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.data_processor import DataProcessor_dict, DataProcessor_numeric, DataProcessor_str
+from libs.xml_element_wrapper_converters import convert_to_etree
+
+
+class TestProcessorProfiler(unittest.TestCase):
+    @staticmethod
+    def convert(config: Config, data) -> str:
+        return ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)), encoding='unicode')
+
+    def find(self, profiler, processor_type):
+        [stats] = [stats for processor, stats in profiler.processors.items() if type(processor) is processor_type]
+        return stats
+
+    def test_counters(self):
+        config = Config()
+        config.attr_flags = AttributeFlags.INC_PYTHON_DATA_TYPE
+        data = {'a': 1, 'b': 'text', '1 bad': 2.5}
+        expected = self.convert(config, data)
+        with config.profile() as profiler:
+            self.assertEqual(self.convert(config, data), expected)
+
+        self.assertEqual(self.find(profiler, DataProcessor_dict).elements, 1)
+        self.assertEqual(self.find(profiler, DataProcessor_numeric).elements, 2)
+        str_stats = self.find(profiler, DataProcessor_str)
+        self.assertEqual(str_stats.elements, 1)
+        self.assertEqual(str_stats.calls['_get_textual_representation_of_data'], 1)
+        self.assertEqual(str_stats.calls['_add_attributes'], 1)
+        self.assertGreater(str_stats.tries, 0)
+        self.assertEqual(str_stats.calls['_is_expected_data_type'], str_stats.tries)
+        self.assertEqual(sum(stats.elements for stats in profiler.processors.values()), 4)
+        self.assertGreater(sum(stats.seconds['_add_attributes'] for stats in profiler.processors.values()), 0)
+        # The root and the 4 elements.
+        self.assertEqual(profiler.tag_fixes, 5)
+        self.assertEqual(profiler.invalid_tags, 1)
+        self.assertIn('DataProcessor_numeric', profiler.stats()['processors'])
+        self.assertIn('tag fixing: 5 names, 1 invalid', profiler.report())
+
+    def test_restored(self):
+        config = Config()
+        fix = XmlElementNameBaseClass.__dict__['_fix_invalid_xml_element_name']
+        with config.profile() as profiler:
+            other = Config()
+            self.convert(other, {'a': 1})
+            self.assertEqual(profiler.tag_fixes, 0)
+            with self.assertRaises(RuntimeError):
+                with config.profile():
+                    pass
+            with other.profile():
+                self.convert(other, {'a': 1})
+            self.assertIsNot(XmlElementNameBaseClass.__dict__['_fix_invalid_xml_element_name'], fix)
+        self.assertIs(XmlElementNameBaseClass.__dict__['_fix_invalid_xml_element_name'], fix)
+        self.assertEqual(sum(stats.tries for stats in profiler.processors.values()), 0)
+        for processor in config._all_processors():  # pylint: disable=W0212; protected-access
+            self.assertEqual(processor.__dict__.keys(), {'_classifier', 'config'})
+        self.assertIsNotNone(ConfigBaseClass._plan_clone(config._all_processors()))  # pylint: disable=W0212; protected-access
+
+    def test_entered_again(self):
+        config = Config()
+        profiler = config.profile()
+        for _ in range(2):
+            with profiler:
+                self.convert(config, {'a': 1})
+        self.assertEqual(self.find(profiler, DataProcessor_numeric).elements, 2)
+        self.assertEqual(profiler.tag_fixes, 2 * 3)
+
+    def test_element_callbacks(self):
+        for use_shape_templates in (False, True):
+            with self.subTest(use_shape_templates=use_shape_templates):
+                config = Config()
+                config.use_shape_templates = use_shape_templates
+                data = [{'a': 1, 'b': [2]}, {'a': 3, 'b': [4]}]
+                events = []
+                with config.profile(
+                    on_element_start=lambda processor, value: events.append(('start', value)),
+                    on_element_end=lambda processor, value, element: events.append(('end', value, element.tag)),
+                ) as profiler:
+                    self.convert(config, data)
+                self.assertEqual(events[:4], [('start', data), ('start', data[0]), ('start', 1), ('end', 1, 'a')])
+                self.assertEqual(events[-2:], [('end', data[1], 'dict'), ('end', data, 'sequence')])
+                self.assertEqual(len(events), 2 * 9)
+                templated = sum(stats.templated for stats in profiler.processors.values())
+                self.assertEqual(templated > 0, use_shape_templates)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
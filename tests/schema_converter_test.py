@@ -0,0 +1,165 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import dataclasses
+import enum
+import unittest
+from typing import Any, Dict, List, NamedTuple, Optional, TypedDict, override
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.data_processor import DataProcessor_numeric
+from libs.schema_converter import compile_converter
+from libs.xml_element_wrapper_converters import convert_to_etree
+
+
+class Color(enum.Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+class Point(NamedTuple):
+    x: int
+    y: float
+
+
+class Address(TypedDict):
+    street: str
+    city: str
+    zip: Optional[int]
+
+
+class Person(TypedDict):
+    name: str
+    age: int
+    active: bool
+    color: Color
+    home: Address
+    location: Point
+    tags: List[str]
+    extra: Any
+
+
+@dataclasses.dataclass
+class Order:
+    id: int
+    customer: Person
+    total: float
+    note: Optional[str] = None
+    items: List[Dict[str, int]] = dataclasses.field(default_factory=list)
+    parent: Optional['Order'] = None
+    currency = 'EUR'
+
+    def describe(self) -> str:
+        return f'order {self.id}'  # pragma: no cover
+
+
+def make_person(i: int) -> Person:
+    return {
+        'name': f'person <{i}>',
+        'age': 20 + i,
+        'active': i % 2 == 0,
+        'color': Color.RED if i % 2 else Color.BLUE,
+        'home': {'street': f'{i} Main St', 'city': 'Paris & Lyon', 'zip': None if i % 3 else 75000 + i},
+        'location': Point(i, i / 2),
+        'tags': ['a', 'b'][:i % 3],
+        'extra': {'i': i} if i % 2 else [i, None],
+    }
+
+
+def to_string(ew) -> str:
+    return ET.tostring(convert_to_etree(ew), encoding='unicode')
+
+
+class TestSchemaConverter(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.config = Config()
+
+    def check(self, annotation, values: list) -> None:
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_ALL_DEBUG & ~AttributeFlags.INC_ALT_ID, AttributeFlags.INC_LEN | AttributeFlags.INC_LENGTH_ELEMENT_TEXT]:
+            self.config.attr_flags = flags
+            converter = compile_converter(annotation, self.config)
+            for value in values:
+                expected = to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=value))
+                counter = self.config.elements_sequential_counter
+                self.assertEqual(to_string(converter(value)), expected)
+                self.assertEqual(self.config.elements_sequential_counter, counter)
+
+    def test_typeddict(self):
+        self.check(Person, [make_person(i) for i in range(6)])
+
+    def test_namedtuple(self):
+        self.check(Point, [Point(1, 2.5), Point(-1, 0.0), Point('x', None)])
+
+    def test_dataclass(self):
+        parent = Order(1, make_person(1), 10.5)
+        self.check(Order, [
+            parent,
+            Order(2, make_person(2), 3.25, 'rush', [{'sku': 1}], parent),
+            Order(3, make_person(3), 1, note=b'bytes'),
+        ])
+
+    def test_non_conforming_values(self):
+        person = make_person(1)
+        reordered = dict(reversed(person.items()))
+        missing = {k: v for k, v in person.items() if k != 'age'}
+        wrong_types = person | {'age': '21', 'home': None, 'location': (1, 2), 'color': 'red', 'active': 1}
+        order = Order(4, reordered, 2.5)
+        order.added = 'attribute'  # pylint: disable=W0201; attribute-defined-outside-init
+        self.check(Person, [reordered, missing, wrong_types, ['not', 'a', 'dict']])
+        self.check(Order, [order, Order(5, wrong_types, 'total')])
+
+    def test_config_changes(self):
+        self.config.attr_flags = AttributeFlags.NONE
+        converter = compile_converter(Person, self.config)
+        person = make_person(2)
+
+        for flags, track_references, share_leaf_elements in [
+            (AttributeFlags.INC_SEQ_ID, False, False),
+            (AttributeFlags.NONE, True, False),
+            (AttributeFlags.NONE, False, True),
+        ]:
+            self.config.attr_flags = flags
+            self.config.track_references = track_references
+            self.config.share_leaf_elements = share_leaf_elements
+            expected = to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=person))
+            self.assertEqual(to_string(converter(person)), expected)
+
+        self.config.override_dict_label = 'record'
+        converter = compile_converter(Person, self.config)
+        self.assertEqual(to_string(converter(person)), to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=person)))
+        self.assertIn('<record>', to_string(converter(person)))
+
+    def test_value_dependent_pre_processor(self):
+        class DataProcessor_big(DataProcessor_numeric):
+            @override
+            def _get_textual_representation_of_data(self, parent, current, data, **kwargs) -> str:
+                return 'BIG'
+
+            @override
+            def _is_expected_data_type(self, data: Any) -> bool:
+                return type(data) is int and data > 21  # pylint: disable=C0123; unidiomatic-typecheck
+
+        # Accepts some of the ints only, the processor of a sample int is not the one of every int.
+        self.config.custom_pre_processors.append(DataProcessor_big(self.config))
+        self.check(Person, [make_person(i) for i in range(4)])
+        self.check(Order, [Order(30, make_person(3), 1.5)])
+        self.assertIn('<age length_element_text="3">BIG</age>', to_string(compile_converter(Person, self.config)(make_person(3))))
+
+    def test_unsupported(self):
+        @dataclasses.dataclass(slots=True)
+        class Slotted:
+            x: int
+
+        for annotation in [int, Dict[str, int], Slotted]:
+            with self.assertRaises(TypeError):
+                compile_converter(annotation, self.config)
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
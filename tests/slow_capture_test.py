@@ -0,0 +1,115 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import json
+import logging
+import os
+import pickle
+import tempfile
+import unittest
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.config import Config
+from libs.conversion_statistics import ConversionStatistics
+from libs.slow_capture import SlowConversionCapture, shape_summary
+from libs.xml_element_wrapper_converters import convert_to_string
+
+
+class Point:
+    def __init__(self, x: int, y: int) -> None:
+        self.x = x
+        self.y = y
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+class TestSlowCapture(unittest.TestCase):
+    def test_shape_summary(self):
+        shared = [1, 2]
+        data = {
+            'orders': [{'id': i, 'email': f'user{i}@example.com', 'at': Point(i, i)} for i in range(3)],
+            'user@example.com': 'secret',
+            7: shared,
+            'again': shared,
+        }
+        summary = shape_summary(Config(), data, allowed_keys=['orders', 'id', 'email', 'at', 'x', 'y', 'again'])
+        text = json.dumps(summary)
+        self.assertNotIn('example', text)
+        self.assertNotIn('secret', text)
+        self.assertEqual(summary['paths']['$.orders[].id'], 3)
+        self.assertEqual(summary['paths']['$.orders[].at.x'], 3)
+        self.assertEqual(summary['paths']['$.<str>'], 1)
+        # The shared list is walked once.
+        self.assertEqual(summary['paths']['$.<int>[]'], 2)
+        self.assertNotIn('$.again[]', summary['paths'])
+        self.assertEqual(summary['max_depth'], 4)
+        self.assertEqual(summary['largest_sequences'][0], {'path': '$.orders', 'length': 3})
+        self.assertEqual(summary['processors']['DataProcessor_str'], 4)
+        self.assertEqual(summary['processors']['DataProcessor_post_processor_for_classes'], 3)
+        self.assertEqual(summary['types']['int'], 3 + 6 + 2)
+        self.assertFalse(summary['truncated'])
+
+        # Keys are redacted by default, even those looking like names.
+        summary = shape_summary(Config(), {'alice': [{'id': 1}], 'bob': 2}, max_values=3)
+        self.assertEqual(summary['paths'], {'$': 1, '$.<str>': 1, '$.<str>[]': 1})
+        self.assertEqual(summary['values'], 3)
+        self.assertTrue(summary['truncated'])
+
+        summary = shape_summary(Config(), data, redact_keys=False)
+        self.assertNotIn('example', json.dumps(summary))
+        self.assertEqual(summary['paths']['$.orders[].id'], 3)
+        self.assertEqual(summary['paths']['$.<str>'], 1)
+
+    def test_capture(self):
+        config = Config()
+        handler = ListHandler()
+        config.slow_conversion_capture = SlowConversionCapture(handler=handler, max_seconds=None, max_elements=10, allowed_keys=['values'])
+        small = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=list(range(5)))
+        self.assertEqual(handler.messages, [])
+        data = {'values': list(range(20))}
+        statistics = ConversionStatistics()
+        root = DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data, statistics=statistics)
+        self.assertEqual(statistics.elements, 23)
+        [message] = handler.messages
+        record = json.loads(message)
+        self.assertEqual(record['elements'], 23)
+        self.assertEqual(record['max_elements'], 10)
+        self.assertEqual(record['paths']['$.values[]'], 20)
+        self.assertEqual(config.slow_conversion_capture.captures, 1)
+
+        config.slow_conversion_capture = None
+        self.assertEqual(convert_to_string(root), convert_to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)))
+        self.assertEqual(convert_to_string(small), convert_to_string(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=list(range(5)))))
+
+    def test_rotating_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.jsonl')
+            config = Config()
+            capture = config.slow_conversion_capture = SlowConversionCapture(path, max_seconds=0.0, max_bytes=600, backup_count=1)
+            for i in range(6):
+                DataProcessorAbstractBaseClass.convert_to_xml(config=config, data={'i': i})
+            capture.close()
+            self.assertEqual(sorted(os.listdir(directory)), ['slow.jsonl', 'slow.jsonl.1'])
+            with open(path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertGreater(len(records), 0)
+            self.assertEqual(records[-1]['paths'], {'$': 1, '$.<str>': 1})
+
+            # The capture stays local: it is not pickled with the configuration.
+            self.assertIsNone(pickle.loads(pickle.dumps(config)).slow_conversion_capture)
+
+        with self.assertRaises(ValueError):
+            SlowConversionCapture()
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
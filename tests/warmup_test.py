@@ -0,0 +1,109 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import datetime as dt
+import enum
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.config import Config
+from libs.warmup import ConversionProfile
+from libs.xml_element_wrapper_converters import convert_to_etree
+
+
+class Color(enum.Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+def make_order(i: int) -> dict:
+    return {
+        'id': i,
+        'color': Color.RED if i % 2 else Color.BLUE,
+        'price': i / 4,
+        'note': None if i % 3 else f'note {i}',
+        'customer': {'name': f'name {i}', 'vip': i % 2 == 0},
+        'lines': [{'sku': i, 'qty': 2}],
+    }
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.config = self.make_config()
+
+    @staticmethod
+    def make_config() -> Config:
+        config = Config()
+        config.attr_flags = AttributeFlags.INC_PYTHON_DATA_TYPE | AttributeFlags.INC_LEN
+        config.use_shape_templates = True
+        return config
+
+    @staticmethod
+    def convert(config: Config, data) -> str:
+        return ET.tostring(convert_to_etree(DataProcessorAbstractBaseClass.convert_to_xml(config=config, data=data)), encoding='unicode')
+
+    def test_warm(self):
+        samples = [make_order(i) for i in range(6)]
+        profile = self.config.warm(samples)
+        self.assertEqual(profile.types[Color], 6)
+        self.assertEqual(profile.shapes[(('name', 'vip'), (str, bool))], 6)
+        self.assertEqual(sum(profile.shapes.values()), 6 * 3)
+
+        self.config.shape_template_cache.hits = self.config.shape_template_cache.misses = 0
+        data = make_order(7)
+        self.assertEqual(self.convert(self.config, data), self.convert(self.make_config(), data))
+        self.assertEqual(self.config.shape_template_cache.misses, 0)
+
+    def test_profile_file(self):
+        samples = [make_order(i) for i in range(6)] + [{'at': dt.date(2020, 1, 2), 1: 'int key'}, {(1, 2): 'tuple key'}]
+        profile = self.config.warm(samples)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            profile.save(path)
+            loaded = ConversionProfile.load(path)
+        self.assertEqual(loaded.types, profile.types)
+        self.assertEqual(loaded.shapes, profile.shapes)
+        self.assertNotIn(((1, 2),), [keys for keys, _ in loaded.shapes])
+
+        # A new configuration is warmed from the profile, without the data.
+        config = self.make_config()
+        self.assertEqual(config.warm(profile=loaded).shapes, profile.shapes)
+        self.assertGreater(len(config.scalar_text_cache), 0)
+        config.shape_template_cache.hits = config.shape_template_cache.misses = 0
+        for data in [make_order(8), make_order(9)]:
+            self.assertEqual(self.convert(config, data), self.convert(self.make_config(), data))
+        self.assertEqual(config.shape_template_cache.misses, 0)
+
+        # A shape whose values cannot be made up is learned on first use.
+        data = {'at': dt.date(2021, 3, 4), 1: 'x'}
+        self.assertEqual(self.convert(config, data), self.convert(self.make_config(), data))
+        self.assertEqual(config.shape_template_cache.misses, 1)
+
+    def test_from_json(self):
+        # The module of this test depends on the runner, eg `tests.warmup_test` or `warmup_test`.
+        color = f'{Color.__module__}:{Color.__qualname__}'
+        profile = ConversionProfile.from_json({
+            'version': ConversionProfile.VERSION,
+            'types': {'builtins:int': 2, 'builtins:NoneType': 1, 'no_such_module:Type': 1, color: 1},
+            'shapes': [
+                {'keys': ['a', 'b'], 'types': ['builtins:int', 'builtins:NoneType'], 'count': 3},
+                {'keys': ['a'], 'types': ['no_such_module:Type'], 'count': 1},
+            ],
+        })
+        self.assertEqual(profile.types, {int: 2, type(None): 1, Color: 1})
+        self.assertEqual(profile.shapes, {(('a', 'b'), (int, type(None))): 3})
+        self.assertEqual(profile.samples(), [{'a': 0, 'b': None}, [0, None, Color.RED]])
+
+        with self.assertRaises(ValueError):
+            ConversionProfile.from_json({'version': 0, 'types': {}, 'shapes': []})
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
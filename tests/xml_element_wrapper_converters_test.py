@@ -0,0 +1,91 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+import base64
+import io
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from libs.abstract_baseclasses import DataProcessorAbstractBaseClass
+from libs.attributes import AttributeFlags
+from libs.binary_text import BinaryText
+from libs.config import Config
+from libs.codec_wrapper import CodecWrapper
+from libs.xml_element_wrapper_converters import convert_to_bytes, convert_to_etree, convert_to_string, write_xml
+from tests.predefined_test_cases import TEST_CASE
+
+
+class TestXmlElementWrapperConverters(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.config = Config()
+
+    def test_convert_to_string_matches_etree(self):
+        for flags in [AttributeFlags.NONE, AttributeFlags.INC_ALL_DEBUG]:
+            self.config.attr_flags = flags
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=TEST_CASE)
+            e = convert_to_etree(ew)
+            self.assertEqual(convert_to_string(ew), ET.tostring(e, encoding='unicode'))
+            ET.indent(e)
+            self.assertEqual(convert_to_string(ew, space='  '), ET.tostring(e, encoding='unicode'))
+
+    def test_escaping(self):
+        data = {'text': 'a < b & c > "d"', 'list': ['\t\r\n']}
+        self.config.attr_flags = AttributeFlags.NONE
+        ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+        ew.children[0].attributes['attr'] = 'a < b & c > "d"\t\r\n'
+        self.assertEqual(convert_to_string(ew), ET.tostring(convert_to_etree(ew), encoding='unicode'))
+
+    def test_stream_binary(self):
+        payload = os.urandom(10000)
+        self.config.stream_binary = True
+        self.config.binary_chunk_size = 1000
+        self.config.attr_flags = AttributeFlags.INC_LENGTH_ELEMENT_TEXT
+
+        with tempfile.TemporaryFile() as f:
+            f.write(payload)
+            f.seek(0)
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data={'file': f, 'bytes': payload})
+            self.assertIsInstance(ew.children[0].children[0].text, BinaryText)
+            self.assertIsInstance(ew.children[0].children[1].text, BinaryText)
+
+            stream = io.StringIO()
+            write_xml(ew, stream)
+            result = stream.getvalue()
+            # Written twice to confirm the file is read again from its starting position.
+            self.assertEqual(result, convert_to_string(ew))
+
+        text = base64.encodebytes(payload).decode().strip()
+        self.assertEqual(
+            result,
+            f'<root><dict length_element_text="0"><file length_element_text="{len(text)}">{text}</file>'
+            f'<bytes length_element_text="{len(text)}">{text}</bytes></dict></root>'
+        )
+
+    def test_convert_to_bytes(self):
+        data = {'text': 'caf\u00e9 \u20ac \U0001f600 <&>', 'list': [1, 2.5, None]}
+        self.config.attr_flags = AttributeFlags.INC_ALL_DEBUG
+        for codec_name in ['utf_8', 'utf_16', 'latin_1', 'ascii', 'cp1252']:
+            self.config.codec_text.codec_name = codec_name
+            encoding = self.config.codec_text.codec.name
+            ew = DataProcessorAbstractBaseClass.convert_to_xml(config=self.config, data=data)
+            e = convert_to_etree(ew)
+            self.assertEqual(convert_to_bytes(ew), ET.tostring(e, encoding=encoding))
+            self.assertEqual(
+                convert_to_bytes(ew, xml_declaration=True),
+                ET.tostring(e, encoding=encoding, xml_declaration=True)
+            )
+            ET.indent(e, '\t')
+            self.assertEqual(
+                convert_to_bytes(ew, space='\t', codec=CodecWrapper(codec_name), xml_declaration=False),
+                ET.tostring(e, encoding=encoding, xml_declaration=False)
+            )
+            self.assertEqual(ET.fromstring(convert_to_bytes(ew)).find('dict/text').text, data['text'])
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover
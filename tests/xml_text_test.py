@@ -0,0 +1,70 @@
+# pylint: disable=C0103,C0114,C0115,C0116,C0301,W0212
+#   C0103 invalid-name
+#   C0114 missing-module-docstring
+#   C0115 missing-class-docstring
+#   C0116 missing-function-docstring
+#   C0301 line-too-long
+#   W0212 protected-access
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import xml.etree.ElementTree as ET
+from libs import xml_text
+from libs.xml_text import ESCAPE_CACHE_MAX_LENGTH, ESCAPE_CACHE_SIZE, clear_escape_caches, escape_attribute, escape_text, sanitize_text
+
+
+class TestXmlText(unittest.TestCase):
+    VALUES = ['', 'plain', 'a < b & c > "d"', '\t\r\n', '&amp;', "'single'", 'é€\U0001f600', 'x' * 100 + '&' + 'y' * 100]
+
+    def setUp(self) -> None:
+        super().setUp()
+        clear_escape_caches()
+
+    def test_same_as_etree(self):
+        for value in self.VALUES:
+            self.assertEqual(escape_text(value), ET._escape_cdata(value))  # type: ignore[attr-defined]
+            self.assertEqual(escape_attribute(value), ET._escape_attrib(value))  # type: ignore[attr-defined]
+
+    def test_no_escaping_returns_same_object(self):
+        value = 'z' * (ESCAPE_CACHE_MAX_LENGTH + 1)
+        self.assertIs(escape_text(value), value)
+        self.assertIs(escape_attribute(value), value)
+
+    def test_cache(self):
+        escape_text('OK')
+        escape_text('a & b')
+        escape_text('a & b')
+        escape_text('&' * (ESCAPE_CACHE_MAX_LENGTH + 1))
+        self.assertEqual(xml_text._text_cache, {'a & b': 'a &amp; b'})
+
+        for i in range(ESCAPE_CACHE_SIZE + 10):
+            escape_attribute(f'"{i}"')
+        self.assertEqual(len(xml_text._attribute_cache), ESCAPE_CACHE_SIZE)
+        self.assertNotIn('"0"', xml_text._attribute_cache)
+        self.assertIn(f'"{ESCAPE_CACHE_SIZE + 9}"', xml_text._attribute_cache)
+
+        clear_escape_caches()
+        self.assertEqual(xml_text._text_cache, {})
+        self.assertEqual(xml_text._attribute_cache, {})
+
+    def test_cache_threads(self):
+        def escape(start: int) -> None:
+            for i in range(start, start + 2 * ESCAPE_CACHE_SIZE):
+                escape_text(f'{i} &')
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(escape, range(0, 16 * ESCAPE_CACHE_SIZE, ESCAPE_CACHE_SIZE)))
+        self.assertLessEqual(len(xml_text._text_cache), ESCAPE_CACHE_SIZE + 8)
+
+    def test_sanitize_text(self):
+        for value in ['', 'plain', 'tab\tline\ncr\r', 'é€\U0001f600\ufffd']:
+            self.assertIs(sanitize_text(value), value)
+        self.assertEqual(sanitize_text('a\x00b\x08c\x0bd\x0ce\x1ff\ud83dg\ufffeh\uffff'), 'abcdefgh')
+        self.assertEqual(sanitize_text('a\x00\tb', '\ufffd'), 'a\ufffd\tb')
+        for codepoint in range(0x10000):
+            char = chr(codepoint)
+            valid = char in '\t\n\r' or 0x20 <= codepoint <= 0xD7FF or 0xE000 <= codepoint <= 0xFFFD
+            self.assertEqual(sanitize_text(char), char if valid else '')
+
+
+if __name__ == '__main__':
+    unittest.main()  # pragma: no cover